@@ -0,0 +1,119 @@
+"""
+Benchmark of PRB admission decisions with many slices per cell.
+
+Fills cells with thousands of committed slices, then measures the cost of
+admit() + commit() per request, and of pack() on a batch of requests. The
+cost of a decision should not grow with the number of slices already on the
+cell. The batch packing result is checked against the maximum number of
+requests that can fit, computed by sorting the demands. For requests
+spanning several cells, pack() is compared on small random batches with the
+exact maximum, found by enumeration, and with admitting the smallest total
+demands first; it must never admit fewer requests than the latter.
+
+Usage:
+    python benchmarks/bench_admission.py [--slices 1000 10000 100000] [--cells 4] [--requests 10000] [--batch 1000]
+"""
+import argparse
+import itertools
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from admission import AdmissionController  # noqa: E402
+
+
+def entry(nci, sd, min_prb):
+    return {"plmnId": {"mcc": "208", "mnc": "93"}, "nci": nci, "sst": 1, "sd": sd,
+            "minPRB": min_prb, "maxPRB": 100}
+
+
+def smallest_total_first(demands, free):
+    free = dict(free)
+    admitted = 0
+    for demand in sorted(demands, key=lambda demand: sum(demand.values())):
+        if all(delta <= free[nci] for nci, delta in demand.items()):
+            for nci, delta in demand.items():
+                free[nci] -= delta
+            admitted += 1
+    return admitted
+
+
+def exact_maximum(demands, free):
+    for count in range(len(demands), -1, -1):
+        for chosen in itertools.combinations(demands, count):
+            if all(sum(demand.get(nci, 0) for demand in chosen) <= capacity for nci, capacity in free.items()):
+                return count
+    return 0
+
+
+def check_multi_cell(rng, trials=200, cells=3, size=12):
+    # Returns how many batches pack() and smallest-total-first each solve exactly
+    packed_optimal = greedy_optimal = 0
+    for _ in range(trials):
+        demands = [{nci: rng.randint(1, 40) for nci in rng.sample(range(cells), rng.randint(1, cells))}
+                   for _ in range(size)]
+        controller = AdmissionController(cell_capacity=100)
+        batch = [[entry(nci, f"m{i}-{nci}", min_prb) for nci, min_prb in demand.items()]
+                 for i, demand in enumerate(demands)]
+        packed = sum(1 for result in controller.pack(batch) if result is not None)
+        free = {nci: 100 for nci in range(cells)}
+        greedy = smallest_total_first(demands, free)
+        maximum = exact_maximum(demands, free)
+        assert greedy <= packed <= maximum, "pack() admitted fewer requests than smallest-total-first"
+        packed_optimal += packed == maximum
+        greedy_optimal += greedy == maximum
+    return packed_optimal, greedy_optimal
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PRB admission control.')
+    parser.add_argument('--slices', type=int, nargs='+', default=[1000, 10000, 100000],
+                        help='Slices already committed per cell.')
+    parser.add_argument('--cells', type=int, default=4, help='Number of cells.')
+    parser.add_argument('--requests', type=int, default=10000, help='Requests timed per measurement.')
+    parser.add_argument('--batch', type=int, default=1000, help='Requests per pack() batch.')
+    args = parser.parse_args()
+    rng = random.Random(0)
+
+    trials = 200
+    packed_optimal, greedy_optimal = check_multi_cell(rng, trials)
+    print(f"multi-cell batches solved exactly: pack() {packed_optimal}/{trials}, "
+          f"smallest total first {greedy_optimal}/{trials}")
+
+    print(f"{'slices/cell':>11} {'admit+commit (us)':>18} {'pack (ms)':>10} {'packed':>7} {'optimum':>8}")
+    for slices in args.slices:
+        # Every slice reserves 0 minPRB so the cells never fill up while timing admit()
+        controller = AdmissionController(cell_capacity=100)
+        controller.load({"existing": [entry(nci, f"s{i}", 0) for nci in range(args.cells) for i in range(slices)]})
+
+        requests = [[entry(rng.randrange(args.cells), f"r{i}", 0)] for i in range(args.requests)]
+        start = time.perf_counter()
+        for request in requests:
+            admitted, _ = controller.admit(request)
+            controller.commit(admitted)
+        per_request = (time.perf_counter() - start) / len(requests)
+
+        batch = [[entry(i % args.cells, f"b{i}", rng.randint(1, 20))] for i in range(args.batch)]
+        start = time.perf_counter()
+        packed = controller.pack(batch)
+        t_pack = time.perf_counter() - start
+
+        # Maximum number of requests fitting on each cell: smallest demands first
+        optimum = 0
+        for nci in range(args.cells):
+            used = 0
+            for demand in sorted(request[0]["minPRB"] for request in batch if request[0]["nci"] == nci):
+                if used + demand > 100:
+                    break
+                used += demand
+                optimum += 1
+        admitted = sum(1 for result in packed if result is not None)
+        assert admitted == optimum, "pack() admitted fewer requests than fit"
+        print(f"{slices:>11} {per_request * 1e6:>18.1f} {t_pack * 1e3:>10.1f} {admitted:>7} {optimum:>8}")
+
+
+if __name__ == "__main__":
+    main()
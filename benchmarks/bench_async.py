@@ -0,0 +1,188 @@
+"""
+Side-by-side load benchmark of the gunicorn (threads) and asgi (asyncio) servers.
+
+Starts a stub PMS with a fixed PUT latency and the rApp twice, once with
+api_server.server 'gunicorn' (one worker with --threads threads) and once
+with 'asgi' (uvicorn, one process). Each server is loaded closed-loop at
+every --concurrency level with an asyncio client, and the table reports:
+
+- req/s, p50 and p99 latency and failed requests;
+- CPU ms/req: CPU time of the server processes (from /proc) per request;
+- req/s/core: throughput one fully busy core would sustain at that cost;
+- in flight/core: requests one core keeps waiting on the PMS at that rate
+  (req/s/core times the PMS latency, by Little's law), for the asgi server,
+  or the thread count when that is lower, for gunicorn.
+
+Pin the servers to one core with --cpu to measure per-core throughput
+directly; on a machine with a single core, the stub and load generator
+share it and the CPU figures are the reliable ones.
+
+Usage:
+    python benchmarks/bench_async.py [--latency 0.05] [--concurrency 8 32 128 512] [--duration 5]
+        [--threads 8] [--cpu 0]
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import aiohttp
+import requests
+import yaml
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.join(BENCH_DIR, "..")
+sys.path.insert(0, BENCH_DIR)
+
+from compare_servers import free_port, rapp_config  # noqa: E402
+from load_test import load_descriptors, percentile  # noqa: E402
+
+CLOCK_TICKS = os.sysconf("SC_CLK_TCK")
+
+
+def process_tree(pid):
+    pids = [pid]
+    for child_pid in pids:
+        try:
+            for task in os.listdir(f"/proc/{child_pid}/task"):
+                with open(f"/proc/{child_pid}/task/{task}/children") as f:
+                    pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            continue
+    return pids
+
+
+def cpu_seconds(pid):
+    # utime + stime of the server and its worker processes
+    total = 0
+    for process in process_tree(pid):
+        try:
+            with open(f"/proc/{process}/stat") as f:
+                fields = f.read().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        total += int(fields[11]) + int(fields[12])
+    return total / CLOCK_TICKS
+
+
+def wait_until_up(url, process, timeout=30.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {process.returncode}")
+        try:
+            if requests.get(url, timeout=1).status_code == 200:
+                return
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} did not come up")
+
+
+def start_server(server, stub, threads, cpu):
+    port = free_port()
+    config = rapp_config(stub, port, {"stream_descriptors": True, "server": server, "workers": 1,
+                                      "threads": threads, "preload": True, "timeout": 120})
+    config["logging"]["level"] = "ERROR"
+    config["http_client"] = {"pool_maxsize": 1024}
+    config_file = tempfile.NamedTemporaryFile("w", suffix=".yaml", delete=False)
+    with config_file:
+        yaml.safe_dump(config, config_file)
+    preexec = (lambda: os.sched_setaffinity(0, {cpu})) if cpu is not None else None
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "rApp_NASP.py"), "-c", config_file.name],
+                               cwd=ROOT, preexec_fn=preexec, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_up(url + "/healthz", process)
+    except RuntimeError:
+        process.kill()
+        raise
+    return process, url, config_file.name
+
+
+async def closed_loop(url, descriptors, concurrency, duration):
+    latencies = []
+    failed = 0
+    connector = aiohttp.TCPConnector(limit=0)
+    headers = {"content-type": "application/json"}
+    async with aiohttp.ClientSession(connector=connector, timeout=aiohttp.ClientTimeout(total=60)) as session:
+        deadline = time.perf_counter() + duration
+
+        async def client(index):
+            nonlocal failed
+            i = index
+            while time.perf_counter() < deadline:
+                start = time.perf_counter()
+                try:
+                    async with session.post(url, data=descriptors[i % len(descriptors)], headers=headers) as resp:
+                        await resp.read()
+                        ok = resp.status == 201
+                except aiohttp.ClientError:
+                    ok = False
+                latencies.append(time.perf_counter() - start)
+                failed += not ok
+                i += concurrency
+
+        start = time.perf_counter()
+        await asyncio.gather(*(client(index) for index in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return sorted(latencies), failed, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the gunicorn and asgi servers under load.')
+    parser.add_argument('--latency', type=float, default=0.05, help='Seconds every stub PMS PUT takes.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[8, 32, 128, 512],
+                        help='Concurrent clients.')
+    parser.add_argument('--duration', type=float, default=5.0, help='Seconds per concurrency level.')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads (one worker).')
+    parser.add_argument('--cpu', type=int, default=None, help='Core to pin the servers to.')
+    parser.add_argument('--descriptors', type=str, default=os.path.join(BENCH_DIR, "data", "slices.ndjson"),
+                        help='NDJSON file of NASP descriptors.')
+    args = parser.parse_args()
+
+    descriptors = load_descriptors(args.descriptors)
+    stub_port = free_port()
+    stub = subprocess.Popen([sys.executable, os.path.join(BENCH_DIR, "stub_ric.py"), "--port", str(stub_port),
+                             "--latency", str(args.latency), "--catalogue-latency", "0"], stdout=subprocess.DEVNULL)
+    stub_url = f"http://127.0.0.1:{stub_port}"
+    # The stub runs in its own process so that it does not share the GIL of the load generator
+    stub_ref = argparse.Namespace(base_url=stub_url)
+    servers = [("gunicorn", f"gunicorn, {args.threads} threads"), ("asgi", "asgi (uvicorn)")]
+    try:
+        wait_until_up(stub_url + "/a1-policy/v2/policies", stub)
+        print(f"PMS latency {args.latency * 1e3:.0f} ms, {os.cpu_count()} cores"
+              f"{f', servers pinned to core {args.cpu}' if args.cpu is not None else ''}")
+        print(f"{'server':<22} {'clients':>7} {'req/s':>7} {'p50 (ms)':>9} {'p99 (ms)':>9} {'failed':>6} "
+              f"{'CPU ms/req':>10} {'req/s/core':>10} {'in flight/core':>14}")
+        for server, label in servers:
+            process, url, config_path = start_server(server, stub_ref, args.threads, args.cpu)
+            try:
+                asyncio.run(closed_loop(url + "/create_slice_policy", descriptors, 4, 1.0))  # warm-up
+                for concurrency in args.concurrency:
+                    cpu_before = cpu_seconds(process.pid)
+                    latencies, failed, elapsed = asyncio.run(
+                        closed_loop(url + "/create_slice_policy", descriptors, concurrency, args.duration))
+                    cpu_per_request = (cpu_seconds(process.pid) - cpu_before) / max(len(latencies), 1)
+                    per_core = 1.0 / cpu_per_request if cpu_per_request else float("inf")
+                    in_flight = per_core * args.latency
+                    if server == "gunicorn":
+                        in_flight = min(in_flight, args.threads)
+                    print(f"{label:<22} {concurrency:>7} {len(latencies) / elapsed:>7.0f} "
+                          f"{percentile(latencies, 0.50) * 1e3:>9.1f} {percentile(latencies, 0.99) * 1e3:>9.1f} "
+                          f"{failed:>6} {cpu_per_request * 1e3:>10.2f} {per_core:>10.0f} {in_flight:>14.0f}")
+            finally:
+                process.terminate()
+                process.wait(timeout=30)
+                os.unlink(config_path)
+    finally:
+        stub.terminate()
+        stub.wait(timeout=10)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+"""
+Micro-benchmark for the capacity lookups in tools.py.
+
+Compares the table-backed to_bps/to_prb against the reference arithmetic for
+the parameters create_rrm_policy uses on every slice request.
+
+Usage:
+    python benchmarks/bench_capacity.py [-n ITERATIONS]
+"""
+import argparse
+import os
+import sys
+import timeit
+from math import ceil
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import tools  # noqa: E402
+
+
+def to_prb_arithmetic(speed, is_uplink, mcs, numerology, bandwidth, is_tdd=True):
+    total_speed = tools._to_bps_arithmetic(is_uplink, mcs, numerology, bandwidth, is_tdd=is_tdd)
+    if total_speed == 0.0:
+        return 0
+    return ceil((speed / total_speed) * 100.0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark table-backed capacity lookups.')
+    parser.add_argument('-n', '--iterations', type=int, default=200000,
+                        help='Number of calls per measurement.')
+    args = parser.parse_args()
+
+    tools.build_capacity_tables()
+    cases = [
+        ("to_bps FDD", lambda: tools._to_bps_arithmetic(False, 28, 1, 50, is_tdd=False),
+         lambda: tools.to_bps(False, 28, 1, 50, is_tdd=False)),
+        ("to_bps TDD", lambda: tools._to_bps_arithmetic(True, 20, 2, 100, symbol_format=44),
+         lambda: tools.to_bps(True, 20, 2, 100, symbol_format=44)),
+        ("to_prb FDD", lambda: to_prb_arithmetic(100000, False, 28, 1, 50, is_tdd=False),
+         lambda: tools.to_prb(100000, False, 28, 1, 50, is_tdd=False)),
+    ]
+    print(f"{'case':<12} {'arithmetic (ns)':>16} {'table (ns)':>12} {'speedup':>8}")
+    for name, arithmetic, table in cases:
+        assert arithmetic() == table()
+        t_arith = min(timeit.repeat(arithmetic, number=args.iterations, repeat=5)) / args.iterations
+        t_table = min(timeit.repeat(table, number=args.iterations, repeat=5)) / args.iterations
+        print(f"{name:<12} {t_arith * 1e9:>16.0f} {t_table * 1e9:>12.0f} {t_arith / t_table:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
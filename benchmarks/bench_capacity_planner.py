@@ -0,0 +1,87 @@
+"""
+Benchmark of the capacity planner over growing grids.
+
+Runs src/capacity_planner.py on the first --descriptors descriptors of
+benchmarks/data/slices.ndjson for grids of about 50 thousand to 3 million
+cell configurations (every MCS table, MCS, numerology, bandwidth and MIMO
+layer count, times a growing number of TDD symbol formats). Reports rows per
+second and the peak resident memory of the planner, which should not grow
+with the grid, for the CSV and .npy outputs. The scalar rate is
+tools.to_prb called in a loop over the same rows, timed on a sample.
+
+Usage:
+    python benchmarks/bench_capacity_planner.py [--descriptors 2] [--workers 1 4] [--formats csv npy]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+SRC_DIR = os.path.join(BENCH_DIR, "..", "src")
+sys.path.insert(0, SRC_DIR)
+
+from tools import to_prb  # noqa: E402
+
+GRID = ["--mcs-table", "0-3", "--mcs", "0-31", "--numerology", "0-2",
+        "--bandwidth", "3,5,10,15,20,25,30,35,40,45,50,60,70,80,90,100", "--mimo", "1-8", "--duplex", "tdd"]
+SYMBOL_FORMATS = ["0", "0-9", "0-55"]
+
+
+def scalar_rate(samples=20000):
+    start = time.perf_counter()
+    for i in range(samples):
+        to_prb(100e6, False, i % 28, i % 3, 100, mimo=1 + i % 8, symbol_format=i % 56, is_tdd=True)
+    return samples / (time.perf_counter() - start)
+
+
+def run_planner(descriptors, symbol_formats, workers, output_format, out_dir):
+    output = os.devnull if output_format == "csv" else os.path.join(out_dir, "columns")
+    command = [sys.executable, os.path.join(SRC_DIR, "capacity_planner.py"), descriptors, *GRID,
+               "--symbol-format", symbol_formats, "--workers", str(workers), "--format", output_format,
+               "-o", output]
+    start = time.perf_counter()
+    process = subprocess.Popen(command, stderr=subprocess.PIPE)
+    stderr = process.stderr.read().decode()
+    # Peak memory of this run, including the workers the planner reaps
+    _, status, usage = os.wait4(process.pid, 0)
+    elapsed = time.perf_counter() - start
+    if os.waitstatus_to_exitcode(status) != 0:
+        raise RuntimeError(stderr)
+    rows = int(stderr.split()[0])
+    shutil.rmtree(output, ignore_errors=True)
+    return rows, elapsed, usage.ru_maxrss / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the capacity planner.')
+    parser.add_argument('--descriptors', type=int, default=2, help='Descriptors taken from slices.ndjson.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, os.cpu_count()], help='Worker processes.')
+    parser.add_argument('--formats', nargs='+', choices=('csv', 'npy'), default=['csv', 'npy'],
+                        help='Output formats.')
+    args = parser.parse_args()
+
+    out_dir = tempfile.mkdtemp()
+    try:
+        descriptors = os.path.join(out_dir, "descriptors.ndjson")
+        with open(os.path.join(BENCH_DIR, "data", "slices.ndjson")) as source, open(descriptors, "w") as f:
+            f.writelines(line for _, line in zip(range(args.descriptors), source))
+        print(f"scalar to_prb: {scalar_rate():.0f} rows/s")
+        print(f"{'format':<6} {'workers':>7} {'symbol formats':>14} {'rows':>10} {'seconds':>8} {'rows/s':>10} "
+              f"{'peak RSS (MiB)':>14}")
+        for output_format in args.formats:
+            for workers in dict.fromkeys(args.workers):
+                for symbol_formats in SYMBOL_FORMATS:
+                    rows, elapsed, rss = run_planner(descriptors, symbol_formats, workers, output_format, out_dir)
+                    print(f"{output_format:<6} {workers:>7} {symbol_formats:>14} {rows:>10} {elapsed:>8.2f} "
+                          f"{rows / elapsed:>10.0f} {rss:>14.1f}")
+    finally:
+        shutil.rmtree(out_dir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""
+Measures time-to-first-request of rApp_NASP.py.
+
+Starts a stub Non-RT RIC whose rApp catalogue answers after a configurable
+delay, launches the rApp with blocking and with background catalogue
+registration, and reports the time from process start until the port
+accepts connections, /readyz answers 200 and the first /create_slice_policy
+request succeeds.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--catalogue-latency 2] [--runs 3] [--server flask]
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import requests
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from compare_servers import free_port, rapp_config  # noqa: E402
+from load_test import load_descriptors  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def poll(func, timeout=60.0, interval=0.005):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        try:
+            if func():
+                return time.perf_counter()
+        except requests.exceptions.RequestException:
+            pass
+        time.sleep(interval)
+    raise RuntimeError("Timed out waiting for the rApp")
+
+
+def cold_start(stub, background, server, body):
+    port = free_port()
+    config = rapp_config(stub, port, {"server": server, "workers": 2, "threads": 4})
+    config["catalogue_registration"] = {"background": background, "required_for_readiness": False}
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump(config, f)
+        config_path = f.name
+    base_url = f"http://127.0.0.1:{port}"
+    session = requests.Session()
+    started = time.perf_counter()
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "rApp_NASP.py"), "-c", config_path])
+    try:
+        listening = poll(lambda: session.get(base_url + "/healthz", timeout=1).ok)
+        ready = poll(lambda: session.get(base_url + "/readyz", timeout=1).ok)
+        first = poll(lambda: session.post(base_url + "/create_slice_policy", data=body, timeout=5,
+                                          headers={"content-type": "application/json"}).status_code == 201)
+        return listening - started, ready - started, first - started
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+        os.remove(config_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Measure time-to-first-request of the rApp.')
+    parser.add_argument('--catalogue-latency', type=float, default=2.0,
+                        help='Seconds the stub rApp catalogue takes to answer.')
+    parser.add_argument('--runs', type=int, default=3, help='Cold starts per mode.')
+    parser.add_argument('--server', choices=('flask', 'gunicorn'), default='flask', help='API server.')
+    args = parser.parse_args()
+
+    body = load_descriptors()[0]
+    stub = StubRIC(catalogue_latency=args.catalogue_latency).start()
+    try:
+        print(f"{'registration':<14} {'listening (s)':>14} {'ready (s)':>10} {'first request (s)':>18}")
+        for background in (False, True):
+            runs = [cold_start(stub, background, args.server, body) for _ in range(args.runs)]
+            listening, ready, first = (statistics.median(values) for values in zip(*runs))
+            print(f"{'background' if background else 'blocking':<14} {listening:>14.2f} {ready:>10.2f} {first:>18.2f}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Benchmark of RRMPolicyRatioList deduplication in create_rrm_policy.
+
+Compares the previous approach (build every entry, then deduplicate with a
+json.dumps(sort_keys=True) key per entry) with the canonical-tuple key used
+while entries are generated. Synthetic descriptors carry large AMF
+plmnSupportList x snssaiList products with a configurable duplicate ratio,
+and the outputs of both approaches are checked to be byte-identical. The
+tools.merge_rrm_policies rule for slices repeated with different PRBs (the
+last one wins) is checked first, as is the deduplication of entries that
+only differ in type once the policy validator converted them.
+
+Usage:
+    python benchmarks/bench_dedup.py [--snssai 10000 50000] [--duplicates 0.5]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import tools  # noqa: E402
+from policy_schema import PolicyValidator  # noqa: E402
+
+
+def json_dedup(data):
+    dict_list = data["RRMPolicyRatioList"]
+    seen = set()
+    new_list = []
+    for d in dict_list:
+        s = json.dumps(d, sort_keys=True)
+        if s not in seen:
+            seen.add(s)
+            new_list.append(d)
+    data["RRMPolicyRatioList"] = new_list
+    return data
+
+
+def create_rrm_policy_json_dedup(input_json):
+    # Entry generation as it was before streaming deduplication
+    resource_description = input_json["description"]["resource_description"]
+    amf_plmn_support_list = resource_description["core"]["nfs"][0]["config"]["plmnSupportList"]
+    ran_config = resource_description["ran"]["nfs"][0]["config"]
+    ssq = input_json["description"]["Slice Attributes"]["SSQ"]
+    entries = []
+    for plmn_support in amf_plmn_support_list:
+        plmn_id = plmn_support["plmnId"]
+        for snssai in plmn_support["snssaiList"]:
+            entries.append({
+                "plmnId": {"mcc": str(plmn_id["mcc"]), "mnc": str(plmn_id["mnc"])},
+                "nci": ran_config["nci"],
+                "sst": snssai.get("sst"),
+                "sd": snssai.get("sd"),
+                "minPRB": tools.to_prb(ssq["Guaranteed Flow Bit Rate - Downlink"], False, 28, 1, 50, is_tdd=False),
+                "maxPRB": tools.to_prb(ssq["Max Flow Bit Rate - Downlink"], False, 28, 1, 50, is_tdd=False),
+            })
+    for slice_item in ran_config["slices"]:
+        entries.append({
+            "plmnId": {"mcc": ran_config["mcc"], "mnc": ran_config["mnc"]},
+            "nci": ran_config["nci"],
+            "sst": slice_item.get("sst"),
+            "sd": slice_item.get("sd"),
+            "minPRB": tools.to_prb(ssq["Guaranteed Flow Bit Rate - Downlink"], False, 28, 1, 50, is_tdd=False),
+            "maxPRB": tools.to_prb(ssq["Max Flow Bit Rate - Downlink"], False, 28, 1, 50, is_tdd=False),
+        })
+    return json_dedup({"RRMPolicyRatioList": entries})
+
+
+def synthetic_descriptor(n_snssai, duplicate_ratio, n_plmn=4, seed=0):
+    rng = random.Random(seed)
+    unique = max(1, int(n_snssai * (1 - duplicate_ratio)))
+    per_plmn = n_snssai // n_plmn
+    plmn_support_list = []
+    for p in range(n_plmn):
+        snssai_list = [{"sst": rng.randint(1, 4), "sd": rng.randrange(unique)} for _ in range(per_plmn)]
+        plmn_support_list.append({"plmnId": {"mcc": 208, "mnc": 90 + p % 2}, "snssaiList": snssai_list})
+    return {
+        "description": {
+            "Slice Attributes": {"SSQ": {"Guaranteed Flow Bit Rate - Downlink": 100000,
+                                         "Max Flow Bit Rate - Downlink": 1000000}},
+            "resource_description": {
+                "core": {"nfs": [{"name": "amf", "config": {"plmnSupportList": plmn_support_list}}]},
+                "ran": {"nfs": [{"name": "ueransim", "config": {
+                    "mcc": "208", "mnc": "93", "nci": 411,
+                    "slices": [{"sst": 1, "sd": rng.randrange(unique)} for _ in range(per_plmn)],
+                }}]},
+            },
+        }
+    }
+
+
+def check_merge():
+    # The same slice of cell 411 with different PRBs in two policies: the last one wins, in first-seen order
+    first = synthetic_descriptor(8, 0.0)
+    entries = tools.create_rrm_policy(first)["RRMPolicyRatioList"]
+    updated = [dict(entry, minPRB=entry["minPRB"] + 1) for entry in entries[::2]]
+    merged = tools.merge_rrm_policies([{"RRMPolicyRatioList": entries}, {"RRMPolicyRatioList": updated}])
+    expected = [dict(entry, minPRB=entry["minPRB"] + 1) if i % 2 == 0 else entry for i, entry in enumerate(entries)]
+    assert merged == {411: {"RRMPolicyRatioList": expected}}, "merge_rrm_policies kept a superseded slice"
+
+
+def check_coerced():
+    # sd 7 and "7" are distinct until the validator converts sd to the string of the schema
+    entries = tools.create_rrm_policy(synthetic_descriptor(8, 0.0))["RRMPolicyRatioList"]
+    policy_data = {"RRMPolicyRatioList": [dict(entries[0], sd=7), dict(entries[0], sd="7")]}
+    root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+    validator = PolicyValidator({1: os.path.join(root, "policy", "SliceSchemav5.json")})
+    assert validator.validate(1, policy_data) is None, "coerced policy data is invalid"
+    assert policy_data["RRMPolicyRatioList"] == [dict(entries[0], sd="7")], "coercion left duplicate entries"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark RRM policy deduplication.')
+    parser.add_argument('--snssai', type=int, nargs='+', default=[10000, 50000],
+                        help='Number of snssai entries per descriptor.')
+    parser.add_argument('--duplicates', type=float, default=0.5, help='Fraction of duplicated slices.')
+    parser.add_argument('-r', '--repeat', type=int, default=5, help='Repetitions per measurement.')
+    args = parser.parse_args()
+
+    check_merge()
+    check_coerced()
+    print(f"{'snssai':>8} {'entries':>8} {'json dedup (ms)':>16} {'tuple dedup (ms)':>17} {'speedup':>8}")
+    for n in args.snssai:
+        descriptor = synthetic_descriptor(n, args.duplicates)
+        reference = create_rrm_policy_json_dedup(descriptor)
+        result = tools.create_rrm_policy(descriptor)
+        assert json.dumps(reference) == json.dumps(result), "outputs differ"
+
+        t_json = min(timeit.repeat(lambda: create_rrm_policy_json_dedup(descriptor), number=1, repeat=args.repeat))
+        t_tuple = min(timeit.repeat(lambda: tools.create_rrm_policy(descriptor), number=1, repeat=args.repeat))
+        print(f"{n:>8} {len(result['RRMPolicyRatioList']):>8} {t_json * 1e3:>16.1f} {t_tuple * 1e3:>17.1f} "
+              f"{t_json / t_tuple:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
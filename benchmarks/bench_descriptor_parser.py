@@ -0,0 +1,90 @@
+"""
+Benchmark of NASP descriptor parsing: full json.load versus the streaming
+extract_descriptor path.
+
+Generates descriptors of several megabytes by padding resource_description
+.core.nfs with extra network functions, then reports parse time and peak
+Python memory (tracemalloc) for both paths and checks that
+create_rrm_policy returns the same policy for each.
+
+Usage:
+    python benchmarks/bench_descriptor_parser.py [--nfs 5000 20000 50000]
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from descriptor_parser import extract_descriptor  # noqa: E402
+from tools import create_rrm_policy  # noqa: E402
+
+
+def synthetic_descriptor(n_nfs):
+    padding = [{"name": f"nf-{i}", "node": ["new_york"], "replicas": 1,
+                "config": {"image": "registry.local/5gc/nf:latest", "env": {"LOG_LEVEL": "info", "INDEX": i},
+                           "ports": [8080, 8443, 9090]}}
+               for i in range(n_nfs)]
+    amf = {"name": "amf", "node": ["new_york"], "config": {
+        "plmnSupportList": [{"plmnId": {"mcc": 208, "mnc": 93},
+                             "snssaiList": [{"sst": 1, "sd": 112233}, {"sst": 2, "sd": 445566}]}],
+        "supportDnnList": ["internet"]}}
+    ueransim = {"name": "ueransim", "type": "gnb", "config": {
+        "mcc": "208", "mnc": "93", "nci": 411, "slices": [{"sst": 1, "sd": 112233}]}}
+    return {
+        "name": "bench-slice",
+        "description": {
+            "Slice Attributes": {"SSQ": {"Guaranteed Flow Bit Rate - Downlink": 100000,
+                                         "Max Flow Bit Rate - Downlink": 1000000,
+                                         "Packet Error Rate": 1e-07}},
+            "resource_description": {
+                "core": {"nfs": padding[:n_nfs // 2] + [amf] + padding[n_nfs // 2:]},
+                "ran": {"nfs": [ueransim]},
+            },
+        },
+    }
+
+
+def measure(parse, path):
+    # Time and memory are measured in separate runs since tracemalloc slows
+    # down allocation-heavy code unevenly.
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        data = parse(f)
+    elapsed = time.perf_counter() - start
+    tracemalloc.start()
+    with open(path, 'rb') as f:
+        parse(f)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return data, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark streaming descriptor extraction.')
+    parser.add_argument('--nfs', type=int, nargs='+', default=[5000, 20000, 50000],
+                        help='Number of padding network functions per descriptor.')
+    args = parser.parse_args()
+
+    print(f"{'size (MB)':>9} {'json.load (ms)':>15} {'peak (MB)':>10} {'streaming (ms)':>15} {'peak (MB)':>10}")
+    for n_nfs in args.nfs:
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as f:
+            json.dump(synthetic_descriptor(n_nfs), f)
+            path = f.name
+        try:
+            full, t_full, peak_full = measure(json.load, path)
+            streamed, t_stream, peak_stream = measure(extract_descriptor, path)
+            assert create_rrm_policy(full) == create_rrm_policy(streamed), "policies differ"
+            size = os.path.getsize(path) / 2**20
+            print(f"{size:>9.1f} {t_full * 1e3:>15.1f} {peak_full / 2**20:>10.1f} "
+                  f"{t_stream * 1e3:>15.1f} {peak_stream / 2**20:>10.2f}")
+        finally:
+            os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
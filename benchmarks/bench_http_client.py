@@ -0,0 +1,69 @@
+"""
+Benchmark of policy PUT latency against a local stub PMS.
+
+Compares one-off requests.put calls (a new TCP connection per request, as
+put_policy used to do) with the pooled keep-alive session from
+http_client.create_session.
+
+Usage:
+    python benchmarks/bench_http_client.py [-n REQUESTS] [--latency SECONDS]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+import requests  # noqa: E402
+
+from http_client import create_session  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+
+POLICY_BODY = {
+    "ric_id": "ric4",
+    "policy_id": "bench",
+    "service_id": "rAppNASP",
+    "policy_data": {"RRMPolicyRatioList": [
+        {"plmnId": {"mcc": "208", "mnc": "93"}, "nci": 411, "sst": 1, "sd": 112233, "minPRB": 1, "maxPRB": 1}
+    ]},
+    "policytype_id": 1,
+}
+
+
+def measure(put, url, n):
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        put(url, json=POLICY_BODY, headers={"content-type": "application/json"}).raise_for_status()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def report(name, latencies):
+    latencies = sorted(latencies)
+    p99 = latencies[int(len(latencies) * 0.99) - 1]
+    print(f"{name:<22} mean {statistics.mean(latencies) * 1e3:7.3f} ms   "
+          f"p50 {statistics.median(latencies) * 1e3:7.3f} ms   p99 {p99 * 1e3:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark pooled vs. unpooled PMS calls.')
+    parser.add_argument('-n', '--requests', type=int, default=2000, help='Number of PUTs per client.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Artificial stub latency in seconds.')
+    args = parser.parse_args()
+
+    stub = StubRIC(latency=args.latency).start()
+    url = stub.base_url + "/a1-policy/v2/policies"
+    try:
+        session = create_session({})
+        measure(session.put, url, 50)
+        report("requests.put", measure(requests.put, url, args.requests))
+        report("pooled session", measure(session.put, url, args.requests))
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
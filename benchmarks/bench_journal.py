@@ -0,0 +1,119 @@
+"""
+Benchmark of the policy write-ahead journal.
+
+Concurrent threads journal policies as pending, waiting for each record to be
+durable, then mark them committed, as the request handlers do. Group commit
+(one fsync per batch, PolicyJournal) is compared with one fsync per record
+under a lock. Reports throughput, p50/p99 latency of log_pending() and the
+number of fsyncs. After each run the journal is reopened and the policies
+left uncommitted are checked against the ones the run did not commit.
+
+Usage:
+    python benchmarks/bench_journal.py [--threads 1 8 64] [--records 2000] [--batch-delay 0.0] [--dir /tmp]
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from policy_journal import PolicyJournal  # noqa: E402
+
+
+def policy_body(index):
+    return {"ric_id": "ric4", "policy_id": str(uuid.uuid4()), "service_id": "rAppNASP", "policytype_id": 1,
+            "policy_data": {"RRMPolicyRatioList": [
+                {"plmnId": {"mcc": "208", "mnc": "93"}, "nci": 411, "sst": 1, "sd": index,
+                 "minPRB": 10, "maxPRB": 20}]}}
+
+
+class NaiveJournal:
+    """
+    One write and fsync per record, serialized by a lock.
+    """
+
+    def __init__(self, path):
+        self._file = open(path, 'ab')
+        self._lock = threading.Lock()
+        self.syncs = 0
+
+    def _write(self, record):
+        with self._lock:
+            self._file.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.syncs += 1
+
+    def log_pending(self, bodies):
+        for body in bodies:
+            self._write({"op": "pending", "policy_id": body["policy_id"], "body": body})
+
+    def log_commit(self, policy_id):
+        self._write({"op": "commit", "policy_id": policy_id})
+
+
+def run(journal, bodies, threads):
+    latencies = [0.0] * len(bodies)
+    uncommitted = set()
+
+    def submit(index):
+        body = bodies[index]
+        start = time.perf_counter()
+        journal.log_pending([body])
+        latencies[index] = time.perf_counter() - start
+        # Leave every tenth policy uncommitted, as if the process died before its PUT completed
+        if index % 10:
+            journal.log_commit(body["policy_id"])
+        else:
+            uncommitted.add(body["policy_id"])
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(submit, range(len(bodies))))
+    if isinstance(journal, PolicyJournal):
+        journal.flush()
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return elapsed, latencies, uncommitted
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the policy write-ahead journal.')
+    parser.add_argument('--threads', type=int, nargs='+', default=[1, 8, 64], help='Concurrent writers.')
+    parser.add_argument('--records', type=int, default=2000, help='Policies journaled per run.')
+    parser.add_argument('--batch-delay', type=float, default=0.0, help='PolicyJournal max_batch_delay (s).')
+    parser.add_argument('--dir', type=str, default=None, help='Directory of the journal files.')
+    args = parser.parse_args()
+
+    print(f"{'mode':<8} {'threads':>7} {'records/s':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'fsyncs':>7} {'replay':>7}")
+    failed = False
+    for threads in args.threads:
+        for mode in ("naive", "group"):
+            with tempfile.TemporaryDirectory(dir=args.dir) as directory:
+                path = os.path.join(directory, "journal.log")
+                bodies = [policy_body(index) for index in range(args.records)]
+                if mode == "group":
+                    journal = PolicyJournal(path, max_batch_delay=args.batch_delay)
+                else:
+                    journal = NaiveJournal(path)
+                elapsed, latencies, uncommitted = run(journal, bodies, threads)
+                syncs = journal.stats()["syncs"] if mode == "group" else journal.syncs
+
+                replayed = {body["policy_id"] for body in PolicyJournal(path).pending()}
+                replay_ok = replayed == uncommitted
+                failed |= not replay_ok
+                print(f"{mode:<8} {threads:>7} {len(bodies) / elapsed:>10.0f} "
+                      f"{statistics.median(latencies) * 1e3:>9.3f} {latencies[int(len(latencies) * 0.99)] * 1e3:>9.3f} "
+                      f"{syncs:>7} {'ok' if replay_ok else 'FAILED':>7}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
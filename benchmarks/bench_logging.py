@@ -0,0 +1,72 @@
+"""
+Benchmark of per-request logging cost at INFO level.
+
+Replays the debug log statements issued while handling one slice request
+(received descriptor, created policy data, policy data received, policy body
+and PUT body) with the previous eager json.dumps(..., indent=2) arguments and
+with LazyJSON, with the logger at INFO so none of them is emitted.
+
+Usage:
+    python benchmarks/bench_logging.py [-n REQUESTS]
+"""
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import timeit
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
+
+from log_utils import LazyJSON  # noqa: E402
+from tools import create_rrm_policy  # noqa: E402
+
+
+def load_descriptor():
+    with open(os.path.join(ROOT, "scripts", "test-nasp-post.bash")) as f:
+        return json.loads(re.search(r"-d '(.*)'", f.read(), re.S).group(1))
+
+
+def eager(logger, data, policy_data, body, url):
+    logger.debug(f"Received data: {json.dumps(data, indent=2)}")
+    logger.debug("Created policy data: %s", json.dumps(policy_data, indent=2))
+    logger.debug('Policy data received: %s', json.dumps(policy_data, indent=2))
+    logger.debug('Policy body: %s', json.dumps(body, indent=2))
+    logger.debug(f"Sending PUT request to {url} with body: {json.dumps(body, indent=2)}")
+
+
+def lazy(logger, data, policy_data, body, url):
+    logger.debug("Received data: %s", LazyJSON(data))
+    logger.debug("Created policy data: %s", LazyJSON(policy_data))
+    logger.debug('Policy data received: %s', LazyJSON(policy_data))
+    logger.debug('Policy body: %s', LazyJSON(body))
+    logger.debug("Sending PUT request to %s with body: %s", url, LazyJSON(body))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark eager vs. lazy payload logging at INFO level.')
+    parser.add_argument('-n', '--requests', type=int, default=20000, help='Simulated requests per measurement.')
+    args = parser.parse_args()
+
+    logger = logging.getLogger("bench_logging")
+    logger.setLevel(logging.INFO)
+    data = load_descriptor()
+    policy_data = create_rrm_policy(data)
+    body = {"ric_id": "ric4", "policy_id": "bench", "service_id": "rAppNASP",
+            "policy_data": policy_data, "policytype_id": 1}
+    url = "http://pms/a1-policy/v2/policies"
+
+    results = {}
+    for name, fn in (("eager json.dumps", eager), ("LazyJSON", lazy)):
+        total = min(timeit.repeat(lambda: fn(logger, data, policy_data, body, url),
+                                  number=args.requests, repeat=5))
+        results[name] = total / args.requests
+        print(f"{name:<18} {results[name] * 1e6:8.2f} us/request")
+    saved = results["eager json.dumps"] - results["LazyJSON"]
+    print(f"{'saved':<18} {saved * 1e6:8.2f} us/request of CPU at INFO level")
+
+
+if __name__ == "__main__":
+    main()
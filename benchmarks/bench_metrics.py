@@ -0,0 +1,78 @@
+"""
+Benchmark of the metrics instrumentation overhead on the slice request path.
+
+Measures the cost of the metric updates made for one /create_slice_policy
+request (four phase timers, the request counter and the PMS status counter)
+and compares it with the time of a full request through the Flask test
+client against a local stub PMS. Exits non-zero if the overhead exceeds the
+budget.
+
+Usage:
+    python benchmarks/bench_metrics.py [--budget-us 25] [--budget-pct 2]
+"""
+import argparse
+import logging
+import os
+import sys
+import timeit
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+import metrics  # noqa: E402
+from load_test import load_descriptors  # noqa: E402
+from rApp_NASP import create_app  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+
+
+def instrumentation():
+    with metrics.PARSE_SECONDS.time():
+        pass
+    with metrics.CREATE_RRM_POLICY_SECONDS.time():
+        pass
+    with metrics.FILL_POLICY_BODY_SECONDS.time():
+        pass
+    with metrics.PUT_POLICY_SECONDS.time():
+        pass
+    metrics.PMS_RESPONSES.labels('200').inc()
+    metrics.count_request('create_slice_policy', 'success', 'created')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark metrics overhead per request.')
+    parser.add_argument('-n', '--requests', type=int, default=2000, help='Requests per measurement.')
+    parser.add_argument('--budget-us', type=float, default=25.0, help='Maximum overhead per request (us).')
+    parser.add_argument('--budget-pct', type=float, default=2.0, help='Maximum overhead per request (%%).')
+    args = parser.parse_args()
+
+    n_ops = args.requests * 50
+    overhead = min(timeit.repeat(instrumentation, number=n_ops, repeat=5)) / n_ops
+
+    stub = StubRIC().start()
+    try:
+        config = {"nonrtric": {"base_url_pms": stub.base_url + "/a1-policy/v2", "ric_id": "ric4",
+                               "service_name": "rAppNASP", "policytype_id": 1}}
+        logger = logging.getLogger("bench_metrics")
+        logger.setLevel(logging.WARNING)
+        client = create_app(config, logger).test_client()
+        body = load_descriptors()[0]
+
+        def request():
+            client.post('/create_slice_policy', data=body, content_type='application/json')
+
+        request_time = min(timeit.repeat(request, number=args.requests, repeat=3)) / args.requests
+    finally:
+        stub.stop()
+
+    pct = overhead / request_time * 100
+    print(f"instrumentation {overhead * 1e6:.2f} us/request, request {request_time * 1e6:.0f} us, "
+          f"overhead {pct:.2f}% (budget {args.budget_us:.0f} us / {args.budget_pct:.1f}%)")
+    if overhead * 1e6 > args.budget_us or pct > args.budget_pct:
+        print("Metrics overhead exceeds budget.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
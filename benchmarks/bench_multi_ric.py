@@ -0,0 +1,114 @@
+"""
+Benchmark of the multi-RIC fan-out of /create_slice_policies.
+
+Starts one stub PMS per near-RT RIC, RIC i answering PUTs in (i + 1) times
+--latency seconds, and maps a group of cells to every RIC with the
+'ric_routing' configuration. Every request deploys a slice on one cell of
+each RIC, so it is split into one policy per RIC. Compares the request
+latency when the per-RIC PUTs are sent one after the other (workers 0) and
+at the same time with the sum and the maximum of the stub latencies, and
+checks that every stub received only the policies of its own cells.
+
+Usage:
+    python benchmarks/bench_multi_ric.py [--rics 4] [--latency 0.01] [--requests 30] [--workers 0 8]
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from load_test import load_descriptors  # noqa: E402
+from rApp_NASP import create_app  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+
+CELLS_PER_RIC = 4
+
+
+def ric_config(stubs, workers):
+    rics = {f"ric{index}": {"ncis": [index * CELLS_PER_RIC + cell for cell in range(CELLS_PER_RIC)],
+                            "base_url_pms": stub.base_url + "/a1-policy/v2"}
+            for index, stub in enumerate(stubs)}
+    return {"nonrtric": {"base_url_pms": stubs[0].base_url + "/a1-policy/v2", "ric_id": "ric0",
+                         "service_name": "rAppNASP", "policytype_id": 1},
+            "ric_routing": {"enabled": True, "workers": workers, "rics": rics}}
+
+
+def slice_batch(template, request, rics):
+    # The same slice (sd) on one cell of every RIC
+    batch = []
+    for ric in range(rics):
+        descriptor = copy.deepcopy(template)
+        descriptor["name"] = f"slice-{request}-ric{ric}"
+        ran_config = descriptor["description"]["resource_description"]["ran"]["nfs"][0]["config"]
+        ran_config["nci"] = ric * CELLS_PER_RIC + request % CELLS_PER_RIC
+        for plmn_support in descriptor["description"]["resource_description"]["core"]["nfs"][0]["config"][
+                "plmnSupportList"]:
+            for snssai in plmn_support["snssaiList"]:
+                snssai["sd"] = request
+        batch.append(descriptor)
+    return json.dumps(batch)
+
+
+def run(stubs, workers, requests, template):
+    client = create_app(ric_config(stubs, workers), logging.getLogger("bench_multi_ric")).test_client()
+    client.post("/create_slice_policies", data=slice_batch(template, requests, len(stubs)),
+                content_type="application/json")  # warm-up
+    latencies = []
+    for request in range(requests):
+        batch = slice_batch(template, request, len(stubs))
+        start = time.perf_counter()
+        resp = client.post("/create_slice_policies", data=batch, content_type="application/json")
+        latencies.append(time.perf_counter() - start)
+        body = resp.get_json()
+        if resp.status_code != 201 or sorted(body["rics"]) != [f"ric{index}" for index in range(len(stubs))]:
+            raise RuntimeError(f"Request {request} failed: {resp.status_code} {body}")
+    return latencies
+
+
+def routed_correctly(stubs):
+    for index, stub in enumerate(stubs):
+        for body, _ in stub.policies.values():
+            cells = {entry["nci"] // CELLS_PER_RIC for entry in body["policy_data"]["RRMPolicyRatioList"]}
+            if body["ric_id"] != f"ric{index}" or cells != {index}:
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the multi-RIC fan-out.')
+    parser.add_argument('--rics', type=int, default=4, help='Near-RT RICs, one stub PMS each.')
+    parser.add_argument('--latency', type=float, default=0.01,
+                        help='PUT latency of the first stub in seconds; stub i takes (i + 1) times as long.')
+    parser.add_argument('--requests', type=int, default=30, help='Requests per configuration.')
+    parser.add_argument('--workers', type=int, nargs='+', default=[0, 8], help='ric_routing.workers values.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    template = json.loads(load_descriptors(os.path.join(BENCH_DIR, "data", "slices.ndjson"))[0])
+    stub_latencies = [args.latency * (index + 1) for index in range(args.rics)]
+    print(f"{args.rics} RICs, PUT latency {', '.join(f'{latency * 1e3:.0f}' for latency in stub_latencies)} ms: "
+          f"sum {sum(stub_latencies) * 1e3:.0f} ms, slowest {max(stub_latencies) * 1e3:.0f} ms")
+    print(f"{'workers':>8} {'p50 (ms)':>9} {'p99 (ms)':>9} {'routing':>8}")
+    failed = False
+    for workers in args.workers:
+        stubs = [StubRIC(latency=latency).start() for latency in stub_latencies]
+        latencies = sorted(run(stubs, workers, args.requests, template))
+        correct = routed_correctly(stubs)
+        failed |= not correct
+        for stub in stubs:
+            stub.stop()
+        print(f"{workers:>8} {statistics.median(latencies) * 1e3:>9.1f} "
+              f"{latencies[int(0.99 * (len(latencies) - 1))] * 1e3:>9.1f} {'ok' if correct else 'FAILED':>8}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
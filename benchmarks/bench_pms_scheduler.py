@@ -0,0 +1,222 @@
+"""
+Benchmark of the PMS scheduler against an overloaded stub RIC.
+
+Three scenarios, the burst and breaker ones run through NASPPolicy.send_policy:
+
+- burst: many clients PUT distinct policies at once to a stub that serves at
+  most --max-concurrency PUTs and answers 503 beyond that, as an overloaded
+  gateway does. Compares the 503s seen by the stub, failed PUTs, throughput
+  and p99 latency without and with the scheduler capping in-flight PUTs.
+- coalesce: many clients update the same few slices through
+  NASPPolicy.create_policy, with the policy store on and a rate limit;
+  reports how many PUTs reached the stub for how many updates, and checks
+  that every update succeeded and the stub holds one of the last updates of
+  every slice. Clients then update their own slice of a single policy, which
+  must end up holding every slice, and 15 clients update one slice at
+  1 PUT/s, none of them waiting long enough to be answered policy_busy.
+- breaker: the stub fails every PUT; reports how many PUTs reached it before
+  the circuit opened and how many were shed without a network round trip.
+
+Usage:
+    python benchmarks/bench_pms_scheduler.py [--requests 400] [--clients 32] [--max-concurrency 4]
+        [--latency 0.005] [--retries 3]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from pms_scheduler import PMSOverloaded  # noqa: E402
+from rApp_NASP import NASPPolicy  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+
+
+def make_policy(stub, clients, retries, scheduler=None, policy_store=False):
+    config = {"nonrtric": {"base_url_pms": stub.base_url + "/a1-policy/v2", "ric_id": "ric4",
+                           "service_name": "rAppNASP", "policytype_id": 1},
+              "http_client": {"pool_maxsize": clients, "retries": retries},
+              "policy_store": {"enabled": policy_store}}
+    if scheduler is not None:
+        config["pms_scheduler"] = dict(scheduler, enabled=True)
+    return NASPPolicy(config, logging.getLogger("bench_pms_scheduler"))
+
+
+def slice_entry(index, min_prb=10):
+    return {"plmnId": {"mcc": "208", "mnc": "93"}, "nci": index % 16, "sst": 1, "sd": index,
+            "minPRB": min_prb, "maxPRB": 20}
+
+
+def policy_body(nasp_policy, index, min_prb=10):
+    data = {"RRMPolicyRatioList": [slice_entry(index, min_prb)]}
+    return nasp_policy.fill_policy_body(nasp_policy.config, data, f"policy-{index}")
+
+
+def applied_slices(stub):
+    # minPRB applied on the stub per sd, with the policy holding it
+    return {entry["sd"]: (entry["minPRB"], policy_id) for policy_id, (body, _) in stub.policies.items()
+            for entry in body["policy_data"]["RRMPolicyRatioList"]}
+
+
+def concurrent_updates(nasp_policy, clients, updates, slices):
+    # Update i sets the minPRB of slice i % slices to i; counts the successes and the failures by reason
+    counter = iter(range(updates))
+    lock = threading.Lock()
+
+    def update(_):
+        with lock:
+            index = next(counter)
+        result = nasp_policy.create_policy({"RRMPolicyRatioList": [slice_entry(index % slices, min_prb=index)]})
+        return result["status"] if result["status"] == "success" else result["reason"]
+
+    with ThreadPoolExecutor(max_workers=clients) as executor:
+        reasons = list(executor.map(update, range(updates)))
+    return {reason: reasons.count(reason) for reason in set(reasons)}
+
+
+def timed_send(nasp_policy, body):
+    start = time.perf_counter()
+    try:
+        outcome = "ok" if nasp_policy.send_policy(body) is not None else "failed"
+    except PMSOverloaded:
+        outcome = "shed"
+    return outcome, time.perf_counter() - start
+
+
+def burst(args, scheduler):
+    stub = StubRIC(latency=args.latency, max_concurrency=args.max_concurrency, reject_over_limit=True).start()
+    nasp_policy = make_policy(stub, args.clients, args.retries, scheduler)
+    bodies = [policy_body(nasp_policy, index) for index in range(args.requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.clients) as executor:
+        results = list(executor.map(lambda body: timed_send(nasp_policy, body), bodies))
+    elapsed = time.perf_counter() - start
+    stub.stop()
+    latencies = sorted(latency for _, latency in results)
+    outcomes = [outcome for outcome, _ in results]
+    return {
+        "ok": outcomes.count("ok"), "failed": outcomes.count("failed"), "shed": outcomes.count("shed"),
+        "stub_503": stub.responses.get(("policies", 503), 0), "rps": args.requests / elapsed,
+        "p50": statistics.median(latencies), "p99": latencies[int(0.99 * (len(latencies) - 1))],
+    }
+
+
+def coalesce(args):
+    stub = StubRIC(latency=args.latency).start()
+    scheduler = {"rate": 50.0, "burst": 1, "max_wait": 30.0, "failure_threshold": 0}
+    nasp_policy = make_policy(stub, args.clients, args.retries, scheduler, policy_store=True)
+    slices = 4
+    updates = args.clients * 8
+    start = time.perf_counter()
+    reasons = concurrent_updates(nasp_policy, args.clients, updates, slices)
+    elapsed = time.perf_counter() - start
+    stub.stop()
+    # Updates taken from the counter at the same time may reach the scheduler in any
+    # order, so the stub holds one of the last updates of every slice
+    applied = applied_slices(stub)
+    latest = len(applied) == slices and all(
+        index >= updates - args.clients and index % slices == sd for sd, (index, _) in applied.items())
+    return {"updates": updates, "reasons": reasons, "puts": stub.responses.get(("policies", 200), 0),
+            "coalesced": nasp_policy.scheduler.stats()["coalesced"], "elapsed": elapsed, "latest": latest}
+
+
+def coalesce_slices(args):
+    stub = StubRIC(latency=args.latency).start()
+    scheduler = {"rate": 50.0, "burst": 1, "max_wait": 30.0, "failure_threshold": 0}
+    nasp_policy = make_policy(stub, args.clients, args.retries, scheduler, policy_store=True)
+    # One policy holds the slices of every client, so their updates all wait for its lease
+    nasp_policy.create_policy({"RRMPolicyRatioList": [slice_entry(index, min_prb=0) for index in range(args.clients)]})
+    updates = args.clients * 4
+    reasons = concurrent_updates(nasp_policy, args.clients, updates, args.clients)
+    stub.stop()
+    applied = applied_slices(stub)
+    kept = sum(index >= updates - args.clients and index % args.clients == sd for sd, (index, _) in applied.items())
+    return {"updates": updates, "reasons": reasons, "policies": len({policy_id for _, policy_id in applied.values()}),
+            "kept": kept, "puts": stub.responses.get(("policies", 200), 0),
+            "coalesced": nasp_policy.scheduler.stats()["coalesced"]}
+
+
+def coalesce_one_slice(args):
+    stub = StubRIC(latency=args.latency).start()
+    scheduler = {"rate": 1.0, "burst": 1, "max_wait": 30.0, "failure_threshold": 0}
+    nasp_policy = make_policy(stub, 15, args.retries, scheduler, policy_store=True)
+    start = time.perf_counter()
+    reasons = concurrent_updates(nasp_policy, 15, 15, 1)
+    elapsed = time.perf_counter() - start
+    stub.stop()
+    return {"reasons": reasons, "puts": stub.responses.get(("policies", 200), 0), "elapsed": elapsed,
+            "coalesced": nasp_policy.scheduler.stats()["coalesced"]}
+
+
+def breaker(args):
+    stub = StubRIC(latency=args.latency, error_rate=1.0, error_status=500).start()
+    scheduler = {"failure_threshold": 5, "reset_timeout": 60.0}
+    nasp_policy = make_policy(stub, 1, 0, scheduler)
+    start = time.perf_counter()
+    outcomes = [timed_send(nasp_policy, policy_body(nasp_policy, index))[0] for index in range(args.requests)]
+    elapsed = time.perf_counter() - start
+    stub.stop()
+    return {"sent": stub.responses.get(("policies", 500), 0), "shed": outcomes.count("shed"),
+            "failed": outcomes.count("failed"), "elapsed": elapsed,
+            "circuit": nasp_policy.scheduler.stats()["circuit"]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the PMS scheduler.')
+    parser.add_argument('--requests', type=int, default=400, help='PUTs in the burst and breaker scenarios.')
+    parser.add_argument('--clients', type=int, default=32, help='Concurrent clients.')
+    parser.add_argument('--max-concurrency', type=int, default=4,
+                        help='PUTs the stub serves at once; it answers 503 beyond that.')
+    parser.add_argument('--latency', type=float, default=0.005, help='Seconds every stub PUT takes.')
+    parser.add_argument('--retries', type=int, default=3, help='HTTP client retries on 5xx responses.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.CRITICAL)
+
+    failed = False
+    print(f"burst: {args.requests} PUTs from {args.clients} clients, stub limit {args.max_concurrency}")
+    print(f"  {'scheduler':<22} {'ok':>5} {'failed':>6} {'shed':>5} {'stub 503':>8} {'req/s':>8} "
+          f"{'p50 (ms)':>9} {'p99 (ms)':>9}")
+    for label, scheduler in (("off", None),
+                             (f"max_in_flight={args.max_concurrency}",
+                              {"max_in_flight": args.max_concurrency, "max_wait": 30.0})):
+        result = burst(args, scheduler)
+        print(f"  {label:<22} {result['ok']:>5} {result['failed']:>6} {result['shed']:>5} {result['stub_503']:>8} "
+              f"{result['rps']:>8.0f} {result['p50'] * 1e3:>9.1f} {result['p99'] * 1e3:>9.1f}")
+        if scheduler is not None:
+            failed |= result["ok"] != args.requests
+
+    result = coalesce(args)
+    print(f"coalesce: {result['updates']} updates of 4 slices at 50 PUT/s -> {result['puts']} PUTs "
+          f"({result['coalesced']} coalesced) in {result['elapsed']:.2f} s, {result['reasons']}; "
+          f"latest update applied {'ok' if result['latest'] else 'FAILED'}")
+    failed |= not result["latest"] or result["reasons"].get("success") != result["updates"]
+    failed |= result["coalesced"] == 0
+
+    result = coalesce_slices(args)
+    print(f"coalesce slices: {result['updates']} updates of {args.clients} slices of 1 policy -> {result['puts']} PUTs "
+          f"({result['coalesced']} coalesced), {result['reasons']}; {result['kept']} slices hold a last update "
+          f"in {result['policies']} policy")
+    failed |= result["kept"] != args.clients or result["policies"] != 1
+    failed |= result["reasons"].get("success") != result["updates"]
+
+    result = coalesce_one_slice(args)
+    print(f"coalesce one slice: 15 updates at 1 PUT/s -> {result['puts']} PUTs ({result['coalesced']} coalesced) "
+          f"in {result['elapsed']:.2f} s, {result['reasons']}")
+    failed |= result["reasons"].get("success") != 15
+
+    result = breaker(args)
+    print(f"breaker: {args.requests} PUTs to a failing stub -> {result['sent']} sent, {result['shed']} shed, "
+          f"circuit {result['circuit']}, {result['elapsed'] * 1e3:.1f} ms")
+    failed |= result["sent"] != 5 or result["shed"] != args.requests - 5
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,99 @@
+"""
+Benchmark of the policy reconciler against the stub RIC.
+
+Applies a number of policies through the policy store, then times reconcile
+cycles when every policy is in sync, with and without ETag support on the
+stub (conditional GETs answered 304 versus full reads compared by digest).
+Finally drops and alters some policies on the stub and checks that one cycle
+re-applies exactly those and that the next cycle finds everything in sync.
+
+Usage:
+    python benchmarks/bench_reconcile.py [--policies 1000] [--concurrency 1 8] [--latency 0.001] [--drop 50]
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import time
+import uuid
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from rApp_NASP import NASPPolicy  # noqa: E402
+from reconciler import PolicyReconciler  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+
+
+def entry(index):
+    return {"plmnId": {"mcc": "208", "mnc": "93"}, "nci": index % 16, "sst": 1, "sd": index,
+            "minPRB": 10, "maxPRB": 20}
+
+
+def apply_policies(nasp_policy, count):
+    for index in range(count):
+        for policy, changed in nasp_policy.build_policies({"RRMPolicyRatioList": [entry(index)]}):
+            if changed and not nasp_policy.submit_policy(policy):
+                raise RuntimeError("PUT failed on the stub RIC")
+
+
+def time_cycles(reconciler, cycles=5):
+    reconciler.reconcile()  # warm-up, caches the ETags
+    times = []
+    for _ in range(cycles):
+        start = time.perf_counter()
+        summary = reconciler.reconcile()
+        times.append(time.perf_counter() - start)
+        assert summary["in_sync"] == len(reconciler.nasp_policy.policy_store.policies()), summary
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the policy reconciler.')
+    parser.add_argument('--policies', type=int, default=1000, help='Policies applied on the stub RIC.')
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8], help='Reconciler concurrency.')
+    parser.add_argument('--latency', type=float, default=0.001, help='Seconds every stub request takes.')
+    parser.add_argument('--drop', type=int, default=50, help='Policies dropped and altered on the stub.')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.ERROR)
+
+    failed = False
+    print(f"{'etags':<6} {'concurrency':>11} {'cycle (ms)':>11} {'per policy (us)':>16} {'GET 304':>8} {'GET 200':>8}")
+    for etags in (True, False):
+        stub = StubRIC(latency=args.latency, etags=etags).start()
+        config = {"nonrtric": {"base_url_pms": stub.base_url + "/a1-policy/v2", "ric_id": "ric4",
+                               "service_name": "rAppNASP", "policytype_id": 1},
+                  "http_client": {"pool_maxsize": max(args.concurrency)},
+                  "policy_store": {"enabled": True}}
+        nasp_policy = NASPPolicy(config, logging.getLogger("bench_reconcile"))
+        apply_policies(nasp_policy, args.policies)
+        for concurrency in args.concurrency:
+            reconciler = PolicyReconciler(nasp_policy, concurrency=concurrency)
+            stub.responses.clear()
+            cycle = time_cycles(reconciler)
+            print(f"{str(etags):<6} {concurrency:>11} {cycle * 1e3:>11.1f} {cycle / args.policies * 1e6:>16.1f} "
+                  f"{stub.responses.get(('policy_get', 304), 0):>8} {stub.responses.get(('policy_get', 200), 0):>8}")
+
+        # Simulate a RIC that lost some policies and had others changed behind the rApp's back
+        policy_ids = list(nasp_policy.policy_store.policies())
+        dropped = policy_ids[:args.drop]
+        altered = policy_ids[args.drop:2 * args.drop]
+        stub.drop_policies(dropped)
+        for policy_id in altered:
+            stub.set_policy_data(policy_id, {"RRMPolicyRatioList": [dict(entry(0), minPRB=99, sd=str(uuid.uuid4()))]})
+        summary = reconciler.reconcile()
+        after = reconciler.reconcile()
+        repaired = (summary["missing"] == len(dropped) and summary["drifted"] == len(altered)
+                    and summary["reapplied"] == len(dropped) + len(altered) and after["in_sync"] == len(policy_ids))
+        failed |= not repaired
+        print(f"  repair: {summary['missing']} missing, {summary['drifted']} drifted, {summary['reapplied']} "
+              f"re-applied in {summary['duration'] * 1e3:.1f} ms; next cycle {after['in_sync']} in sync "
+              f"{'ok' if repaired else 'FAILED'}")
+        stub.stop()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Compares requests/sec of the Flask development server, gunicorn and the asgi server.
+
+Starts a stub Non-RT RIC, launches rApp_NASP.py once per server mode with a
+generated configuration pointing at the stub, and drives each with
+load_test.run_load.
+
+With --stream-descriptors, every server parses the descriptors with the
+incremental parser (api_server.stream_descriptors), which reads the request
+input stream of each server directly.
+
+Usage:
+    python benchmarks/compare_servers.py [--concurrency 32] [--duration 10] [--workers 4] [--stream-descriptors]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from load_test import format_result, load_descriptors, run_load  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def wait_for_port(port, timeout=30.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with socket.create_connection(("127.0.0.1", port), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError(f"Server did not start on port {port}")
+
+
+def rapp_config(stub, port, api_server):
+    return {
+        "logging": {"level": "WARNING"},
+        "nonrtric": {
+            "base_url_rApp_catalogue": stub.base_url + "/services",
+            "base_url_pms": stub.base_url + "/a1-policy/v2",
+            "service_name": "rAppNASP",
+            "service_version": "v1",
+            "service_display_name": "rApp NASP",
+            "service_description": "Load test",
+            "ric_id": "ric4",
+            "policytype_id": 1,
+        },
+        "api_server": dict(api_server, host="127.0.0.1", port=port),
+    }
+
+
+def run_mode(stub, api_server, descriptors, concurrency, duration):
+    port = free_port()
+    with tempfile.NamedTemporaryFile('w', suffix='.yaml', delete=False) as f:
+        yaml.safe_dump(rapp_config(stub, port, api_server), f)
+        config_path = f.name
+    process = subprocess.Popen([sys.executable, os.path.join(ROOT, "src", "rApp_NASP.py"), "-c", config_path])
+    try:
+        wait_for_port(port)
+        url = f"http://127.0.0.1:{port}/create_slice_policy"
+        run_load(url, descriptors, concurrency, 1.0)  # warm-up
+        return run_load(url, descriptors, concurrency, duration)
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+        os.remove(config_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare the Flask development server, gunicorn and the asgi server.')
+    parser.add_argument('-c', '--concurrency', type=int, default=32, help='Concurrent clients.')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='Seconds per server mode.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='gunicorn worker processes.')
+    parser.add_argument('--threads', type=int, default=8, help='gunicorn threads per worker.')
+    parser.add_argument('--latency', type=float, default=0.005, help='Stub PMS latency in seconds.')
+    parser.add_argument('--stream-descriptors', action='store_true', help='Parse descriptors incrementally.')
+    args = parser.parse_args()
+
+    descriptors = load_descriptors()
+    stub = StubRIC(latency=args.latency).start()
+    try:
+        modes = [
+            ("flask", {"server": "flask"}),
+            ("gunicorn", {"server": "gunicorn", "workers": args.workers, "threads": args.threads}),
+            ("asgi", {"server": "asgi"}),
+        ]
+        for name, api_server in modes:
+            api_server["stream_descriptors"] = args.stream_descriptors
+            result = run_mode(stub, api_server, descriptors, args.concurrency, args.duration)
+            print(f"{name:<9} {format_result(result)}")
+    finally:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+Load generator for the /create_slice_policy endpoint.
+
+Replays NASP slice descriptors for a given duration and reports throughput
+and latency percentiles, either closed-loop (a fixed number of concurrent
+clients sending back to back) or open-loop at a target request rate. In
+open-loop mode latency is measured from the time each request was due, so
+requests delayed by a saturated server count against the percentiles.
+
+Usage:
+    python benchmarks/load_test.py --url http://127.0.0.1:5001/create_slice_policy \\
+        [--concurrency 32] [--duration 10] [--rate 200] [--descriptors benchmarks/data/slices.ndjson]
+
+Run the rApp against benchmarks/stub_ric.py (see benchmarks/data/config-stub.yaml)
+to load test without a Non-RT RIC.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+import requests
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+
+
+def load_descriptors(path=None):
+    """
+    Loads the NASP descriptors to send.
+
+    Args:
+        path (str, optional): NDJSON file with one descriptor per line. Defaults to the
+            descriptor in scripts/test-nasp-post.bash.
+
+    Returns:
+        list: The descriptors, serialized as JSON bytes.
+    """
+    if path is None:
+        with open(os.path.join(ROOT, "scripts", "test-nasp-post.bash")) as f:
+            return [re.search(r"-d '(.*)'", f.read(), re.S).group(1).encode()]
+    with open(path) as f:
+        return [json.dumps(json.loads(line)).encode() for line in f if line.strip()]
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def run_load(url, descriptors, concurrency=32, duration=10.0):
+    """
+    Sends descriptors to url from concurrent clients for the given duration.
+
+    Args:
+        url (str): Endpoint URL.
+        descriptors (list): JSON bodies, sent round-robin.
+        concurrency (int): Number of concurrent clients.
+        duration (float): Test duration in seconds.
+
+    Returns:
+        dict: Request count, throughput, errors and latency percentiles.
+    """
+    latencies = []
+    status_counts = {}
+    lock = threading.Lock()
+    deadline = time.perf_counter() + duration
+
+    def client(index):
+        session = requests.Session()
+        local_latencies = []
+        local_statuses = {}
+        i = index
+        while time.perf_counter() < deadline:
+            body = descriptors[i % len(descriptors)]
+            i += concurrency
+            start = time.perf_counter()
+            try:
+                status = session.post(url, data=body, headers={"content-type": "application/json"}).status_code
+            except requests.exceptions.RequestException:
+                status = "error"
+            local_latencies.append(time.perf_counter() - start)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            for status, count in local_statuses.items():
+                status_counts[status] = status_counts.get(status, 0) + count
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "statuses": status_counts,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+    }
+
+
+def run_rate(url, descriptors, rate, duration=10.0, max_in_flight=64):
+    """
+    Sends descriptors to url at a fixed rate for the given duration (open loop).
+
+    Request i is due at i / rate seconds after the start. When all max_in_flight
+    clients are busy, due requests wait and their latency includes the wait.
+
+    Args:
+        url (str): Endpoint URL.
+        descriptors (list): JSON bodies, sent round-robin.
+        rate (float): Target requests per second.
+        duration (float): Test duration in seconds.
+        max_in_flight (int): Maximum number of requests in flight.
+
+    Returns:
+        dict: Request count, throughput, errors, latency percentiles and late requests.
+    """
+    latencies = []
+    status_counts = {}
+    late = [0]
+    lock = threading.Lock()
+    next_index = [0]
+    total = int(rate * duration)
+    started = time.perf_counter()
+
+    def client():
+        session = requests.Session()
+        local_latencies = []
+        local_statuses = {}
+        local_late = 0
+        while True:
+            with lock:
+                i = next_index[0]
+                next_index[0] += 1
+            if i >= total:
+                break
+            due = started + i / rate
+            delay = due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            elif delay < -0.001:
+                local_late += 1
+            try:
+                status = session.post(url, data=descriptors[i % len(descriptors)],
+                                      headers={"content-type": "application/json"}).status_code
+            except requests.exceptions.RequestException:
+                status = "error"
+            local_latencies.append(time.perf_counter() - due)
+            local_statuses[status] = local_statuses.get(status, 0) + 1
+        with lock:
+            latencies.extend(local_latencies)
+            late[0] += local_late
+            for status, count in local_statuses.items():
+                status_counts[status] = status_counts.get(status, 0) + count
+
+    threads = [threading.Thread(target=client) for _ in range(max_in_flight)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": len(latencies),
+        "throughput": len(latencies) / elapsed,
+        "statuses": status_counts,
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "target_rate": rate,
+        "late": late[0],
+    }
+
+
+def format_result(result):
+    return (f"{result['requests']} requests, {result['throughput']:.1f} req/s, "
+            f"p50 {result['p50'] * 1e3:.1f} ms, p95 {result['p95'] * 1e3:.1f} ms, "
+            f"p99 {result['p99'] * 1e3:.1f} ms, statuses {result['statuses']}"
+            + (f", target {result['target_rate']:.1f} req/s, {result['late']} sent late"
+               if "target_rate" in result else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test /create_slice_policy.')
+    parser.add_argument('--url', type=str, default='http://127.0.0.1:5001/create_slice_policy',
+                        help='Endpoint to load.')
+    parser.add_argument('-c', '--concurrency', type=int, default=32,
+                        help='Concurrent clients (maximum requests in flight with --rate).')
+    parser.add_argument('-d', '--duration', type=float, default=10.0, help='Test duration in seconds.')
+    parser.add_argument('-r', '--rate', type=float, default=None,
+                        help='Target requests per second (open loop). Closed loop when omitted.')
+    parser.add_argument('--descriptors', type=str, default=None,
+                        help='NDJSON file with one NASP descriptor per line, e.g. benchmarks/data/slices.ndjson.')
+    args = parser.parse_args()
+
+    descriptors = load_descriptors(args.descriptors)
+    if args.rate:
+        result = run_rate(args.url, descriptors, args.rate, args.duration, args.concurrency)
+    else:
+        result = run_load(args.url, descriptors, args.concurrency, args.duration)
+    print(format_result(result))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
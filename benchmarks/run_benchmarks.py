@@ -0,0 +1,340 @@
+"""
+Benchmark suite for the code that runs on every slice request.
+
+Covers the capacity lookups (to_bps, to_prb), create_rrm_policy across
+descriptor sizes, with and without the RRM policy cache, remove_duplicates_from_rrm_policy,
+NASPPolicy.validate_policy, NASPPolicy.fill_policy_body and the full /create_slice_policy path through the
+Flask test client with an in-process PMS. Each benchmark runs a number of
+rounds, each long enough to time reliably, and reports per-call statistics.
+
+Results are written as JSON. The compare command checks a result file
+against a baseline and exits non-zero when any benchmark regressed by more
+than the threshold. The fastest round (min) is compared by default, as it is
+the statistic least affected by other load on the machine. With run
+--compare, regressed benchmarks are measured once more before failing.
+Baselines are machine-specific: record one on the machine the comparison
+runs on.
+
+Usage:
+    python benchmarks/run_benchmarks.py run [-k create_rrm_policy] [--output results.json]
+    python benchmarks/run_benchmarks.py run --output benchmarks/baselines/baseline.json
+    python benchmarks/run_benchmarks.py compare benchmarks/baselines/baseline.json results.json [--threshold 0.25]
+    python benchmarks/run_benchmarks.py run --compare benchmarks/baselines/baseline.json
+"""
+import argparse
+import datetime
+import gc
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+import tools  # noqa: E402
+from bench_dedup import synthetic_descriptor  # noqa: E402
+from load_test import load_descriptors  # noqa: E402
+
+BENCHMARKS = {}
+
+
+def benchmark(name):
+    """
+    Registers a benchmark. The decorated function does the setup and returns the callable to time.
+    """
+    def register(setup):
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+def quiet_logger(name):
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.WARNING)
+    return logger
+
+
+def nasp_config():
+    return {"nonrtric": {"base_url_pms": "http://pms.invalid/a1-policy/v2", "ric_id": "ric4",
+                         "service_name": "rAppNASP", "policytype_id": 1}}
+
+
+class MockPMSResponse:
+    status_code = 200
+
+    def raise_for_status(self):
+        pass
+
+
+class MockPMSSession:
+    """
+    Session whose PUTs succeed immediately, so the request path is timed without network noise.
+    """
+
+    def put(self, url, json=None, headers=None, **kwargs):
+        return MockPMSResponse()
+
+
+@benchmark("to_bps_fdd")
+def bench_to_bps_fdd():
+    tools.build_capacity_tables()
+    return lambda: tools.to_bps(False, 28, 1, 50, is_tdd=False)
+
+
+@benchmark("to_bps_tdd")
+def bench_to_bps_tdd():
+    tools.build_capacity_tables()
+    return lambda: tools.to_bps(True, 20, 2, 100, symbol_format=44)
+
+
+@benchmark("to_prb_fdd")
+def bench_to_prb_fdd():
+    tools.build_capacity_tables()
+    return lambda: tools.to_prb(100000, False, 28, 1, 50, is_tdd=False)
+
+
+def register_create_rrm_policy(n_snssai):
+    @benchmark(f"create_rrm_policy_{n_snssai}")
+    def bench_create_rrm_policy():
+        descriptor = synthetic_descriptor(n_snssai, 0.5)
+        return lambda: tools.create_rrm_policy(descriptor)
+
+
+@benchmark("create_rrm_policy_descriptor")
+def bench_create_rrm_policy_descriptor():
+    descriptor = json.loads(load_descriptors()[0])
+    return lambda: tools.create_rrm_policy(descriptor)
+
+
+for size in (10, 1000, 20000):
+    register_create_rrm_policy(size)
+
+
+def register_create_rrm_policy_cached(n_snssai):
+    @benchmark(f"create_rrm_policy_cached_{n_snssai}")
+    def bench_create_rrm_policy_cached():
+        from policy_cache import RRMPolicyCache
+
+        cache = RRMPolicyCache()
+        descriptor = synthetic_descriptor(n_snssai, 0.5)
+        return lambda: cache.create_rrm_policy(descriptor)
+
+
+@benchmark("create_rrm_policy_cached_descriptor")
+def bench_create_rrm_policy_cached_descriptor():
+    from policy_cache import RRMPolicyCache
+
+    cache = RRMPolicyCache()
+    descriptor = json.loads(load_descriptors()[0])
+    return lambda: cache.create_rrm_policy(descriptor)
+
+
+for size in (10, 1000):
+    register_create_rrm_policy_cached(size)
+
+
+@benchmark("remove_duplicates_10000")
+def bench_remove_duplicates():
+    policy = tools.create_rrm_policy(synthetic_descriptor(10000, 0.0))
+    entries = policy["RRMPolicyRatioList"] * 2
+    return lambda: tools.remove_duplicates_from_rrm_policy({"RRMPolicyRatioList": entries})
+
+
+@benchmark("fill_policy_body")
+def bench_fill_policy_body():
+    from rApp_NASP import NASPPolicy
+
+    config = nasp_config()
+    nasp_policy = NASPPolicy(config, quiet_logger("run_benchmarks"), MockPMSSession())
+    policy_data = tools.create_rrm_policy(json.loads(load_descriptors()[0]))
+    return lambda: nasp_policy.fill_policy_body(config, policy_data)
+
+
+@benchmark("validate_policy")
+def bench_validate_policy():
+    from rApp_NASP import NASPPolicy
+
+    config = dict(nasp_config(), policy_validation={"enabled": True,
+                                                    "schemas": {1: os.path.join(BENCH_DIR, "..", "policy", "SliceSchemav5.json")}})
+    nasp_policy = NASPPolicy(config, quiet_logger("run_benchmarks"), MockPMSSession())
+    policy_data = tools.create_rrm_policy(json.loads(load_descriptors()[0]))
+    return lambda: nasp_policy.validate_policy(policy_data)
+
+
+@benchmark("create_slice_policy_request")
+def bench_create_slice_policy_request():
+    from rApp_NASP import create_app
+
+    client = create_app(nasp_config(), quiet_logger("run_benchmarks"), MockPMSSession()).test_client()
+    body = load_descriptors()[0]
+
+    def request():
+        response = client.post("/create_slice_policy", data=body, content_type="application/json")
+        assert response.status_code == 201, response.status_code
+    return request
+
+
+def measure(func, rounds=7, min_time=0.05):
+    """
+    Times func over several rounds, calibrating the calls per round to last at least min_time.
+
+    Args:
+        func (callable): Function to time.
+        rounds (int): Number of timed rounds.
+        min_time (float): Minimum duration of a round in seconds.
+
+    Returns:
+        dict: Per-call min, median, mean and standard deviation in seconds, with rounds and iterations.
+    """
+    func()  # warm-up
+    iterations = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func()
+        if time.perf_counter() - start >= min_time:
+            break
+        iterations *= 2
+
+    times = []
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(iterations):
+                func()
+            times.append((time.perf_counter() - start) / iterations)
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return {
+        "min": min(times),
+        "median": statistics.median(times),
+        "mean": statistics.fmean(times),
+        "stddev": statistics.stdev(times) if len(times) > 1 else 0.0,
+        "rounds": rounds,
+        "iterations": iterations,
+    }
+
+
+def run(names, rounds, min_time):
+    results = {}
+    for name in names:
+        results[name] = measure(BENCHMARKS[name](), rounds, min_time)
+        print(f"{name:<32} min {format_time(results[name]['min']):>10}  median {format_time(results[name]['median']):>10} "
+              f"(+- {format_time(results[name]['stddev'])}, {results[name]['iterations']} x {rounds})")
+    return {
+        "meta": {
+            "date": datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "implementation": platform.python_implementation(),
+            "machine": platform.machine(),
+            "system": platform.system(),
+            "cpu_count": os.cpu_count(),
+        },
+        "benchmarks": results,
+    }
+
+
+def find_regressions(baseline, current, threshold, stat="min"):
+    """
+    Returns the benchmarks of current that are slower than in baseline by more than threshold.
+
+    Args:
+        baseline (dict): Baseline results.
+        current (dict): Current results.
+        threshold (float): Allowed slowdown, e.g. 0.25 for 25%.
+        stat (str): Statistic compared, 'min' or 'median'.
+
+    Returns:
+        list: Names of the regressed benchmarks.
+    """
+    return [name for name, base in baseline["benchmarks"].items()
+            if name in current["benchmarks"] and current["benchmarks"][name][stat] / base[stat] - 1.0 > threshold]
+
+
+def print_comparison(baseline, current, threshold, stat="min"):
+    print(f"{'benchmark':<32} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, base in baseline["benchmarks"].items():
+        result = current["benchmarks"].get(name)
+        if result is None:
+            print(f"{name:<32} {format_time(base[stat]):>12} {'missing':>12}")
+            continue
+        change = result[stat] / base[stat] - 1.0
+        flag = "  REGRESSION" if change > threshold else ""
+        print(f"{name:<32} {format_time(base[stat]):>12} {format_time(result[stat]):>12} {change:>+7.1%}{flag}")
+
+
+def format_time(seconds):
+    if seconds >= 1e-3:
+        return f"{seconds * 1e3:.2f} ms"
+    if seconds >= 1e-6:
+        return f"{seconds * 1e6:.2f} us"
+    return f"{seconds * 1e9:.0f} ns"
+
+
+def load_results(path):
+    with open(path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the benchmark suite or compare results with a baseline.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run the benchmarks.')
+    run_parser.add_argument('-k', '--filter', type=str, default=None,
+                            help='Only run benchmarks whose name contains this string.')
+    run_parser.add_argument('--rounds', type=int, default=7, help='Timed rounds per benchmark.')
+    run_parser.add_argument('--min-time', type=float, default=0.05, help='Minimum duration of a round (s).')
+    run_parser.add_argument('-o', '--output', type=str, default=None, help='JSON file to write the results to.')
+    run_parser.add_argument('--compare', type=str, default=None, help='Baseline JSON to compare the results with.')
+    run_parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown, e.g. 0.25 for 25%%.')
+    run_parser.add_argument('--stat', choices=('min', 'median'), default='min', help='Statistic compared.')
+
+    compare_parser = subparsers.add_parser('compare', help='Compare results with a baseline.')
+    compare_parser.add_argument('baseline', type=str, help='Baseline JSON.')
+    compare_parser.add_argument('current', type=str, help='Results JSON.')
+    compare_parser.add_argument('--threshold', type=float, default=0.25, help='Allowed slowdown, e.g. 0.25 for 25%%.')
+    compare_parser.add_argument('--stat', choices=('min', 'median'), default='min', help='Statistic compared.')
+    args = parser.parse_args()
+
+    if args.command == 'run':
+        names = [name for name in BENCHMARKS if args.filter is None or args.filter in name]
+        results = run(names, args.rounds, args.min_time)
+        if args.output:
+            os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+            with open(args.output, 'w') as f:
+                json.dump(results, f, indent=2)
+                f.write("\n")
+        if not args.compare:
+            return 0
+        baseline, current = load_results(args.compare), results
+        # Measure regressed benchmarks once more so a burst of load does not fail the run
+        retry = find_regressions(baseline, current, args.threshold, args.stat)
+        if retry:
+            print(f"\nMeasuring again: {', '.join(retry)}")
+            for name, result in run(retry, args.rounds, args.min_time)["benchmarks"].items():
+                if result[args.stat] < current["benchmarks"][name][args.stat]:
+                    current["benchmarks"][name] = result
+        print()
+    else:
+        baseline, current = load_results(args.baseline), load_results(args.current)
+
+    threshold = args.threshold
+    print_comparison(baseline, current, threshold, args.stat)
+    regressions = find_regressions(baseline, current, threshold, args.stat)
+    if regressions:
+        print(f"\n{len(regressions)} benchmark(s) regressed by more than {threshold:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
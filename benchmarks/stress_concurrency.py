@@ -0,0 +1,153 @@
+"""
+Concurrency stress test of /create_slice_policy.
+
+Serves the rApp with a threaded WSGI server against a stub PMS that records
+every PUT body, then fires many concurrent requests. Each request carries a
+distinct slice and bit rates, so the policy sent for it can be predicted.
+Every PUT body is checked against the policy expected for the request that
+reported its policy_id. Exits non-zero on any mismatch, lost or duplicated
+PUT.
+
+With --same-policy (which enables the policy store), every request also
+carries one slice of a policy created first, so all requests update that
+single policy at the same time. The last PUT of the policy, and the policy
+store, must then hold the slice of every request with its own PRBs.
+
+Usage:
+    python benchmarks/stress_concurrency.py [--requests 5000] [--concurrency 64] [--policy-store]
+        [--same-policy]
+"""
+import argparse
+import copy
+import json
+import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCH_DIR, "..", "src"))
+sys.path.insert(0, BENCH_DIR)
+
+from load_test import load_descriptors  # noqa: E402
+from rApp_NASP import create_app  # noqa: E402
+from stub_ric import StubRIC  # noqa: E402
+from tools import create_rrm_policy  # noqa: E402
+from werkzeug.serving import make_server  # noqa: E402
+
+
+def make_descriptor(template, index, shared_sd=None):
+    descriptor = copy.deepcopy(template)
+    ssq = descriptor["description"]["Slice Attributes"]["SSQ"]
+    ssq["Guaranteed Flow Bit Rate - Downlink"] = 100000 * (1 + index % 500)
+    ssq["Max Flow Bit Rate - Downlink"] = 200000 * (1 + index % 500)
+    slices = [{"sst": 1, "sd": index}]
+    if shared_sd is not None:
+        slices.append({"sst": 1, "sd": shared_sd})
+    for nf in descriptor["description"]["resource_description"]["core"]["nfs"]:
+        if nf.get("name") == "amf":
+            for plmn_support in nf["config"]["plmnSupportList"]:
+                plmn_support["snssaiList"] = list(slices)
+    for nf in descriptor["description"]["resource_description"]["ran"]["nfs"]:
+        if nf.get("name") == "ueransim":
+            nf["config"]["slices"] = list(slices)
+    return descriptor
+
+
+def check_same_policy(results, descriptors, policy_id, put_bodies, store_stats):
+    # Every request must have updated the shared policy, and its last PUT must hold every request's slice
+    failed = sum(1 for _, status, response in results
+                 if status != 201 or response["policy_ids"] != [policy_id])
+    final = put_bodies.get(policy_id, {}).get("policy_data", {}).get("RRMPolicyRatioList", [])
+    final_keys = {json.dumps(entry, sort_keys=True) for entry in final}
+    lost = 0
+    for index, status, _ in results:
+        own = [entry for entry in create_rrm_policy(descriptors[index])["RRMPolicyRatioList"]
+               if entry["sd"] == index + 1]
+        lost += any(json.dumps(entry, sort_keys=True) not in final_keys for entry in own)
+    diverged = store_stats["policies"] != 1 or store_stats["entries"] != len(final)
+    print(f"failed {failed}, slices lost from policy {policy_id} {lost}, store and RIC diverged {diverged}")
+    return 1 if failed or lost or diverged else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stress /create_slice_policy with concurrent requests.')
+    parser.add_argument('-n', '--requests', type=int, default=5000, help='Number of requests.')
+    parser.add_argument('-c', '--concurrency', type=int, default=64, help='Concurrent clients.')
+    parser.add_argument('--policy-store', action='store_true', help='Enable the policy store.')
+    parser.add_argument('--same-policy', action='store_true',
+                        help='Update a single policy from every request (enables the policy store).')
+    args = parser.parse_args()
+
+    stub = StubRIC(record_bodies=True).start()
+    config = {"nonrtric": {"base_url_pms": stub.base_url + "/a1-policy/v2", "ric_id": "ric4",
+                           "service_name": "rAppNASP", "policytype_id": 1},
+              "http_client": {"pool_maxsize": args.concurrency},
+              "policy_store": {"enabled": args.policy_store or args.same_policy}}
+    logger = logging.getLogger("stress_concurrency")
+    logger.setLevel(logging.WARNING)
+    logging.getLogger("werkzeug").setLevel(logging.WARNING)
+    server = make_server("127.0.0.1", 0, create_app(config, logger), threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/create_slice_policy"
+
+    template = json.loads(load_descriptors()[0])
+    if args.same_policy:
+        shared_policy_id = requests.post(url, json=make_descriptor(template, 0)).json()["policy_ids"][0]
+        descriptors = [make_descriptor(template, index + 1, shared_sd=0) for index in range(args.requests)]
+    else:
+        descriptors = [make_descriptor(template, index) for index in range(args.requests)]
+    local = threading.local()
+
+    def send(index):
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        response = session.post(url, json=descriptors[index])
+        return index, response.status_code, response.json()
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as executor:
+        results = list(executor.map(send, range(args.requests)))
+    elapsed = time.perf_counter() - started
+    store_stats = requests.get(url.rsplit("/", 1)[0] + "/policy_store/stats").json() if args.same_policy else None
+    server.shutdown()
+    stub.stop()
+
+    put_bodies = {}
+    duplicated = 0
+    for endpoint, body in stub.bodies:
+        if endpoint == "policies":
+            duplicated += body["policy_id"] in put_bodies
+            put_bodies[body["policy_id"]] = body
+
+    if args.same_policy:
+        print(f"{args.requests} requests in {elapsed:.2f} s ({args.requests / elapsed:.0f} req/s), "
+              f"{len(stub.bodies)} PUTs recorded")
+        return check_same_policy(results, descriptors, shared_policy_id, put_bodies, store_stats)
+
+    failed = mismatched = lost = 0
+    for index, status, response in results:
+        if status != 201:
+            failed += 1
+            continue
+        expected = create_rrm_policy(descriptors[index])
+        for policy_id in response["policy_ids"]:
+            body = put_bodies.get(policy_id)
+            if body is None:
+                lost += 1
+            elif body["policy_data"] != expected:
+                mismatched += 1
+
+    print(f"{args.requests} requests in {elapsed:.2f} s ({args.requests / elapsed:.0f} req/s), "
+          f"{len(put_bodies)} PUTs recorded")
+    print(f"failed {failed}, mismatched bodies {mismatched}, lost PUTs {lost}, duplicated PUTs {duplicated}")
+    return 1 if failed or mismatched or lost or duplicated else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
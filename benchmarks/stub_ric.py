@@ -0,0 +1,321 @@
+"""
+Stand-in for the Non-RT RIC for offline load testing.
+
+Answers the A1 PMS policy PUT (/a1-policy/v2/policies) and the rApp catalogue
+service PUT (/services/<name>) with an optional artificial latency, error rate
+and concurrency limit. Requests beyond the concurrency limit wait for a free
+slot, as they would on a server with a fixed worker pool, or are answered
+with error_status at once with --reject-over-limit, as an overloaded gateway
+would. The server speaks
+HTTP/1.1 so clients can keep connections alive.
+
+Policies that were PUT successfully are kept, so they can be listed
+(GET /a1-policy/v2/policies?ric_id=&service_id=), read back
+(GET /a1-policy/v2/policies/<policy_id>, with an ETag honouring
+If-None-Match unless --no-etags) and deleted. drop_policies() and
+set_policy_data() simulate a RIC that lost or altered policies.
+
+Usage:
+    python benchmarks/stub_ric.py [--host 127.0.0.1] [--port 8080] [--latency 0.01] \\
+        [--catalogue-latency 2] [--jitter 0.005] [--error-rate 0.01] [--error-status 503] [--max-concurrency 16] \\
+        [--reject-over-limit] [--no-etags]
+
+Point nonrtric.base_url_pms at http://<host>:<port>/a1-policy/v2 and
+nonrtric.base_url_rApp_catalogue at http://<host>:<port>/services, e.g. with
+benchmarks/data/config-stub.yaml.
+"""
+import argparse
+import hashlib
+import json
+import random
+import signal
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+PMS_POLICIES_PATH = "/a1-policy/v2/policies"
+CATALOGUE_SERVICES_PATH = "/services/"
+
+
+class StubRICHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def do_PUT(self):
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.path.startswith(PMS_POLICIES_PATH):
+            endpoint = "policies"
+        elif self.path.startswith(CATALOGUE_SERVICES_PATH):
+            endpoint = "services"
+        else:
+            self.server.count("unknown", 404)
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        if self.server.reject_over_limit and not self.server.slots.acquire(blocking=False):
+            self.server.count(endpoint, self.server.error_status)
+            self._reply(self.server.error_status, {"error": "Over the concurrency limit"})
+            return
+        if not self.server.reject_over_limit:
+            self.server.slots.acquire()
+        try:
+            self.server.wait(endpoint)
+            status = self.server.pick_status()
+        finally:
+            self.server.slots.release()
+        self.server.count(endpoint, status)
+        if self.server.record_bodies:
+            self.server.record(endpoint, body)
+        if status >= 400:
+            self._reply(status, {"error": "Injected failure"})
+            return
+        if endpoint == "policies":
+            self.server.store_policy(body)
+        self._reply(status, {"received": len(body)})
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == PMS_POLICIES_PATH:
+            endpoint = "policy_list"
+        elif url.path.startswith(PMS_POLICIES_PATH + "/"):
+            endpoint = "policy_get"
+        else:
+            self.server.count("unknown", 404)
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+
+        with self.server.slots:
+            self.server.wait(endpoint)
+            status = self.server.pick_status()
+        if status >= 400:
+            self.server.count(endpoint, status)
+            self._reply(status, {"error": "Injected failure"})
+            return
+        if endpoint == "policy_list":
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            self.server.count(endpoint, 200)
+            self._reply(200, {"policy_ids": self.server.list_policies(query)})
+            return
+
+        policy = self.server.get_policy(url.path[len(PMS_POLICIES_PATH) + 1:])
+        if policy is None:
+            self.server.count(endpoint, 404)
+            self._reply(404, {"error": "Policy not found"})
+            return
+        body, etag = policy
+        if self.server.etags and self.headers.get("If-None-Match") == etag:
+            self.server.count(endpoint, 304)
+            self._reply(304, None, {"ETag": etag})
+            return
+        self.server.count(endpoint, 200)
+        self._reply(200, body, {"ETag": etag} if self.server.etags else None)
+
+    def do_DELETE(self):
+        url = urlsplit(self.path)
+        if not url.path.startswith(PMS_POLICIES_PATH + "/"):
+            self.server.count("unknown", 404)
+            self._reply(404, {"error": f"Unknown path {self.path}"})
+            return
+        deleted = self.server.drop_policies([url.path[len(PMS_POLICIES_PATH) + 1:]])
+        self.server.count("policy_delete", 204 if deleted else 404)
+        if deleted:
+            self._reply(204, None)
+        else:
+            self._reply(404, {"error": "Policy not found"})
+
+    def _reply(self, status, payload, headers=None):
+        data = json.dumps(payload).encode() if payload is not None else b""
+        self.send_response(status)
+        if payload is not None:
+            self.send_header("Content-Type", "application/json")
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubRIC(ThreadingHTTPServer):
+    """
+    Stub Non-RT RIC server.
+
+    Attributes:
+        latency (float): Seconds every request takes, plus up to jitter seconds.
+        catalogue_latency (float): Seconds catalogue requests take instead of latency, or None.
+        jitter (float): Maximum random extra latency in seconds.
+        error_rate (float): Fraction of requests answered with error_status.
+        error_status (int): HTTP status of injected failures.
+        max_concurrency (int): Requests served at the same time; 0 for no limit.
+        reject_over_limit (bool): Whether PUTs over max_concurrency fail with error_status instead of waiting.
+        requests_served (int): Requests answered on the known endpoints.
+        responses (dict): Response counts keyed by (endpoint, status).
+        record_bodies (bool): Whether to keep the decoded body of every request.
+        bodies (list): (endpoint, body) pairs of the recorded requests.
+        etags (bool): Whether policy reads carry an ETag and honour If-None-Match.
+        policies (dict): Policies applied on the stub, keyed by policy_id, as (body, etag) pairs.
+    """
+    daemon_threads = True
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.0, jitter=0.0, error_rate=0.0, error_status=503,
+                 max_concurrency=0, seed=None, catalogue_latency=None, record_bodies=False, etags=True,
+                 reject_over_limit=False):
+        super().__init__((host, port), StubRICHandler)
+        self.latency = latency
+        self.jitter = jitter
+        self.catalogue_latency = catalogue_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_concurrency = max_concurrency
+        self.slots = threading.BoundedSemaphore(max_concurrency) if max_concurrency else _NoLimit()
+        self.reject_over_limit = reject_over_limit
+        self.lock = threading.Lock()
+        self.random = random.Random(seed)
+        self.requests_served = 0
+        self.responses = {}
+        self.record_bodies = record_bodies
+        self.bodies = []
+        self.etags = etags
+        self.policies = {}
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def wait(self, endpoint="policies"):
+        delay = self.latency
+        if endpoint == "services" and self.catalogue_latency is not None:
+            delay = self.catalogue_latency
+        if self.jitter:
+            with self.lock:
+                delay += self.random.uniform(0.0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def pick_status(self):
+        if self.error_rate:
+            with self.lock:
+                if self.random.random() < self.error_rate:
+                    return self.error_status
+        return 200
+
+    def count(self, endpoint, status):
+        with self.lock:
+            if endpoint != "unknown":
+                self.requests_served += 1
+            self.responses[(endpoint, status)] = self.responses.get((endpoint, status), 0) + 1
+
+    def record(self, endpoint, body):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            pass
+        with self.lock:
+            self.bodies.append((endpoint, body))
+
+    def store_policy(self, body):
+        try:
+            policy = json.loads(body)
+            policy_id = policy["policy_id"]
+        except (ValueError, KeyError, TypeError):
+            return
+        with self.lock:
+            self.policies[policy_id] = (policy, _etag(policy))
+
+    def list_policies(self, query):
+        with self.lock:
+            return [policy_id for policy_id, (policy, _) in self.policies.items()
+                    if all(str(policy.get(key)) == value for key, value in query.items())]
+
+    def get_policy(self, policy_id):
+        with self.lock:
+            return self.policies.get(policy_id)
+
+    def drop_policies(self, policy_ids=None):
+        """
+        Removes policies, or all of them, as a restarted RIC would. Returns the number removed.
+        """
+        with self.lock:
+            if policy_ids is None:
+                policy_ids = list(self.policies)
+            return sum(self.policies.pop(policy_id, None) is not None for policy_id in policy_ids)
+
+    def set_policy_data(self, policy_id, policy_data):
+        """
+        Replaces the policy_data of a stored policy, as a change made behind the rApp's back would.
+        """
+        with self.lock:
+            policy = dict(self.policies[policy_id][0], policy_data=policy_data)
+            self.policies[policy_id] = (policy, _etag(policy))
+
+    def start(self):
+        thread = threading.Thread(target=self.serve_forever, daemon=True)
+        thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def _etag(policy):
+    return '"' + hashlib.sha1(json.dumps(policy, sort_keys=True).encode()).hexdigest() + '"'
+
+
+class _NoLimit:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def acquire(self, blocking=True, timeout=None):
+        return True
+
+    def release(self):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run a stub Non-RT RIC (A1 PMS and rApp catalogue).')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on.')
+    parser.add_argument('--port', type=int, default=8080, help='Port to listen on.')
+    parser.add_argument('--latency', type=float, default=0.0, help='Seconds every request takes.')
+    parser.add_argument('--catalogue-latency', type=float, default=None,
+                        help='Seconds catalogue requests take, if different from --latency.')
+    parser.add_argument('--jitter', type=float, default=0.0, help='Maximum random extra latency in seconds.')
+    parser.add_argument('--error-rate', type=float, default=0.0, help='Fraction of requests that fail.')
+    parser.add_argument('--error-status', type=int, default=503, help='HTTP status of injected failures.')
+    parser.add_argument('--max-concurrency', type=int, default=0,
+                        help='Requests served at the same time; further requests wait. 0 for no limit.')
+    parser.add_argument('--seed', type=int, default=None, help='Seed for jitter and error injection.')
+    parser.add_argument('--reject-over-limit', action='store_true',
+                        help='Answer PUTs over --max-concurrency with --error-status instead of queueing them.')
+    parser.add_argument('--no-etags', action='store_true', help='Answer policy reads without an ETag.')
+    args = parser.parse_args()
+
+    stub = StubRIC(args.host, args.port, latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                   error_status=args.error_status, max_concurrency=args.max_concurrency, seed=args.seed,
+                   catalogue_latency=args.catalogue_latency, etags=not args.no_etags, reject_over_limit=args.reject_over_limit)
+    # Print the response counts on SIGTERM as well as on Ctrl+C
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Stub Non-RT RIC listening on {stub.base_url} "
+          f"(PMS {stub.base_url}/a1-policy/v2, catalogue {stub.base_url}/services)", flush=True)
+    try:
+        stub.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stub.server_close()
+        for (endpoint, status), count in sorted(stub.responses.items()):
+            print(f"{endpoint} {status}: {count}")
+
+
+if __name__ == "__main__":
+    main()
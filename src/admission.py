@@ -0,0 +1,317 @@
+import logging
+import math
+import threading
+
+from tools import policy_entry_key
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'admission' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_ADMISSION_CONFIG = {
+    'enabled': False,       # Check that the minPRB of the slices on a cell fit before sending policies
+    'mode': 'reject',       # 'reject' requests that do not fit, or 'scale' their minPRB down to fit
+    'cell_capacity': 100,   # PRB percentage of a cell that minPRB reservations may use
+}
+
+ADMISSION_MODES = ('reject', 'scale')
+
+
+def _min_prb(entry):
+    return int(entry.get("minPRB") or 0)
+
+
+def _fits(demand, free):
+    return all(delta <= free.get(nci, 0) for nci, delta in demand.items())
+
+
+def _take(demand, free, sign=1):
+    for nci, delta in demand.items():
+        free[nci] = free.get(nci, 0) - sign * delta
+
+
+def select_requests(demands, free):
+    """
+    Chooses the requests of a batch to admit so that as many as possible fit.
+
+    This is a multi-dimensional knapsack with every request worth one, solved
+    heuristically. Requests are taken greedily by their demand on congested
+    cells (cells the whole batch does not fit on), each cell's demand weighted
+    by how scarce the cell is, so a request that is small overall but large
+    on a busy cell goes after the requests it would block. An exchange pass
+    then swaps an admitted request for two or more rejected ones whenever they
+    fit in its place, until no swap helps. When every request touches a single
+    cell, the greedy order is smallest demand first on every cell, which is
+    optimal.
+
+    Args:
+        demands (list): Per request, the additional minPRB it needs on every cell, keyed by nci.
+        free (dict): minPRB left on every cell, keyed by nci.
+
+    Returns:
+        list: Indices of the requests to admit, in the order they were chosen.
+    """
+    load = {}
+    for demand in demands:
+        for nci, delta in demand.items():
+            load[nci] = load.get(nci, 0) + max(delta, 0)
+    scarcity = {nci: total / max(free.get(nci, 0), 1) for nci, total in load.items()
+                if total > free.get(nci, 0)}
+
+    def weight(index):
+        demand = demands[index]
+        return (sum(max(delta, 0) * scarcity.get(nci, 0) for nci, delta in demand.items()),
+                sum(demand.values()), index)
+
+    order = sorted(range(len(demands)), key=weight)
+    free = dict(free)
+    admitted, rejected = [], []
+    for index in order:
+        if _fits(demands[index], free):
+            _take(demands[index], free)
+            admitted.append(index)
+        else:
+            rejected.append(index)
+
+    # The greedy order is already optimal when no request spans several cells.
+    # Every swap admits at least one more request, so this ends.
+    swapped = any(len(demand) > 1 for demand in demands)
+    while swapped and rejected:
+        swapped = False
+        # Only requests blocked on cells of the one swapped out can fit in its place
+        blocked = {index: frozenset(nci for nci, delta in demands[index].items() if delta > free.get(nci, 0))
+                   for index in rejected}
+        for out in reversed(admitted):
+            cells = demands[out].keys()
+            candidates = [index for index in rejected if blocked[index] <= cells]
+            if len(candidates) < 2:
+                continue
+            trial = dict(free)
+            _take(demands[out], trial, -1)
+            added = []
+            for index in candidates:
+                if _fits(demands[index], trial):
+                    _take(demands[index], trial)
+                    added.append(index)
+            if len(added) >= 2:
+                admitted.remove(out)
+                admitted.extend(added)
+                added = set(added)
+                rejected = sorted([index for index in rejected if index not in added] + [out], key=weight)
+                free = trial
+                swapped = True
+                break
+    return admitted
+
+
+class AdmissionController:
+    """
+    Tracks the minPRB reserved on every cell by the policies this rApp has issued.
+
+    Each slice (mcc, mnc, nci, sst, sd) holds one reservation. Reservations of
+    requests in flight are pending until commit() or discard(), so concurrent
+    requests cannot oversubscribe a cell. The reserved total of every cell is
+    updated incrementally, so a decision costs O(entries in the request)
+    whatever the number of slices already on the cell.
+
+    Attributes:
+        mode (str): 'reject' or 'scale'.
+        cell_capacity (int): PRB percentage of a cell available to minPRB reservations.
+    """
+
+    def __init__(self, mode='reject', cell_capacity=100):
+        """
+        Initializes the controller with no reservations.
+
+        Args:
+            mode (str): 'reject' or 'scale'.
+            cell_capacity (int): PRB percentage of a cell available to minPRB reservations.
+
+        Raises:
+            ValueError: If mode is unknown.
+        """
+        if mode not in ADMISSION_MODES:
+            raise ValueError(f"Unknown admission mode {mode!r}; expected one of {', '.join(ADMISSION_MODES)}")
+        self.mode = mode
+        self.cell_capacity = cell_capacity
+        self._lock = threading.Lock()
+        self._committed = {}
+        self._pending = {}
+        self._reserved = {}
+        self._counters = {"admitted": 0, "scaled": 0, "rejected": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a controller from the 'admission' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+
+        Returns:
+            AdmissionController or None: The controller, or None if admission control is disabled.
+        """
+        admission_config = dict(DEFAULT_ADMISSION_CONFIG)
+        admission_config.update(config.get('admission') or {})
+        if not admission_config['enabled']:
+            return None
+        return cls(mode=admission_config['mode'], cell_capacity=int(admission_config['cell_capacity']))
+
+    def load(self, policies):
+        """
+        Records the entries of policies already applied on the RIC, e.g. those of the policy store.
+
+        Args:
+            policies (dict): Mapping of policy_id to RRMPolicyRatioList entries.
+        """
+        for entries in policies.values():
+            self.commit(entries)
+
+    def admit(self, entries):
+        """
+        Reserves the minPRB of the entries of one request, all or nothing.
+
+        An entry replaces the reservation of its slice. When a cell cannot fit
+        the request, the request is rejected in 'reject' mode; in 'scale' mode
+        the minPRB of its entries on that cell is scaled down to the capacity
+        left, and the request is only rejected when no capacity is left.
+
+        Args:
+            entries (list): RRMPolicyRatioList entries.
+
+        Returns:
+            tuple: (admitted entries, rejected cells). The admitted entries are None
+            when the request is rejected; scaled entries are copies of the originals.
+        """
+        with self._lock:
+            cells = self._group(entries)
+            factors = {}
+            rejected = []
+            for nci, (released, requested, _) in cells.items():
+                available = self.cell_capacity - (self._reserved.get(nci, 0) - released)
+                if requested <= available:
+                    continue
+                if self.mode == 'scale' and available > 0:
+                    factors[nci] = available / requested
+                else:
+                    rejected.append(nci)
+
+            if rejected:
+                self._counters["rejected"] += 1
+                logger.info("Rejected request: not enough PRB capacity on cell(s) %s.", ", ".join(rejected))
+                return None, rejected
+
+            admitted = []
+            for nci, (_, _, items) in cells.items():
+                factor = factors.get(nci)
+                for key, entry, min_prb in items:
+                    if factor is not None:
+                        min_prb = math.floor(min_prb * factor)
+                        entry = dict(entry, minPRB=min_prb)
+                    self._reserve(key, min_prb)
+                    admitted.append(entry)
+            self._counters["scaled" if factors else "admitted"] += 1
+            if factors:
+                logger.info("Scaled minPRB down to fit cell(s) %s.", ", ".join(factors))
+            return admitted, []
+
+    def pack(self, requests):
+        """
+        Admits as many requests of a batch as fit, without scaling.
+
+        The requests are chosen by select_requests(), which admits the largest
+        number of requests when every request touches a single cell, and is a
+        heuristic for requests spanning several cells.
+
+        Args:
+            requests (list): One list of RRMPolicyRatioList entries per request.
+
+        Returns:
+            list: The admitted entries of every request, or None for rejected requests.
+        """
+        results = [None] * len(requests)
+        with self._lock:
+            demands = [{nci: requested - released for nci, (released, requested, _) in self._group(entries).items()}
+                       for entries in requests]
+            free = {nci: self.cell_capacity - self._reserved.get(nci, 0) for demand in demands for nci in demand}
+            chosen = select_requests(demands, free)
+            for index in chosen + sorted(set(range(len(requests))) - set(chosen)):
+                # Checked again: requests of the batch may update the same slice
+                cells = self._group(requests[index])
+                if all(requested - released <= self.cell_capacity - self._reserved.get(nci, 0)
+                       for nci, (released, requested, _) in cells.items()):
+                    for _, _, items in cells.values():
+                        for key, _, min_prb in items:
+                            self._reserve(key, min_prb)
+                    results[index] = list(requests[index])
+                    self._counters["admitted"] += 1
+                else:
+                    self._counters["rejected"] += 1
+        return results
+
+    def commit(self, entries):
+        """
+        Records entries as applied on the RIC after a successful PUT.
+
+        Args:
+            entries (list): RRMPolicyRatioList entries.
+        """
+        with self._lock:
+            for entry in entries:
+                key = policy_entry_key(entry)
+                min_prb = _min_prb(entry)
+                self._add(key[2], min_prb - self._effective(key))
+                self._pending.pop(key, None)
+                self._committed[key] = min_prb
+
+    def discard(self, entries):
+        """
+        Releases the pending reservations of entries whose PUT failed or was not sent.
+
+        Args:
+            entries (list): RRMPolicyRatioList entries.
+        """
+        with self._lock:
+            for entry in entries:
+                key = policy_entry_key(entry)
+                if key in self._pending:
+                    self._add(key[2], self._committed.get(key, 0) - self._pending.pop(key))
+
+    def stats(self):
+        """
+        Returns the decision counters and the minPRB reserved on every cell.
+
+        Returns:
+            dict: Admission metrics.
+        """
+        with self._lock:
+            stats = {"mode": self.mode, "cell_capacity": self.cell_capacity,
+                     "cells": dict(self._reserved), "pending": len(self._pending)}
+            stats.update(self._counters)
+        return stats
+
+    def _effective(self, key):
+        pending = self._pending.get(key)
+        return pending if pending is not None else self._committed.get(key, 0)
+
+    def _add(self, nci, delta):
+        if delta:
+            self._reserved[nci] = self._reserved.get(nci, 0) + delta
+
+    def _reserve(self, key, min_prb):
+        current = self._effective(key)
+        if min_prb != current:
+            self._pending[key] = min_prb
+            self._add(key[2], min_prb - current)
+
+    def _group(self, entries):
+        # nci -> [minPRB released by replaced reservations, minPRB requested, (key, entry, minPRB)]
+        cells = {}
+        for entry in entries:
+            key = policy_entry_key(entry)
+            min_prb = _min_prb(entry)
+            cell = cells.setdefault(key[2], [0, 0, []])
+            cell[0] += self._effective(key)
+            cell[1] += min_prb
+            cell[2].append((key, entry, min_prb))
+        return cells
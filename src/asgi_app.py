@@ -0,0 +1,396 @@
+import asyncio
+import contextlib
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import aiohttp
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+import metrics
+from descriptor_parser import extract_descriptor, JSONError
+from http_client import DEFAULT_HTTP_CLIENT_CONFIG
+from log_utils import LazyJSON
+from pms_scheduler import PMSOverloaded
+from policy_journal import JournalReplay
+from rApp_NASP import NASPPolicy, policy_status_code
+from reconciler import PolicyReconciler
+
+# Defaults applied to the asgi settings of the 'api_server' section.
+DEFAULT_ASGI_CONFIG = {
+    'blocking_threads': 32,     # Threads per pool running the blocking calls of requests
+}
+
+
+def is_json_mimetype(content_type):
+    """
+    Returns whether a Content-Type header denotes JSON, as Flask's request.is_json does.
+
+    Args:
+        content_type (str): The Content-Type header, possibly with parameters.
+
+    Returns:
+        bool: True for application/json and application/*+json.
+    """
+    mimetype = content_type.split(";", 1)[0].strip().lower()
+    return mimetype == "application/json" or (mimetype.startswith("application/") and mimetype.endswith("+json"))
+
+
+class AsyncNASPPolicy(NASPPolicy):
+    """
+    A NASPPolicy that sends policy PUTs from an asyncio event loop with aiohttp.
+
+    Policies are admitted, built, validated and recorded by the NASPPolicy
+    code; only the PMS round trips are awaited instead of blocking a thread.
+    Work that runs in its own threads (the reconciler, the journal replay and
+    the PMS scheduler) keeps using the blocking session.
+
+    The calls of a request that block run on two pools of
+    api_server.blocking_threads threads of their own, so they neither stall
+    the event loop nor take the threads of the loop's default executor, which
+    aiohttp uses to resolve host names. Building the policies, which waits for
+    the journal writer and for policies leased by other requests, and sending
+    them through the PMS scheduler use separate pools: a request holding a
+    lease always finds a thread to send its policy, however many requests
+    wait for that lease. Requests beyond the pool size wait for a free thread.
+
+    Attributes:
+        http_config (dict): The 'http_client' settings, with defaults applied.
+        client (aiohttp.ClientSession): Session for the PMS PUTs, created by open() on the event loop.
+        prepare_executor (concurrent.futures.ThreadPoolExecutor): Threads building and journaling policies.
+        send_executor (concurrent.futures.ThreadPoolExecutor): Threads sending policies through the PMS scheduler.
+    """
+
+    def __init__(self, config, logger, session=None):
+        """
+        Initializes the policy handler. The aiohttp session is created by open().
+
+        Args:
+            config (dict): Configuration settings.
+            logger (logging.Logger): Configured logger.
+            session (requests.Session, optional): Blocking session for the background threads.
+        """
+        super().__init__(config, logger, session)
+        self.http_config = dict(DEFAULT_HTTP_CLIENT_CONFIG)
+        self.http_config.update(config.get('http_client') or {})
+        self.client = None
+        asgi_config = dict(DEFAULT_ASGI_CONFIG)
+        asgi_config.update({key: value for key, value in (config.get('api_server') or {}).items()
+                            if key in DEFAULT_ASGI_CONFIG})
+        threads = int(asgi_config['blocking_threads'])
+        self.prepare_executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi-prepare")
+        self.send_executor = ThreadPoolExecutor(max_workers=threads, thread_name_prefix="asgi-send")
+
+    async def open(self):
+        """
+        Creates the aiohttp session; must run on the event loop that serves the requests.
+        """
+        http_config = self.http_config
+        # Without pool_block, requests opens extra connections beyond pool_maxsize instead of waiting
+        connector = aiohttp.TCPConnector(
+            limit=0, limit_per_host=int(http_config['pool_maxsize']) if http_config['pool_block'] else 0,
+            force_close=not http_config['keep_alive'], ssl=False)
+        timeout = aiohttp.ClientTimeout(sock_connect=float(http_config['connect_timeout']),
+                                        sock_read=float(http_config['read_timeout']))
+        self.client = aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+    async def close(self):
+        """
+        Closes the aiohttp session and stops the blocking threads.
+        """
+        if self.client is not None:
+            await self.client.close()
+            self.client = None
+        self.prepare_executor.shutdown(wait=False)
+        self.send_executor.shutdown(wait=False)
+
+    @staticmethod
+    async def run_blocking(executor, function, *args):
+        """
+        Runs a blocking call on one of the blocking thread pools, off the event loop.
+
+        Args:
+            executor (concurrent.futures.Executor): The pool.
+            function (callable): The blocking function.
+            *args: Its arguments.
+
+        Returns:
+            The result of the function.
+        """
+        return await asyncio.get_running_loop().run_in_executor(executor, function, *args)
+
+    async def aput_policy_status(self, body):
+        """
+        Sends a PUT request to create a policy and returns the PMS response status.
+
+        Connection errors and the http_client.retry_status codes are retried
+        http_client.retries times with the same backoff as the blocking session.
+
+        Args:
+            body (dict): The JSON body of the request.
+
+        Returns:
+            int or None: The HTTP status code, or None if no response was received.
+        """
+        complete_url = self.pms_url(body.get("ric_id")) + "/policies"
+        headers = {"content-type": "application/json"}
+        retries = int(self.http_config['retries'])
+        self.logger.debug("Sending PUT request to %s with body: %s", complete_url, LazyJSON(body))
+        for attempt in range(retries + 1):
+            if attempt > 1:
+                await asyncio.sleep(float(self.http_config['backoff_factor']) * 2 ** (attempt - 1))
+            try:
+                with metrics.PUT_POLICY_SECONDS.time():
+                    async with self.client.put(complete_url, json=body, headers=headers) as resp:
+                        await resp.read()
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt < retries:
+                    continue
+                metrics.PMS_RESPONSES.labels('error').inc()
+                self.logger.error("Failed to create policy. Error: %s", e)
+                return None
+            if resp.status in self.http_config['retry_status'] and attempt < retries:
+                continue
+            metrics.PMS_RESPONSES.labels(str(resp.status)).inc()
+            if resp.status >= 400:
+                self.logger.error("Failed to create policy. Error: %s %s for url: %s",
+                                  resp.status, resp.reason, complete_url)
+            else:
+                self.logger.info("Policy created successfully.")
+            return resp.status
+
+    async def asend_policy(self, body):
+        """
+        Sends a policy to the PMS, through the PMS scheduler when enabled.
+
+        Args:
+            body (dict): The policy body.
+
+        Returns:
+            dict or None: The body applied on the RIC, or None if the PUT failed.
+
+        Raises:
+            PMSOverloaded: If the scheduler shed the PUT.
+        """
+        if self.scheduler is None:
+            status = await self.aput_policy_status(body)
+            return body if status is not None and status < 400 else None
+        # The scheduler paces PUTs with blocking waits, so it runs on a blocking thread
+        return await self.run_blocking(self.send_executor, self.scheduler.submit, body)
+
+    async def asubmit_policy(self, body):
+        """
+        Sends a policy to the PMS and records the outcome in the policy store.
+
+        Args:
+            body (dict): The policy body built by build_policies.
+
+        Returns:
+            bool: True if the policy is created successfully, False otherwise.
+
+        Raises:
+            PMSOverloaded: If the PMS scheduler shed the PUT; the policy is discarded.
+        """
+        try:
+            sent = await self.asend_policy(body)
+        except Exception:
+            self.discard_policy(body)
+            raise
+        return self.record_outcome(body, sent)
+
+    async def asubmit_policies(self, policies):
+        """
+        Sends the changed policies to the PMS, the policies of every RIC in order and the RICs at the same time.
+
+        Args:
+            policies (list): (policy body, changed) pairs built by build_policies.
+
+        Returns:
+            dict: Per ric_id, a result with status, reason and either the policy_ids or a message.
+        """
+        groups = {}
+        for policy, changed in policies:
+            groups.setdefault(policy["ric_id"], []).append((policy, changed))
+        with metrics.DISPATCH_SECONDS.time():
+            results = await asyncio.gather(*(self._asubmit_ric_policies(group) for group in groups.values()))
+        return dict(zip(groups, results))
+
+    async def _asubmit_ric_policies(self, policies):
+        for position, (policy, changed) in enumerate(policies):
+            if not changed:
+                continue
+            try:
+                if await self.asubmit_policy(policy):
+                    continue
+                shed = None
+            except PMSOverloaded as e:
+                shed = e
+            except Exception:
+                # The remaining policies must still be discarded, or they keep their leases and reservations
+                self.logger.exception("Failed to send policy %s.", policy["policy_id"])
+                shed = None
+            return self.fail_ric_policies(policies, position, shed)
+        return self.ric_success_result(policies)
+
+    async def acreate_policy(self, policy_data):
+        """
+        Creates and posts a policy based on provided policy data, as NASPPolicy.create_policy does.
+
+        Requests are not coalesced by the PMS scheduler: a request waiting for
+        another one would hold a blocking thread, which the ones it waits for need.
+
+        Args:
+            policy_data (dict): Data containing RRMPolicyRatioList.
+
+        Returns:
+            dict: Result message with status, and a machine-readable 'reason' for metrics.
+        """
+        if self.journal is None and self.policy_store is None:
+            policies, result = self.prepare_policies(policy_data)
+        else:
+            # Waits for the journal writer thread and for policies leased by other requests happen off the loop
+            policies, result = await self.run_blocking(self.prepare_executor, self.prepare_policies, policy_data)
+        if result is not None:
+            return result
+        return self.policy_result(await self.asubmit_policies(policies))
+
+
+def create_asgi_app(config, logger, registration=None):
+    """
+    Creates the ASGI application, an asyncio alternative to the Flask application of create_app.
+
+    Serves /create_slice_policy with the same request and response contract,
+    and /healthz, /readyz and /metrics. Policies are always sent before the
+    response: the policy queue does not apply, since a waiting request only
+    holds a coroutine rather than a thread.
+
+    Args:
+        config (dict): Configuration settings.
+        logger (logging.Logger): Configured logger.
+        registration (CatalogueRegistration, optional): rApp catalogue registration reported by /readyz.
+
+    Returns:
+        starlette.applications.Starlette: Configured ASGI application.
+    """
+    nasp_policy = AsyncNASPPolicy(config, logger)
+    if (config.get('policy_queue') or {}).get('enabled'):
+        logger.warning("The policy queue is not used by the asgi server; policies are sent before answering.")
+
+    # Replays the policies a previous run journaled but did not apply; /readyz answers 503 until done
+    journal_replay = None
+    if nasp_policy.journal is not None:
+        journal_replay = JournalReplay(nasp_policy.journal, nasp_policy.replay_journal)
+
+    reconciler = PolicyReconciler.from_config(config, nasp_policy)
+    stream_descriptors = bool(config.get('api_server', {}).get('stream_descriptors', False))
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app):
+        await nasp_policy.open()
+        if journal_replay is not None:
+            journal_replay.start()
+        if reconciler is not None:
+            reconciler.start()
+        try:
+            yield
+        finally:
+            if reconciler is not None:
+                reconciler.stop()
+            await nasp_policy.close()
+
+    async def healthz(request):
+        """
+        Liveness endpoint: the process is up and serving requests.
+        """
+        return JSONResponse({"status": "ok"})
+
+    async def readyz(request):
+        """
+        Readiness endpoint reporting the journal replay and the rApp catalogue registration.
+        """
+        ready = True
+        body = {}
+        if journal_replay is not None:
+            ready = journal_replay.done
+            body["journal_replay"] = "done" if ready else "in_progress"
+        if registration is not None:
+            ready = ready and registration.ready
+            body["registration"] = registration.status()
+        body["status"] = "ready" if ready else "not_ready"
+        return JSONResponse(body, status_code=200 if ready else 503)
+
+    async def metrics_endpoint(request):
+        """
+        API endpoint exposing Prometheus metrics.
+        """
+        payload, content_type = metrics.render_metrics()
+        return Response(payload, media_type=content_type)
+
+    async def create_slice_policy(request):
+        """
+        API endpoint to create and post a policy based on received JSON data.
+
+        Returns:
+            JSON response indicating success or failure, with the status codes of the Flask endpoint.
+        """
+        if not is_json_mimetype(request.headers.get("content-type", "")):
+            logger.warning("Received non-JSON request.")
+            metrics.count_request('create_slice_policy', 'failure', 'not_json')
+            return JSONResponse({"status": "failure", "message": "Request must be in JSON format."}, status_code=400)
+
+        payload = await request.body()
+        with metrics.PARSE_SECONDS.time():
+            try:
+                if stream_descriptors:
+                    data = extract_descriptor(io.BytesIO(payload))
+                else:
+                    data = json.loads(payload)
+            except (JSONError, ValueError) as e:
+                logger.warning("Received malformed JSON: %s", e)
+                metrics.count_request('create_slice_policy', 'failure', 'invalid_json')
+                return JSONResponse({"status": "failure", "message": "Malformed JSON."}, status_code=400)
+        logger.debug("Received data: %s", LazyJSON(data))
+        with metrics.CREATE_RRM_POLICY_SECONDS.time():
+            policy_data = nasp_policy.build_rrm_policy(data) if isinstance(data, dict) else None
+        if not policy_data or not policy_data.get("RRMPolicyRatioList"):
+            logger.error("Failed to create policy data from the request.")
+            metrics.count_request('create_slice_policy', 'failure', 'invalid_policy_data')
+            return JSONResponse({"status": "failure", "message": "Invalid policy data."}, status_code=400)
+
+        error = nasp_policy.validate_policy(policy_data)
+        if error is not None:
+            logger.warning("Policy data does not match the policy type schema: %s", error)
+            metrics.count_request('create_slice_policy', 'failure', 'schema_mismatch')
+            return JSONResponse({"status": "failure", "message": f"Invalid policy data: {error}"}, status_code=400)
+
+        logger.debug("Created policy data: %s", LazyJSON(policy_data))
+        result = await nasp_policy.acreate_policy(policy_data)
+        reason = result.pop("reason")
+        metrics.count_request('create_slice_policy', result["status"], reason)
+        status_code = policy_status_code(result["status"], reason)
+        headers = {"Retry-After": "1"} if status_code == 503 else None
+        return JSONResponse(result, status_code=status_code, headers=headers)
+
+    routes = [
+        Route('/healthz', healthz, methods=['GET']),
+        Route('/readyz', readyz, methods=['GET']),
+        Route('/metrics', metrics_endpoint, methods=['GET']),
+        Route('/create_slice_policy', create_slice_policy, methods=['POST']),
+    ]
+    return Starlette(routes=routes, lifespan=lifespan)
+
+
+def run_uvicorn(app, api_config):
+    """
+    Serves the ASGI application with uvicorn in a single process, using the 'api_server' configuration section.
+
+    Args:
+        app (starlette.applications.Starlette): The application.
+        api_config (dict): The 'api_server' configuration section.
+    """
+    import uvicorn
+
+    uvicorn.run(app, host=api_config.get('host', '0.0.0.0'), port=api_config.get('port', 5000),
+                timeout_keep_alive=int(api_config.get('keepalive', 5)), access_log=False, log_config=None)
@@ -0,0 +1,169 @@
+from dataclasses import dataclass, fields, replace
+from functools import lru_cache
+from math import ceil
+
+from tools import to_bps
+
+
+@dataclass(frozen=True)
+class CapacityProfile:
+    """
+    Radio configuration of a cell, used to convert bit rates into PRB percentages.
+
+    The defaults reproduce the FDD, MCS 28, numerology 1, 50 MHz cell that
+    create_rrm_policy assumes when no profile is configured.
+    """
+    mcs: int = 28
+    numerology: int = 1
+    bandwidth: int = 50
+    mcs_table: int = 0
+    mimo: int = 1
+    uplink_mcs: int = None      # Defaults to mcs
+    uplink_mimo: int = 1
+    scaling_factor: float = 1.0
+    symbol_format: int = 5
+    is_tdd: bool = False
+    use_flex_sym: bool = True
+
+    def bps(self, is_uplink=False):
+        """
+        Returns the maximum cell throughput (in bps) in the given direction. Memoized per profile.
+        """
+        return _profile_bps(self, bool(is_uplink))
+
+    def prb(self, speed, is_uplink=False):
+        """
+        Returns the minimum percentage of PRBs needed for speed (in bps), as tools.to_prb does.
+        """
+        total_speed = self.bps(is_uplink)
+        if total_speed == 0.0:
+            return 0
+        return ceil((speed / total_speed) * 100.0)
+
+
+@lru_cache(maxsize=None)
+def _profile_bps(profile, is_uplink):
+    return to_bps(
+        is_uplink,
+        profile.uplink_mcs if is_uplink and profile.uplink_mcs is not None else profile.mcs,
+        profile.numerology,
+        profile.bandwidth,
+        scaling_factor=profile.scaling_factor,
+        mimo=profile.uplink_mimo if is_uplink else profile.mimo,
+        symbol_format=profile.symbol_format,
+        is_tdd=profile.is_tdd,
+        use_flex_sym=profile.use_flex_sym,
+        mcs_table=profile.mcs_table,
+    )
+
+
+PROFILE_FIELDS = frozenset(field.name for field in fields(CapacityProfile))
+
+
+def _build_profile(base, overrides, name, uplink=False):
+    overrides = overrides or {}
+    unknown = set(overrides) - PROFILE_FIELDS
+    if unknown:
+        raise ValueError(f"Unknown capacity profile fields for {name}: {', '.join(sorted(unknown))}")
+    profile = replace(base, **overrides)
+    # Fail at load time on combinations missing from the 3GPP tables
+    try:
+        downlink_bps = profile.bps(False)
+        uplink_bps = profile.bps(True)
+    except (IndexError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid capacity profile for {name}: {e!r}") from e
+    # A cell without capacity in a direction in use would get 0% PRB for any bit rate
+    if downlink_bps <= 0:
+        raise ValueError(f"Invalid capacity profile for {name}: no downlink capacity")
+    if uplink and uplink_bps <= 0:
+        raise ValueError(f"Invalid capacity profile for {name}: no uplink capacity, e.g. a TDD symbol_format "
+                         "without uplink symbols")
+    return profile
+
+
+class CapacityProfileRegistry:
+    """
+    Capacity profiles keyed by NR cell identity (nci), with a default profile for other cells.
+
+    Attributes:
+        default (CapacityProfile): Profile used for cells without their own entry.
+        uplink (bool): Whether uplink PRB quotas are computed in addition to downlink ones.
+        version (int): Incremented on every profile change, so derived caches can be invalidated.
+    """
+
+    def __init__(self, default=None, cells=None, uplink=False):
+        """
+        Initializes the registry.
+
+        Args:
+            default (CapacityProfile, optional): Default profile.
+            cells (dict, optional): Mapping of nci to CapacityProfile.
+            uplink (bool): Compute uplink PRB quotas as well.
+        """
+        self.default = default or CapacityProfile()
+        self.uplink = uplink
+        self.version = 0
+        self._cells = {str(nci): profile for nci, profile in (cells or {}).items()}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a registry from the 'capacity' configuration section.
+
+        Cell profiles inherit every field they do not set from the default profile.
+
+        Args:
+            config (dict): Configuration settings.
+
+        Returns:
+            CapacityProfileRegistry: The registry.
+
+        Raises:
+            ValueError: If a profile has unknown fields, an invalid radio configuration, or no
+                capacity in a direction PRB quotas are computed for.
+        """
+        capacity_config = config.get('capacity') or {}
+        uplink = bool(capacity_config.get('uplink', False))
+        default = _build_profile(CapacityProfile(), capacity_config.get('default'), 'default', uplink)
+        cells = {
+            nci: _build_profile(default, overrides, f"nci {nci}", uplink)
+            for nci, overrides in (capacity_config.get('cells') or {}).items()
+        }
+        return cls(default, cells, uplink)
+
+    def profile(self, nci):
+        """
+        Returns the capacity profile of a cell.
+
+        Args:
+            nci: NR cell identity.
+
+        Returns:
+            CapacityProfile: The cell profile, or the default profile.
+        """
+        return self._cells.get(str(nci), self.default)
+
+    def set_profile(self, nci, profile):
+        """
+        Sets or replaces the capacity profile of a cell.
+
+        Args:
+            nci: NR cell identity.
+            profile (CapacityProfile): The new profile.
+        """
+        self._cells[str(nci)] = profile
+        self.version += 1
+
+    def prb(self, nci, speed, is_uplink=False):
+        """
+        Returns the PRB percentage a cell needs to carry speed (in bps).
+
+        Args:
+            nci: NR cell identity.
+            speed (float): Bit rate in bps.
+            is_uplink (bool): Direction.
+
+        Returns:
+            int: PRB percentage.
+        """
+        return self.profile(nci).prb(speed, is_uplink)
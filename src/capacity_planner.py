@@ -0,0 +1,571 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from itertools import product
+from multiprocessing import Pool
+
+import numpy as np
+from numpy.lib import format as npy_format
+
+from tools import to_bps_batch, to_prb_batch
+
+# Sweep dimensions in output order; the last one varies fastest. Every
+# dimension defaults to the cell that create_rrm_policy assumes when no
+# capacity profile is configured.
+GRID_DIMENSIONS = {
+    'mcs_table': ('<i2', [0]),
+    'mcs': ('<i2', [28]),
+    'numerology': ('<i2', [1]),
+    'bandwidth': ('<i4', [50]),
+    'symbol_format': ('<i2', [5]),
+    'mimo': ('<i2', [1]),
+    'is_tdd': ('|b1', [False]),
+}
+
+# SSQ bit rates read from every descriptor, per output column
+PRB_COLUMNS = {
+    'minPRB': ('Guaranteed Flow Bit Rate - Downlink', False),
+    'maxPRB': ('Max Flow Bit Rate - Downlink', False),
+}
+UPLINK_PRB_COLUMNS = {
+    'minPRBUplink': ('Guaranteed Flow Bit Rate - Uplink', True),
+    'maxPRBUplink': ('Max Flow Bit Rate - Uplink', True),
+}
+PRB_DTYPE = '<i4'
+# PRB value of a direction without capacity at a grid point, e.g. the uplink
+# of a TDD symbol format without uplink symbols
+NO_CAPACITY = -1
+
+
+def parse_arguments(argv=None):
+    """
+    Parses the command line of the capacity planner.
+
+    Args:
+        argv (list, optional): Arguments; defaults to sys.argv.
+
+    Returns:
+        argparse.Namespace: Parsed arguments.
+    """
+    parser = argparse.ArgumentParser(
+        description='Computes minPRB/maxPRB of NASP descriptors for every cell configuration of a grid.')
+    parser.add_argument('descriptors', type=str, help='NDJSON file with one NASP descriptor per line.')
+    parser.add_argument('-o', '--output', type=str, default='-',
+                        help="CSV file ('-' for stdout), or directory of .npy columns with --format npy.")
+    parser.add_argument('--format', choices=('csv', 'npy'), default='csv', help='Output format.')
+    for dimension in ('mcs_table', 'mcs', 'numerology', 'bandwidth', 'symbol_format', 'mimo'):
+        parser.add_argument('--' + dimension.replace('_', '-'), type=str, nargs='+', metavar='VALUES',
+                            help=f"{dimension} values: integers, 'a-b' ranges or comma-separated lists "
+                                 f"(default: {GRID_DIMENSIONS[dimension][1][0]}).")
+    parser.add_argument('--duplex', choices=('fdd', 'tdd'), nargs='+', default=['fdd'],
+                        help='Duplex modes; symbol_format only applies to TDD.')
+    parser.add_argument('--uplink', action='store_true', help='Also compute minPRBUplink/maxPRBUplink.')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(),
+                        help='Worker processes; 1 computes in this process.')
+    parser.add_argument('--chunk-rows', type=int, default=65536, help='Rows computed per task.')
+    return parser.parse_args(argv)
+
+
+def parse_values(items):
+    """
+    Expands grid values given on the command line.
+
+    Args:
+        items (list): Strings holding integers, inclusive 'a-b' ranges or comma-separated lists of both.
+
+    Returns:
+        list: The integers, without duplicates, in the order given.
+
+    Raises:
+        ValueError: If an item is not an integer or a range.
+    """
+    values = []
+    for item in items:
+        for part in item.split(','):
+            start, sep, stop = part.strip().partition('-')
+            if sep and start:
+                values.extend(range(int(start), int(stop) + 1))
+            else:
+                values.append(int(part))
+    return list(dict.fromkeys(values))
+
+
+def descriptor_rates(descriptor, index):
+    """
+    Extracts the fields of a NASP descriptor the planner reads: name, cell and SSQ bit rates.
+
+    Args:
+        descriptor (dict): NASP slice descriptor.
+        index (int): Position of the descriptor in the input.
+
+    Returns:
+        tuple: (index, name, nci, rates), rates being the bit rates of the PRB columns in order.
+    """
+    description = descriptor.get("description", {})
+    ssq = description.get("Slice Attributes", {}).get("SSQ", {})
+    nci = ""
+    for nf in description.get("resource_description", {}).get("ran", {}).get("nfs", []):
+        if nf.get("name") == "ueransim":
+            nci = nf.get("config", {}).get("nci", "")
+            break
+    rates = tuple(float(ssq.get(field, 0)) for field, _ in (*PRB_COLUMNS.values(), *UPLINK_PRB_COLUMNS.values()))
+    return index, descriptor.get("name", ""), nci, rates
+
+
+def read_descriptors(path):
+    """
+    Reads an NDJSON file of NASP descriptors one line at a time.
+
+    Args:
+        path (str): File path.
+
+    Yields:
+        tuple: The fields returned by descriptor_rates, for every non-blank line.
+
+    Raises:
+        ValueError: If a line is not a JSON object.
+    """
+    index = 0
+    with open(path, 'rb') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                descriptor = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f"{path}:{line_number}: malformed JSON: {e}") from e
+            if not isinstance(descriptor, dict):
+                raise ValueError(f"{path}:{line_number}: expected a JSON object")
+            yield descriptor_rates(descriptor, index)
+            index += 1
+
+
+class CapacityGrid:
+    """
+    Cartesian product of cell configurations, enumerated in chunks without being materialized.
+
+    Attributes:
+        values (dict): Values of every dimension, in GRID_DIMENSIONS order.
+        shape (tuple): Number of values per dimension.
+        size (int): Number of grid points.
+    """
+
+    def __init__(self, values):
+        """
+        Initializes the grid.
+
+        Args:
+            values (dict): Values per dimension; missing dimensions take their default value.
+        """
+        self.values = {dimension: np.asarray(values.get(dimension) or default, dtype=dtype)
+                       for dimension, (dtype, default) in GRID_DIMENSIONS.items()}
+        self.shape = tuple(len(column) for column in self.values.values())
+        self.size = int(np.prod(self.shape))
+
+    def points(self, start, stop):
+        """
+        Returns the grid points with flat indices in [start, stop) that exist in the 3GPP tables.
+
+        Points whose MCS, numerology, bandwidth or symbol format is missing from
+        the tables, or without downlink capacity, are left out. FDD ignores the
+        symbol format, so FDD points are only kept for the first symbol_format
+        value of the grid.
+
+        Args:
+            start (int): First flat index.
+            stop (int): Flat index after the last one.
+
+        Returns:
+            dict: Array of values per dimension, and of flat indices under 'index'.
+        """
+        flat = np.arange(start, stop, dtype=np.int64)
+        indices = np.unravel_index(flat, self.shape)
+        points = {dimension: column[index] for (dimension, column), index in zip(self.values.items(), indices)}
+        points['index'] = flat
+        _, valid = to_bps_batch(False, points['mcs'], points['numerology'], points['bandwidth'],
+                                mimo=points['mimo'], symbol_format=points['symbol_format'],
+                                is_tdd=points['is_tdd'], mcs_table=points['mcs_table'])
+        valid &= points['is_tdd'] | (points['symbol_format'] == self.values['symbol_format'][0])
+        return {dimension: column[valid] for dimension, column in points.items()}
+
+    def chunks(self, chunk_size):
+        """
+        Splits the flat indices of the grid into ranges.
+
+        Args:
+            chunk_size (int): Maximum number of grid points per range.
+
+        Returns:
+            list: (start, stop) pairs covering the grid.
+        """
+        return [(start, min(start + chunk_size, self.size)) for start in range(0, self.size, chunk_size)]
+
+
+def plan_tasks(grid, descriptors, chunk_rows):
+    """
+    Groups descriptors and grid ranges into tasks of about chunk_rows rows.
+
+    Small grids are computed whole for several descriptors per task; large
+    grids are split into ranges, one descriptor per task. Either way the rows
+    of a task follow the rows of the previous one in the output.
+
+    Args:
+        grid (CapacityGrid): The grid.
+        descriptors (iterable): Descriptor fields from read_descriptors.
+        chunk_rows (int): Rows per task.
+
+    Yields:
+        tuple: (descriptors, chunk index, start, stop).
+    """
+    if grid.size <= chunk_rows:
+        per_task = max(chunk_rows // grid.size, 1)
+        block = []
+        for descriptor in descriptors:
+            block.append(descriptor)
+            if len(block) == per_task:
+                yield block, 0, 0, grid.size
+                block = []
+        if block:
+            yield block, 0, 0, grid.size
+    else:
+        chunks = grid.chunks(chunk_rows)
+        for descriptor in descriptors:
+            for chunk_index, (start, stop) in enumerate(chunks):
+                yield [descriptor], chunk_index, start, stop
+
+
+def compute_prbs(descriptors, points, uplink=False):
+    """
+    Computes the PRB columns of every descriptor at every grid point.
+
+    Args:
+        descriptors (list): Descriptor fields from read_descriptors.
+        points (dict): Grid points from CapacityGrid.points.
+        uplink (bool): Also compute the uplink columns.
+
+    Returns:
+        dict: Per PRB column, an array with one row per descriptor and one column per grid point,
+        holding NO_CAPACITY where the direction of the column has no capacity.
+    """
+    columns = dict(PRB_COLUMNS, **(UPLINK_PRB_COLUMNS if uplink else {}))
+    rates = np.array([rates[:len(columns)] for _, _, _, rates in descriptors], dtype=np.float64)
+    prbs = {}
+    for is_uplink in (False, True):
+        names = [name for name, (_, direction) in columns.items() if direction == is_uplink]
+        if not names:
+            continue
+        positions = [list(columns).index(name) for name in names]
+        # One call per direction for every descriptor and rate: (rates, 1) against (1, points)
+        speeds = rates[:, positions].T.reshape(-1, 1)
+        prb, valid = to_prb_batch(speeds, is_uplink, points['mcs'], points['numerology'], points['bandwidth'],
+                              mimo=points['mimo'], symbol_format=points['symbol_format'],
+                              is_tdd=points['is_tdd'], mcs_table=points['mcs_table'])
+        prb = np.where(valid, prb, NO_CAPACITY).reshape(len(names), len(descriptors), -1)
+        for name, values in zip(names, prb):
+            prbs[name] = values.astype(PRB_DTYPE)
+    return prbs
+
+
+def _csv_field(value):
+    text = str(value)
+    if any(char in text for char in ',"\n\r'):
+        return '"' + text.replace('"', '""') + '"'
+    return text
+
+
+class CSVOutput:
+    """
+    Writes the rows as CSV, one line per descriptor and grid point.
+
+    Attributes:
+        path (str): File path, or '-' for stdout.
+        uplink (bool): Whether the uplink columns are written.
+    """
+
+    def __init__(self, path, uplink=False):
+        self.path = path
+        self.uplink = uplink
+        self._file = None
+        self._inner_size = None
+        self._inner_text = None
+        self._outer_text = None
+        self._grid_key = None
+        self._grid_text = None
+
+    def columns(self):
+        prb_columns = list(PRB_COLUMNS) + (list(UPLINK_PRB_COLUMNS) if self.uplink else [])
+        return ['descriptor', 'name', 'nci'] + list(GRID_DIMENSIONS) + prb_columns
+
+    def __getstate__(self):
+        # Workers only format rows
+        return dict(self.__dict__, _file=None)
+
+    def open(self, grid, descriptor_path, chunk_rows):
+        # The text of a point joins the text of its outer and inner dimensions,
+        # formatted once here for the last dimensions spanning at most chunk_rows points
+        texts = [[('true' if value else 'false') if column.dtype == bool else str(value)
+                  for value in column.tolist()] for column in grid.values.values()]
+        split = len(texts)
+        self._inner_size = 1
+        while split > 0 and self._inner_size * len(texts[split - 1]) <= max(chunk_rows, 1):
+            split -= 1
+            self._inner_size *= len(texts[split])
+        self._inner_text = [','.join(row) for row in product(*texts[split:])]
+        self._outer_text = [','.join(row) + ',' for row in product(*texts[:split])] if split else ['']
+        self._file = sys.stdout.buffer if self.path == '-' else open(self.path, 'wb')
+        self._file.write((','.join(self.columns()) + '\n').encode())
+
+    def encode(self, descriptors, key, points, prbs):
+        """
+        Formats the rows of a task. Runs in the worker processes.
+
+        Returns:
+            bytes: The CSV lines.
+        """
+        if key != self._grid_key:
+            # Consecutive tasks of a small grid share their points; format them once
+            outer, inner = np.divmod(points['index'], self._inner_size)
+            self._grid_text = list(map(str.__add__, map(self._outer_text.__getitem__, outer.tolist()),
+                                       map(self._inner_text.__getitem__, inner.tolist())))
+            self._grid_key = key
+        parts = []
+        for row, (index, name, nci, _) in enumerate(descriptors):
+            prefix = f"{index},{_csv_field(name)},{_csv_field(nci)},".replace('%', '%%')
+            line = (prefix + '%s' + ',%d' * len(prbs) + '\n').__mod__
+            parts.append(''.join(map(line, zip(self._grid_text, *(column[row].tolist() for column in prbs.values())))))
+        return ''.join(parts).encode()
+
+    def describe(self, descriptors):
+        pass
+
+    def write(self, result):
+        self._file.write(result)
+
+    def close(self):
+        if self._file is sys.stdout.buffer:
+            self._file.flush()
+        elif self._file is not None:
+            self._file.close()
+
+
+class NpyOutput:
+    """
+    Writes every column to its own .npy file in a directory, plus descriptors.csv.
+
+    The column files hold one element per row, in the row order of the CSV
+    output; numpy.load(path, mmap_mode='r') reads them without loading them
+    whole. descriptors.csv maps the 'descriptor' column to the descriptor
+    name, cell and SSQ bit rates. Workers write their rows in place, so the
+    number of rows is computed before any task runs.
+
+    Attributes:
+        path (str): Output directory.
+        uplink (bool): Whether the uplink columns are written.
+    """
+
+    def __init__(self, path, uplink=False):
+        self.path = path
+        self.uplink = uplink
+        self.chunk_offsets = None
+        self.points_per_descriptor = None
+        self._offsets = {}
+        self._fds = {}
+        self._descriptors = None
+
+    def __getstate__(self):
+        # Workers open their own descriptors of the column files
+        return dict(self.__dict__, _fds={}, _descriptors=None)
+
+    def dtypes(self):
+        prb_columns = list(PRB_COLUMNS) + (list(UPLINK_PRB_COLUMNS) if self.uplink else [])
+        return {'descriptor': np.dtype('<i8'),
+                **{dimension: np.dtype(dtype) for dimension, (dtype, _) in GRID_DIMENSIONS.items()},
+                **{column: np.dtype(PRB_DTYPE) for column in prb_columns}}
+
+    def open(self, grid, descriptor_path, chunk_rows):
+        # Valid points before every chunk of a grid split across tasks
+        self.chunk_offsets = [0]
+        for start, stop in grid.chunks(chunk_rows):
+            self.chunk_offsets.append(self.chunk_offsets[-1] + len(grid.points(start, stop)['mcs']))
+        self.points_per_descriptor = self.chunk_offsets[-1]
+        rows = sum(1 for _ in read_descriptors(descriptor_path)) * self.points_per_descriptor
+        os.makedirs(self.path, exist_ok=True)
+        for column, dtype in self.dtypes().items():
+            with open(os.path.join(self.path, column + '.npy'), 'wb') as f:
+                npy_format.write_array_header_2_0(
+                    f, {'descr': npy_format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (rows,)})
+                self._offsets[column] = f.tell()
+                f.truncate(f.tell() + rows * dtype.itemsize)
+        self._descriptors = open(os.path.join(self.path, 'descriptors.csv'), 'w')
+        rate_columns = [*PRB_COLUMNS.values(), *UPLINK_PRB_COLUMNS.values()]
+        self._descriptors.write(','.join(['descriptor', 'name', 'nci'] + [_csv_field(field) for field, _ in
+                                                                             rate_columns]) + '\n')
+
+    def describe(self, descriptors):
+        for index, name, nci, rates in descriptors:
+            self._descriptors.write(f"{index},{_csv_field(name)},{_csv_field(nci)},"
+                                    f"{','.join(map(repr, rates))}\n")
+
+    def encode(self, descriptors, key, points, prbs):
+        """
+        Writes the rows of a task in place. Runs in the worker processes.
+
+        Returns:
+            int: Number of rows written.
+        """
+        chunk_index = key[0]
+        first = descriptors[0][0]
+        row = first * self.points_per_descriptor + self.chunk_offsets[chunk_index]
+        count = len(points['mcs'])
+        columns = {'descriptor': np.repeat(np.array([index for index, _, _, _ in descriptors]), count)}
+        columns.update({dimension: np.tile(points[dimension], len(descriptors)) for dimension in GRID_DIMENSIONS})
+        columns.update({column: values.reshape(-1) for column, values in prbs.items()})
+        for column, dtype in self.dtypes().items():
+            fd = self._fds.get(column)
+            if fd is None:
+                fd = self._fds[column] = os.open(os.path.join(self.path, column + '.npy'), os.O_WRONLY)
+            os.pwrite(fd, columns[column].astype(dtype, copy=False).tobytes(),
+                      self._offsets[column] + row * dtype.itemsize)
+        return count * len(descriptors)
+
+    def write(self, result):
+        pass
+
+    def close(self):
+        for fd in self._fds.values():
+            os.close(fd)
+        self._fds.clear()
+        if self._descriptors is not None:
+            self._descriptors.close()
+
+
+# Per-process state of the workers, set by _init_worker
+_worker = {}
+
+
+def _init_worker(grid, output, uplink):
+    _worker.update(grid=grid, output=output, uplink=uplink, key=None, points=None)
+
+
+def _run_task(task):
+    descriptors, chunk_index, start, stop = task
+    key = (chunk_index, start, stop)
+    if _worker['key'] != key:
+        _worker['points'] = _worker['grid'].points(start, stop)
+        _worker['key'] = key
+    points = _worker['points']
+    prbs = compute_prbs(descriptors, points, _worker['uplink'])
+    return _worker['output'].encode(descriptors, key, points, prbs), len(descriptors) * len(points['mcs'])
+
+
+def run_plan(grid, descriptor_path, output, uplink=False, workers=1, chunk_rows=65536):
+    """
+    Computes and writes the PRB columns of every descriptor at every grid point.
+
+    Tasks are sent to the workers as the descriptors are read, with at most
+    two tasks per worker waiting, and their results are written in order, so
+    memory does not grow with the grid or the number of descriptors.
+
+    Args:
+        grid (CapacityGrid): Cell configurations.
+        descriptor_path (str): NDJSON file of NASP descriptors.
+        output (CSVOutput or NpyOutput): Destination of the rows.
+        uplink (bool): Also compute the uplink columns.
+        workers (int): Worker processes; 1 computes in this process.
+        chunk_rows (int): Rows per task.
+
+    Returns:
+        int: Number of rows written.
+    """
+    output.open(grid, descriptor_path, chunk_rows)
+    tasks = _described(plan_tasks(grid, read_descriptors(descriptor_path), chunk_rows), output)
+    rows = 0
+    try:
+        if workers <= 1:
+            _init_worker(grid, output, uplink)
+            for task in tasks:
+                result, count = _run_task(task)
+                output.write(result)
+                rows += count
+        else:
+            with Pool(workers, initializer=_init_worker, initargs=(grid, output, uplink)) as pool:
+                # Pool.imap would read every task ahead of the workers; keep a bounded window instead
+                pending = deque()
+                for task in tasks:
+                    pending.append(pool.apply_async(_run_task, (task,)))
+                    if len(pending) >= 2 * workers:
+                        result, count = pending.popleft().get()
+                        output.write(result)
+                        rows += count
+                while pending:
+                    result, count = pending.popleft().get()
+                    output.write(result)
+                    rows += count
+                pool.close()
+                pool.join()
+    finally:
+        output.close()
+    return rows
+
+
+def _described(tasks, output):
+    for task in tasks:
+        descriptors, _, start, _ = task
+        if start == 0:
+            output.describe(descriptors)
+        yield task
+
+
+def main(argv=None):
+    """
+    Runs the capacity planner from the command line.
+
+    Args:
+        argv (list, optional): Arguments; defaults to sys.argv.
+
+    Returns:
+        int: Exit code, 2 for invalid arguments and 1 when the descriptors cannot be read.
+    """
+    args = parse_arguments(argv)
+    try:
+        values = {dimension: parse_values(getattr(args, dimension)) for dimension in GRID_DIMENSIONS
+                  if dimension != 'is_tdd' and getattr(args, dimension)}
+    except ValueError as e:
+        print(f"Invalid grid value: {e}", file=sys.stderr)
+        return 2
+    if args.chunk_rows < 1:
+        print("--chunk-rows must be positive", file=sys.stderr)
+        return 2
+    values['is_tdd'] = list(dict.fromkeys(duplex == 'tdd' for duplex in args.duplex))
+    grid = CapacityGrid(values)
+    try:
+        with open(args.descriptors, 'rb'):
+            pass
+    except OSError as e:
+        print(e, file=sys.stderr)
+        return 1
+    if args.format == 'npy':
+        if args.output == '-':
+            print("--format npy needs an output directory (-o)", file=sys.stderr)
+            return 2
+        output = NpyOutput(args.output, args.uplink)
+    else:
+        output = CSVOutput(args.output, args.uplink)
+
+    start = time.perf_counter()
+    try:
+        rows = run_plan(grid, args.descriptors, output, args.uplink, args.workers, args.chunk_rows)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - start
+    print(f"{rows} rows ({' x '.join(map(str, grid.shape))} = {grid.size} grid points) in {elapsed:.2f} s",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
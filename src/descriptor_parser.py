@@ -0,0 +1,123 @@
+import ijson
+from ijson import JSONError
+
+# Prefixes (in ijson notation) of the descriptor fields create_rrm_policy reads
+SSQ_PREFIX = "description.Slice Attributes.SSQ"
+CORE_NF_PREFIX = "description.resource_description.core.nfs.item"
+RAN_NF_PREFIX = "description.resource_description.ran.nfs.item"
+
+# Fields captured inside each network function
+CORE_NF_FIELDS = ("name", "config.plmnSupportList")
+RAN_NF_FIELDS = ("name", "config.mcc", "config.mnc", "config.nci", "config.slices")
+
+# Every prefix whose value is kept
+CAPTURED_PREFIXES = frozenset(
+    ["name", SSQ_PREFIX]
+    + [CORE_NF_PREFIX + "." + field for field in CORE_NF_FIELDS]
+    + [RAN_NF_PREFIX + "." + field for field in RAN_NF_FIELDS]
+)
+NF_PREFIXES = (CORE_NF_PREFIX, RAN_NF_PREFIX)
+
+VALUE_EVENTS = ("string", "number", "boolean", "null")
+
+
+class _Capture:
+    """
+    Builds the value found at one prefix from the parser events.
+    """
+
+    def __init__(self, prefix, event, value):
+        self.prefix = prefix
+        if event in VALUE_EVENTS:
+            self.builder = None
+            self.value = value
+            self.done = True
+        else:
+            self.builder = ijson.ObjectBuilder()
+            self.builder.event(event, value)
+            self.done = False
+
+    def feed(self, prefix, event, value):
+        self.builder.event(event, value)
+        if prefix == self.prefix and event in ("end_map", "end_array"):
+            self.value = self.builder.value
+            self.done = True
+
+
+def _set_path(target, path, value):
+    keys = path.split(".")
+    for key in keys[:-1]:
+        target = target.setdefault(key, {})
+    target[keys[-1]] = value
+
+
+def extract_descriptor(stream):
+    """
+    Extracts the fields used by create_rrm_policy from a NASP descriptor without loading it whole.
+
+    The descriptor is parsed incrementally and only the slice name, the SSQ,
+    the first amf network function (name and plmnSupportList) and the first
+    ueransim network function (name, mcc, mnc, nci and slices) are kept. Other
+    network functions and fields are discarded as they are read.
+
+    Args:
+        stream (file-like): Binary stream with the JSON descriptor.
+
+    Returns:
+        dict: A descriptor with the same structure as the input, reduced to the extracted fields.
+
+    Raises:
+        ijson.JSONError: If the stream is not valid JSON.
+    """
+    found = {}
+    amf = None
+    ueransim = None
+
+    capture = None
+    nf_kind = None
+    nf = None
+
+    def store(capture):
+        if capture.prefix in ("name", SSQ_PREFIX):
+            found[capture.prefix] = capture.value
+        else:
+            _set_path(nf, capture.prefix[len(nf_kind) + 1:], capture.value)
+
+    for prefix, event, value in ijson.parse(stream, use_float=True):
+        if capture is not None:
+            capture.feed(prefix, event, value)
+            if capture.done:
+                store(capture)
+                capture = None
+        elif prefix in CAPTURED_PREFIXES:
+            if event != "map_key" and event != "end_map" and event != "end_array":
+                capture = _Capture(prefix, event, value)
+                if capture.done:
+                    store(capture)
+                    capture = None
+        elif prefix in NF_PREFIXES:
+            if event == "start_map":
+                nf_kind = prefix
+                nf = {}
+            elif event == "end_map":
+                if nf_kind == CORE_NF_PREFIX and amf is None and nf.get("name") == "amf":
+                    amf = nf
+                elif nf_kind == RAN_NF_PREFIX and ueransim is None and nf.get("name") == "ueransim":
+                    ueransim = nf
+                nf_kind = nf = None
+
+    description = {}
+    if SSQ_PREFIX in found:
+        description["Slice Attributes"] = {"SSQ": found[SSQ_PREFIX]}
+    resource_description = {}
+    if amf is not None:
+        resource_description["core"] = {"nfs": [amf]}
+    if ueransim is not None:
+        resource_description["ran"] = {"nfs": [ueransim]}
+    if resource_description:
+        description["resource_description"] = resource_description
+
+    descriptor = {"description": description}
+    if "name" in found:
+        descriptor["name"] = found["name"]
+    return descriptor
@@ -0,0 +1,70 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+# Defaults applied when the 'http_client' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_HTTP_CLIENT_CONFIG = {
+    'pool_connections': 4,      # Number of host pools to cache
+    'pool_maxsize': 16,         # Max connections kept alive per host
+    'pool_block': False,        # Block instead of opening extra connections when the pool is exhausted
+    'keep_alive': True,         # Reuse TCP connections between requests
+    'connect_timeout': 3.05,    # Seconds to establish a connection
+    'read_timeout': 10,         # Seconds to wait for a response
+    'retries': 3,               # Retries on connection errors and retry_status codes
+    'backoff_factor': 0.2,      # Sleep between retries: backoff_factor * 2 ** (retry - 1)
+    'retry_status': [502, 503, 504],
+}
+
+
+class RICSession(requests.Session):
+    """
+    A requests.Session that applies a default timeout to every request.
+
+    Attributes:
+        timeout (tuple): The (connect, read) timeout used when the caller does not pass one.
+    """
+
+    def __init__(self, timeout):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, **kwargs):
+        kwargs.setdefault('timeout', self.timeout)
+        return super().request(method, url, **kwargs)
+
+
+def create_session(config):
+    """
+    Creates the pooled HTTP session shared by all Non-RT RIC calls.
+
+    Args:
+        config (dict): Configuration settings; the optional 'http_client' section overrides the defaults.
+
+    Returns:
+        RICSession: Session with connection pooling, timeouts and retry with backoff.
+    """
+    http_config = dict(DEFAULT_HTTP_CLIENT_CONFIG)
+    http_config.update(config.get('http_client') or {})
+
+    retry = Retry(
+        total=int(http_config['retries']),
+        backoff_factor=float(http_config['backoff_factor']),
+        status_forcelist=http_config['retry_status'],
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=int(http_config['pool_connections']),
+        pool_maxsize=int(http_config['pool_maxsize']),
+        pool_block=bool(http_config['pool_block']),
+        max_retries=retry,
+    )
+
+    session = RICSession(timeout=(float(http_config['connect_timeout']), float(http_config['read_timeout'])))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.verify = False
+    if not http_config['keep_alive']:
+        session.headers['Connection'] = 'close'
+    return session
@@ -0,0 +1,64 @@
+import json
+import logging
+import time
+
+
+class LazyJSON:
+    """
+    Defers JSON serialization of a log payload until the record is formatted.
+
+    Pass an instance as a %-style logging argument; json.dumps only runs if the
+    record is actually emitted, so disabled levels cost nothing beyond the
+    wrapper allocation.
+
+    Attributes:
+        indent (int): Indentation for rendered payloads, or None for compact output.
+        max_chars (int): Rendered payloads longer than this are truncated; None disables truncation.
+    """
+
+    indent = 2
+    max_chars = None
+
+    __slots__ = ("payload",)
+
+    def __init__(self, payload):
+        self.payload = payload
+
+    def __str__(self):
+        text = json.dumps(self.payload, indent=self.indent, default=str)
+        if self.max_chars is not None and len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... ({len(text) - self.max_chars} more chars)"
+        return text
+
+    __repr__ = __str__
+
+
+class JSONLinesFormatter(logging.Formatter):
+    """
+    Formats each log record as a single JSON object per line.
+    """
+
+    def format(self, record):
+        entry = {
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(record.created))
+                    + f".{int(record.msecs):03d}Z",
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+def configure_payload_rendering(log_config):
+    """
+    Applies the payload settings of the 'logging' configuration section to LazyJSON.
+
+    Args:
+        log_config (dict): The 'logging' configuration section.
+    """
+    max_chars = log_config.get('max_payload_chars')
+    LazyJSON.max_chars = int(max_chars) if max_chars else None
+    # Multi-line payloads would break one-record-per-line output
+    LazyJSON.indent = None if log_config.get('format') == 'json' else 2
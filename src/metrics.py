@@ -0,0 +1,101 @@
+import os
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, \
+    generate_latest
+
+# Latency buckets (seconds) spanning in-process phases and PMS round trips
+PHASE_BUCKETS = (.0001, .00025, .0005, .001, .0025, .005, .01, .025, .05, .1, .25, .5, 1, 2.5, 5, 10)
+
+REQUEST_PHASE_SECONDS = Histogram(
+    'nasp_request_phase_seconds',
+    'Time spent in each phase of slice policy handling.',
+    ['phase'],
+    buckets=PHASE_BUCKETS,
+)
+# Pre-bound children so the hot path skips the label lookup
+PARSE_SECONDS = REQUEST_PHASE_SECONDS.labels('parse')
+CREATE_RRM_POLICY_SECONDS = REQUEST_PHASE_SECONDS.labels('create_rrm_policy')
+FILL_POLICY_BODY_SECONDS = REQUEST_PHASE_SECONDS.labels('fill_policy_body')
+VALIDATE_POLICY_SECONDS = REQUEST_PHASE_SECONDS.labels('validate_policy')
+PUT_POLICY_SECONDS = REQUEST_PHASE_SECONDS.labels('put_policy')
+DISPATCH_SECONDS = REQUEST_PHASE_SECONDS.labels('dispatch')
+PMS_QUEUE_WAIT_SECONDS = REQUEST_PHASE_SECONDS.labels('pms_queue_wait')
+JOURNAL_SECONDS = REQUEST_PHASE_SECONDS.labels('journal')
+CATALOGUE_REGISTRATION_SECONDS = REQUEST_PHASE_SECONDS.labels('catalogue_registration')
+RECONCILE_SECONDS = REQUEST_PHASE_SECONDS.labels('reconcile')
+
+SLICE_REQUESTS = Counter(
+    'nasp_slice_requests_total',
+    'Slice policy requests by outcome and reason.',
+    ['endpoint', 'status', 'reason'],
+)
+
+PMS_RESPONSES = Counter(
+    'nasp_pms_responses_total',
+    'Responses received from the PMS by HTTP status code ("error" when no response was received).',
+    ['code'],
+)
+
+PMS_SHED = Counter(
+    'nasp_pms_shed_total',
+    'Policy PUTs shed by the PMS scheduler by reason (rate_limited, in_flight, circuit_open).',
+    ['reason'],
+)
+PMS_COALESCED = Counter(
+    'nasp_pms_coalesced_total',
+    'Requests merged into a queued request for the same slices.',
+)
+PMS_CIRCUIT_OPEN = Gauge(
+    'nasp_pms_circuit_open',
+    '1 while the PMS circuit breaker is open or half-open.',
+)
+
+RECONCILED_POLICIES = Counter(
+    'nasp_reconciled_policies_total',
+    'Policies checked by the reconciler by outcome (in_sync, missing, drifted, error).',
+    ['outcome'],
+)
+
+# Set by the queue on every change rather than with set_function, which the
+# multiprocess collector cannot export; live processes are summed
+POLICY_QUEUE_DEPTH = Gauge(
+    'nasp_policy_queue_depth',
+    'Policies waiting in the asynchronous submission queue.',
+    multiprocess_mode='livesum',
+)
+POLICY_QUEUE_IN_PROGRESS = Gauge(
+    'nasp_policy_queue_in_progress',
+    'Policies being sent to the PMS by queue workers.',
+    multiprocess_mode='livesum',
+)
+
+
+def count_request(endpoint, status, reason):
+    """
+    Increments the request counter for one handled request.
+
+    Args:
+        endpoint (str): Endpoint name.
+        status (str): 'success' or 'failure'.
+        reason (str): Short machine-readable reason, e.g. 'created' or 'invalid_json'.
+    """
+    SLICE_REQUESTS.labels(endpoint, status, reason).inc()
+
+
+def render_metrics():
+    """
+    Renders all metrics in the Prometheus text exposition format.
+
+    When PROMETHEUS_MULTIPROC_DIR is set (multi-worker servers), the values of
+    every worker process are aggregated.
+
+    Returns:
+        tuple: (payload bytes, content type)
+    """
+    if 'PROMETHEUS_MULTIPROC_DIR' in os.environ:
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
@@ -0,0 +1,366 @@
+import logging
+import threading
+import time
+
+import metrics
+from tools import policy_entry_key
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'pms_scheduler' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_PMS_SCHEDULER_CONFIG = {
+    'enabled': False,           # Send every policy PUT to the PMS straight away when false
+    'rate': 0.0,                # PUTs per second per ric_id; 0 for no limit
+    'burst': 10,                # PUTs per ric_id that may be sent at once after an idle period
+    'max_in_flight': 0,         # PUTs waiting for the PMS at the same time; 0 for no limit
+    'max_wait': 5.0,            # Seconds a PUT may wait for a token or in-flight slot before it is shed
+    'coalesce': True,           # Merge the updates of a slice queued behind a leased policy or empty bucket
+    'failure_threshold': 5,     # Consecutive PMS failures (5xx or no response) opening the circuit; 0 disables it
+    'reset_timeout': 30.0,      # Seconds the circuit stays open before a probe PUT is let through
+}
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class PMSOverloaded(Exception):
+    """
+    Raised when a policy PUT is shed instead of being sent to the PMS.
+
+    Attributes:
+        reason (str): 'rate_limited', 'in_flight' or 'circuit_open'.
+    """
+
+    def __init__(self, reason):
+        super().__init__(f"PUT shed: {reason}")
+        self.reason = reason
+
+
+class TokenBucket:
+    """
+    A token bucket refilled at rate tokens per second, holding at most burst tokens.
+    """
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline):
+        """
+        Takes a token, waiting for it until deadline (time.monotonic()).
+
+        A caller that will get a token in time reserves it at once, so waiting
+        callers are served in arrival order.
+
+        Returns:
+            bool: True if a token was taken, False if none would be available before deadline.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1.0 else (1.0 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            self._tokens -= 1.0
+        if wait:
+            time.sleep(wait)
+        return True
+
+    def wait(self, deadline):
+        """
+        Waits until a token is available, or until deadline (time.monotonic()), without taking it.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            wait = 0.0 if self._tokens >= 1.0 else (1.0 - self._tokens) / self.rate
+        time.sleep(max(0.0, min(wait, deadline - now)))
+
+
+class CircuitBreaker:
+    """
+    Fails fast after failure_threshold consecutive failures, for reset_timeout seconds.
+
+    Once the timeout has passed, a single probe request is let through: the
+    circuit closes if it succeeds and opens again if it fails.
+    """
+
+    def __init__(self, failure_threshold=5, reset_timeout=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        """
+        Returns whether requests fail fast, without letting a probe through.
+        """
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self._opened_at < self.reset_timeout
+
+    def allow(self):
+        """
+        Returns whether a request may be sent now.
+        """
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.state == OPEN and time.monotonic() - self._opened_at >= self.reset_timeout:
+                self.state = HALF_OPEN
+                return True
+            return False
+
+    def record(self, success):
+        """
+        Records the outcome of a request that allow() let through.
+        """
+        with self._lock:
+            if success:
+                self._failures = 0
+                self.state = CLOSED
+                return
+            self._failures += 1
+            if self.state == HALF_OPEN or (self.failure_threshold and self._failures >= self.failure_threshold):
+                if self.state != OPEN:
+                    logger.warning("PMS circuit opened after %d consecutive failures.", self._failures)
+                self.state = OPEN
+                self._opened_at = time.monotonic()
+
+
+class _Intent:
+    # Latest entry per slice of the requests queued behind the same update, applied by the first of them
+    def __init__(self):
+        self.entries = {}
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class PMSScheduler:
+    """
+    Paces the policy PUTs sent to the PMS.
+
+    Every PUT takes a token from the bucket of its ric_id and an in-flight
+    slot, waiting up to max_wait seconds for both before it is shed with
+    PMSOverloaded. A circuit breaker sheds PUTs while the PMS keeps failing.
+
+    Requests go through coalesce_request() before their policies are
+    planned: while the first request for a slice (ric_id, plmnId, nci, sst,
+    sd) waits for the policy owning it to be released or for a token, later
+    requests for that slice merge their entries into it, a later entry
+    replacing the queued entry of its slice. The first request then applies
+    the latest intent of every slice in one update, and all of them share
+    its result.
+
+    Attributes:
+        put (callable): Sends a body; returns the HTTP status code, or None if no response was received.
+        rate (float): PUTs per second per ric_id; 0 for no limit.
+        burst (int): Bucket size per ric_id.
+        max_in_flight (int): PUTs waiting for the PMS at the same time; 0 for no limit.
+        max_wait (float): Seconds a PUT may wait before it is shed.
+        coalesce (bool): Whether requests queued for the same slices are merged.
+        breaker (CircuitBreaker): Circuit breaker in front of the PMS.
+    """
+
+    def __init__(self, put, rate=0.0, burst=10, max_in_flight=0, max_wait=5.0, coalesce=True,
+                 failure_threshold=5, reset_timeout=30.0):
+        """
+        Initializes the scheduler.
+
+        Args:
+            put (callable): Sends a body; returns the HTTP status code, or None if no response was received.
+            rate (float): PUTs per second per ric_id; 0 for no limit.
+            burst (int): Bucket size per ric_id.
+            max_in_flight (int): PUTs waiting for the PMS at the same time; 0 for no limit.
+            max_wait (float): Seconds a PUT may wait before it is shed.
+            coalesce (bool): Whether requests queued for the same slices are merged.
+            failure_threshold (int): Consecutive failures opening the circuit; 0 disables it.
+            reset_timeout (float): Seconds the circuit stays open before a probe.
+        """
+        self.put = put
+        self.rate = rate
+        self.burst = burst
+        self.max_in_flight = max_in_flight
+        self.max_wait = max_wait
+        self.coalesce = coalesce
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self._in_flight = threading.BoundedSemaphore(max_in_flight) if max_in_flight else None
+        self._lock = threading.Lock()
+        self._buckets = {}
+        self._intents = {}
+        self._waiting = 0
+        self._sending = 0
+        self._counters = {"sent": 0, "succeeded": 0, "failed": 0, "coalesced": 0,
+                          "shed_rate_limited": 0, "shed_in_flight": 0, "shed_circuit_open": 0}
+
+    @classmethod
+    def from_config(cls, config, put):
+        """
+        Creates a scheduler from the 'pms_scheduler' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+            put (callable): Sends a body; returns the HTTP status code, or None if no response was received.
+
+        Returns:
+            PMSScheduler or None: The scheduler, or None if disabled.
+        """
+        scheduler_config = dict(DEFAULT_PMS_SCHEDULER_CONFIG)
+        scheduler_config.update(config.get('pms_scheduler') or {})
+        if not scheduler_config['enabled']:
+            return None
+        return cls(put, rate=float(scheduler_config['rate']), burst=int(scheduler_config['burst']),
+                   max_in_flight=int(scheduler_config['max_in_flight']),
+                   max_wait=float(scheduler_config['max_wait']), coalesce=bool(scheduler_config['coalesce']),
+                   failure_threshold=int(scheduler_config['failure_threshold']),
+                   reset_timeout=float(scheduler_config['reset_timeout']))
+
+    def coalesce_request(self, entries, ric_for, apply, ready=None):
+        """
+        Applies the entries of a request, together with those of later requests for the same slices.
+
+        The first request for a slice waits for ready() and, with rate limiting,
+        for a token of every RIC it updates. Until then, a later request sharing
+        one of its slices merges its entries into it instead of being applied on
+        its own, and waits for its result.
+
+        Args:
+            entries (list): RRMPolicyRatioList entries of the request.
+            ric_for (callable): Returns the ric_id an entry is applied on.
+            apply (callable): Applies a list of entries and returns the result of the request.
+            ready (callable, optional): Called with the entries; returns once they can be applied,
+                e.g. once the policies owning them are released.
+
+        Returns:
+            dict: A copy of the result returned by apply for the merged entries.
+
+        Raises:
+            Exception: Whatever ready or apply raised, in every merged request.
+        """
+        started = time.monotonic()
+        keys = [(ric_for(entry),) + policy_entry_key(entry) for entry in entries]
+        with self._lock:
+            intent = next((self._intents[key] for key in keys if key in self._intents), None)
+            leader = intent is None
+            if leader:
+                intent = _Intent()
+                buckets = {self._bucket(key[0]) for key in keys} - {None}
+            else:
+                self._counters["coalesced"] += 1
+                metrics.PMS_COALESCED.inc()
+            for key, entry in zip(keys, entries):
+                intent.entries[key] = entry
+                self._intents[key] = intent
+        if not leader:
+            intent.done.wait()
+            if intent.error is not None:
+                raise intent.error
+            return dict(intent.result)
+
+        try:
+            try:
+                if ready is not None:
+                    ready(entries)
+                for bucket in buckets:
+                    bucket.wait(started + self.max_wait)
+            finally:
+                with self._lock:
+                    # Later requests for these slices queue behind a new update
+                    for key in intent.entries:
+                        if self._intents.get(key) is intent:
+                            del self._intents[key]
+            intent.result = apply(list(intent.entries.values()))
+        except Exception as e:
+            intent.error = e
+            raise
+        finally:
+            intent.done.set()
+        return dict(intent.result)
+
+    def submit(self, body):
+        """
+        Sends a policy body to the PMS once a token and an in-flight slot are free.
+
+        Args:
+            body (dict): The policy body.
+
+        Returns:
+            dict or None: The body, or None if the PMS rejected it.
+
+        Raises:
+            PMSOverloaded: If the PUT was shed.
+        """
+        started = time.monotonic()
+        if self.breaker.is_open():
+            self._shed("circuit_open")
+        with self._lock:
+            bucket = self._bucket(body["ric_id"])
+            self._waiting += 1
+        deadline = started + self.max_wait
+        try:
+            if bucket is not None and not bucket.acquire(deadline):
+                self._shed("rate_limited")
+            if self._in_flight is not None:
+                if not self._in_flight.acquire(timeout=max(0.0, deadline - time.monotonic())):
+                    self._shed("in_flight")
+        finally:
+            with self._lock:
+                self._waiting -= 1
+        try:
+            metrics.PMS_QUEUE_WAIT_SECONDS.observe(time.monotonic() - started)
+            if not self.breaker.allow():
+                self._shed("circuit_open")
+            with self._lock:
+                self._sending += 1
+                self._counters["sent"] += 1
+            status = None
+            try:
+                status = self.put(body)
+            finally:
+                with self._lock:
+                    self._sending -= 1
+                    self._counters["succeeded" if status is not None and status < 400 else "failed"] += 1
+                # Client errors say nothing about the health of the PMS
+                self.breaker.record(status is not None and status < 500)
+                metrics.PMS_CIRCUIT_OPEN.set(self.breaker.state != CLOSED)
+        finally:
+            if self._in_flight is not None:
+                self._in_flight.release()
+        return body if status is not None and status < 400 else None
+
+    def stats(self):
+        """
+        Returns the scheduler counters and the circuit state.
+
+        Returns:
+            dict: Scheduler metrics.
+        """
+        with self._lock:
+            stats = {"waiting": self._waiting, "in_flight": self._sending, "circuit": self.breaker.state,
+                     "coalescing": len(set(self._intents.values()))}
+            stats.update(self._counters)
+        return stats
+
+    def _bucket(self, ric_id):
+        # Called with the lock held
+        if not self.rate:
+            return None
+        bucket = self._buckets.get(ric_id)
+        if bucket is None:
+            bucket = self._buckets[ric_id] = TokenBucket(self.rate, self.burst)
+        return bucket
+
+    def _shed(self, reason):
+        with self._lock:
+            self._counters["shed_" + reason] += 1
+        metrics.PMS_SHED.labels(reason).inc()
+        raise PMSOverloaded(reason)
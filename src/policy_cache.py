@@ -0,0 +1,200 @@
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+
+from tools import create_rrm_policy
+
+# Defaults applied when the 'policy_cache' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_POLICY_CACHE_CONFIG = {
+    'enabled': False,   # Build the RRM policy of every descriptor from scratch when false
+    'max_size': 1024,   # Descriptors kept; the least recently used is evicted first
+    'ttl': 300.0,       # Seconds a result is reused; 0 keeps it until evicted
+}
+
+
+def descriptor_fingerprint(input_json, capacity=None):
+    """
+    Returns a digest of the descriptor fields create_rrm_policy reads.
+
+    Covers the plmnSupportList of the first 'amf' core function, the mcc,
+    mnc, nci and slices of the first 'ueransim' RAN function, and the SSQ
+    downlink bit rates (and uplink ones when capacity.uplink is set). Other
+    fields, such as the descriptor name, do not change the fingerprint. The
+    fields are serialized with repr(), which keeps 1, 1.0 and True distinct
+    and is cheaper than a sorted JSON serialization.
+
+    Args:
+        input_json (dict): NASP slice descriptor.
+        capacity (CapacityProfileRegistry, optional): Capacity profiles the policy is sized with.
+
+    Returns:
+        bytes: The fingerprint.
+    """
+    description = input_json.get("description", {})
+    resource_description = description.get("resource_description", {})
+    ssq = description.get("Slice Attributes", {}).get("SSQ", {})
+
+    for nf in resource_description.get("core", {}).get("nfs", []):
+        if nf.get("name") == "amf":
+            plmn_support_list = nf.get("config", {}).get("plmnSupportList", [])
+            break
+    else:
+        plmn_support_list = []
+    for nf in resource_description.get("ran", {}).get("nfs", []):
+        if nf.get("name") == "ueransim":
+            ran_config = nf.get("config", {})
+            break
+    else:
+        ran_config = {}
+
+    fields = [
+        plmn_support_list,
+        ran_config.get("mcc", ""), ran_config.get("mnc", ""), ran_config.get("nci", ""), ran_config.get("slices", []),
+        ssq.get("Guaranteed Flow Bit Rate - Downlink", 0), ssq.get("Max Flow Bit Rate - Downlink", 0),
+    ]
+    if capacity is not None and capacity.uplink:
+        fields += [ssq.get("Guaranteed Flow Bit Rate - Uplink", 0), ssq.get("Max Flow Bit Rate - Uplink", 0)]
+    return hashlib.blake2b(repr(fields).encode(), digest_size=16).digest()
+
+
+def _is_flat_policy(policy):
+    # Whether every entry holds scalars besides a plmnId dict of scalars
+    for entry in policy["RRMPolicyRatioList"]:
+        for field, value in entry.items():
+            if field == "plmnId" and value.__class__ is dict:
+                value = value.values()
+            else:
+                value = (value,)
+            if any(item.__class__ is dict or item.__class__ is list for item in value):
+                return False
+    return True
+
+
+def _copy_flat_policy(policy):
+    return {"RRMPolicyRatioList": [{**entry, "plmnId": {**entry["plmnId"]}} if "plmnId" in entry else {**entry}
+                                   for entry in policy["RRMPolicyRatioList"]]}
+
+
+def _copy_value(value):
+    # Copies the dicts and lists of a JSON-like value; much cheaper than copy.deepcopy
+    if value.__class__ is dict:
+        value = value.copy()
+        for field, item in value.items():
+            if item.__class__ is dict or item.__class__ is list:
+                value[field] = _copy_value(item)
+        return value
+    if value.__class__ is list:
+        return [_copy_value(item) if item.__class__ is dict or item.__class__ is list else item for item in value]
+    return value
+
+
+class RRMPolicyCache:
+    """
+    A bounded LRU cache of create_rrm_policy results with an optional TTL.
+
+    Results are keyed by the descriptor fingerprint and by the capacity
+    registry and its version, so a profile change misses the cache. Every
+    call returns a fresh copy, so callers may modify it.
+
+    Attributes:
+        max_size (int): Maximum number of cached results.
+        ttl (float): Seconds a result is reused; 0 keeps it until evicted.
+    """
+
+    def __init__(self, max_size=1024, ttl=300.0):
+        """
+        Initializes an empty cache.
+
+        Args:
+            max_size (int): Maximum number of cached results.
+            ttl (float): Seconds a result is reused; 0 keeps it until evicted.
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0, "expirations": 0, "invalidations": 0}
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a cache from the 'policy_cache' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+
+        Returns:
+            RRMPolicyCache or None: The cache, or None if disabled.
+        """
+        cache_config = dict(DEFAULT_POLICY_CACHE_CONFIG)
+        cache_config.update(config.get('policy_cache') or {})
+        if not cache_config['enabled']:
+            return None
+        return cls(max_size=int(cache_config['max_size']), ttl=float(cache_config['ttl']))
+
+    def create_rrm_policy(self, input_json, capacity=None):
+        """
+        Returns the RRM policy data of a descriptor, as tools.create_rrm_policy does, from the cache if possible.
+
+        Args:
+            input_json (dict): NASP slice descriptor.
+            capacity (CapacityProfileRegistry, optional): Per-cell capacity profiles.
+
+        Returns:
+            dict: Policy data containing an 'RRMPolicyRatioList', owned by the caller.
+        """
+        try:
+            fingerprint = descriptor_fingerprint(input_json, capacity)
+        except (AttributeError, TypeError):
+            # Malformed descriptor: let create_rrm_policy handle it as it would uncached
+            return create_rrm_policy(input_json, capacity)
+        key = (fingerprint, id(capacity), capacity.version if capacity is not None else None)
+
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None:
+                expires, policy, copy_policy = cached
+                if not expires or now < expires:
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return copy_policy(policy)
+                del self._entries[key]
+                self._counters["expirations"] += 1
+            self._counters["misses"] += 1
+
+        policy = create_rrm_policy(input_json, capacity)
+        stored = _copy_value(policy)
+        # Entries shaped as create_rrm_policy builds them are copied without walking every field
+        copy_policy = _copy_flat_policy if _is_flat_policy(stored) else _copy_value
+        with self._lock:
+            self._entries[key] = (now + self.ttl if self.ttl else 0.0, stored, copy_policy)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+        return policy
+
+    def invalidate(self):
+        """
+        Drops every cached result, e.g. after the capacity model changed.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._counters["invalidations"] += 1
+
+    def stats(self):
+        """
+        Returns the cache size and counters.
+
+        Returns:
+            dict: Cache metrics, with the hit ratio.
+        """
+        with self._lock:
+            stats = {"size": len(self._entries), "max_size": self.max_size, "ttl": self.ttl}
+            stats.update(self._counters)
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_ratio"] = stats["hits"] / lookups if lookups else 0.0
+        return stats
@@ -0,0 +1,361 @@
+import json
+import logging
+import os
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'policy_journal' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_POLICY_JOURNAL_CONFIG = {
+    'enabled': False,               # Journal policies before they are sent and replay them on startup
+    'path': 'data/policy-journal.log',  # Append-only journal file
+    'max_batch_delay': 0.0,         # Seconds the writer waits to gather more records per fsync
+    'compact_threshold': 10000,     # Rewrite the journal once it holds this many records
+}
+
+
+class JournalWriteError(OSError):
+    """
+    Raised by log_pending() when the records of the policies could not be made durable.
+    """
+
+
+class PolicyJournal:
+    """
+    An append-only, fsync'ed journal of the policies sent to the PMS.
+
+    A policy is journaled as pending before its PUT is attempted and marked
+    committed or aborted once the outcome is known, so policies accepted
+    but not applied when the process died can be replayed on startup.
+
+    Records are written by a single writer thread. Every write carries all
+    the records appended since the previous one and is made durable with one
+    fsync (group commit), so concurrent requests share the cost of a sync.
+    Callers of log_pending() and log_abort() wait for their records to be
+    durable, so a policy the client was told failed is not replayed after a
+    crash. Commit records are not waited for, as replaying an applied policy
+    only repeats an idempotent PUT. When a write or fsync fails, log_pending()
+    raises for every record of the failed write, so the requests fail instead
+    of sending policies that would not be replayed.
+
+    Attributes:
+        path (str): Journal file.
+        max_batch_delay (float): Seconds the writer waits to gather more records per fsync.
+        compact_threshold (int): Record count above which the journal is rewritten.
+    """
+
+    def __init__(self, path, max_batch_delay=0.0, compact_threshold=10000):
+        """
+        Initializes the journal, loading the pending policies of an existing file.
+
+        Args:
+            path (str): Journal file, created if missing.
+            max_batch_delay (float): Seconds the writer waits to gather more records per fsync.
+            compact_threshold (int): Record count above which the journal is rewritten.
+        """
+        self.path = path
+        self.max_batch_delay = max_batch_delay
+        self.compact_threshold = compact_threshold
+        self._cond = threading.Condition()
+        self._pending = {}
+        self._records = 0
+        self._buffer = []
+        self._buffered = 0
+        self._appended = 0
+        self._durable = 0
+        self._failed = 0
+        self._error = None
+        self._counters = {"pending": 0, "committed": 0, "aborted": 0, "syncs": 0, "compactions": 0,
+                          "write_errors": 0}
+        self._writer_pid = None
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, 'ab')
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a journal from the 'policy_journal' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+
+        Returns:
+            PolicyJournal or None: The journal, or None if disabled.
+        """
+        journal_config = dict(DEFAULT_POLICY_JOURNAL_CONFIG)
+        journal_config.update(config.get('policy_journal') or {})
+        if not journal_config['enabled']:
+            return None
+        return cls(journal_config['path'], max_batch_delay=float(journal_config['max_batch_delay']),
+                   compact_threshold=int(journal_config['compact_threshold']))
+
+    def log_pending(self, bodies):
+        """
+        Journals policies about to be sent and waits until the records are durable.
+
+        Args:
+            bodies (list): Policy bodies, each with a 'policy_id'.
+
+        Raises:
+            JournalWriteError: If the records could not be written; the policies stay pending
+                until log_abort() is called for them.
+        """
+        if not bodies:
+            return
+        records = [{"op": "pending", "policy_id": body["policy_id"], "body": body} for body in bodies]
+        with self._cond:
+            for body in bodies:
+                self._pending[body["policy_id"]] = body
+            self._counters["pending"] += len(bodies)
+            sequence = self._append(records)
+            if not self._wait(sequence):
+                raise JournalWriteError(f"Failed to write policy journal {self.path}: {self._error}")
+
+    def log_commit(self, policy_id):
+        """
+        Marks a policy as applied on the RIC.
+
+        Args:
+            policy_id (str): The policy identifier.
+        """
+        self._finish(policy_id, "commit", "committed")
+
+    def log_abort(self, policy_id):
+        """
+        Marks a policy as not to be replayed, e.g. because its PUT failed, and waits until the record is durable.
+
+        The client is told the policy failed once this returns. If the record
+        could not be written, the error is logged and the policy is replayed on
+        the next start.
+
+        Args:
+            policy_id (str): The policy identifier.
+        """
+        with self._cond:
+            sequence = self._finish(policy_id, "abort", "aborted")
+            if sequence is not None:
+                self._wait(sequence)
+
+    def pending(self):
+        """
+        Returns the policies journaled as pending and neither committed nor aborted.
+
+        Returns:
+            list: Policy bodies, oldest first.
+        """
+        with self._cond:
+            return list(self._pending.values())
+
+    def flush(self):
+        """
+        Waits until every record appended so far is durable.
+        """
+        with self._cond:
+            self._wait(self._appended)
+
+    def stats(self):
+        """
+        Returns the number of pending policies and the journal counters.
+
+        Returns:
+            dict: Journal metrics.
+        """
+        with self._cond:
+            stats = {"uncommitted": len(self._pending), "records": self._records}
+            stats.update(self._counters)
+        return stats
+
+    def _finish(self, policy_id, op, counter):
+        # Returns the sequence number of the record, or None if the policy was not pending
+        with self._cond:
+            if self._pending.pop(policy_id, None) is None:
+                return None
+            self._counters[counter] += 1
+            return self._append([{"op": op, "policy_id": policy_id}])
+
+    def _wait(self, sequence):
+        # Called with the condition held; returns whether the write of the sequence succeeded.
+        # Writes complete in order: a failure at or after the sequence may have been its
+        # write's, and reporting a failure for records that were written is harmless
+        while self._durable < sequence and self._failed < sequence:
+            self._cond.wait()
+        return self._failed < sequence
+
+    def _append(self, records):
+        # Called with the condition held; returns the sequence number of the records
+        self._ensure_writer()
+        self._buffer.append(b"".join(json.dumps(record, separators=(",", ":")).encode() + b"\n"
+                                     for record in records))
+        self._records += len(records)
+        self._buffered += len(records)
+        self._appended += 1
+        self._cond.notify_all()
+        return self._appended
+
+    def _ensure_writer(self):
+        # Threads do not survive fork(); start the writer in the process that uses the journal
+        if self._writer_pid == os.getpid():
+            return
+        self._writer_pid = os.getpid()
+        threading.Thread(target=self._run, name="policy-journal-writer", daemon=True).start()
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._buffer:
+                    self._cond.wait()
+            if self.max_batch_delay:
+                time.sleep(self.max_batch_delay)
+            with self._cond:
+                batch, self._buffer = self._buffer, []
+                self._buffered = 0
+                sequence = self._appended
+            error = size = None
+            try:
+                size = self._file.tell()
+                self._file.write(b"".join(batch))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            except (OSError, ValueError) as e:
+                logger.error("Failed to write policy journal %s: %s", self.path, e)
+                error = e
+                self._reopen(size)
+            with self._cond:
+                if error is None:
+                    self._counters["syncs"] += 1
+                    self._durable = sequence
+                else:
+                    self._counters["write_errors"] += 1
+                    self._failed = sequence
+                    self._error = error
+                self._cond.notify_all()
+                compact = self._records >= self.compact_threshold and self._records > 2 * len(self._pending)
+                if compact:
+                    # Records still buffered are written after the compacted ones
+                    snapshot, records = dict(self._pending), self._records - self._buffered
+            if compact:
+                self._compact(snapshot, records)
+
+    def _reopen(self, size):
+        # Drop whatever part of a failed write reached the file, so the next
+        # records start on their own line, and retry with a fresh file object
+        try:
+            self._file.close()
+        except (OSError, ValueError):
+            pass
+        try:
+            if size is not None:
+                os.truncate(self.path, size)
+            self._file = open(self.path, 'ab')
+        except OSError as e:
+            logger.error("Failed to reopen policy journal %s: %s", self.path, e)
+
+    def _compact(self, snapshot, records):
+        # Called by the writer between two writes: rewrite the journal with the
+        # policies pending when the snapshot was taken, while callers keep
+        # appending. Records appended since then are still in the buffer and
+        # are written to the new file, so only the swap holds the condition.
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                for policy_id, body in snapshot.items():
+                    record = {"op": "pending", "policy_id": policy_id, "body": body}
+                    f.write(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger.error("Failed to compact policy journal %s: %s", self.path, e)
+            return
+        with self._cond:
+            try:
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                logger.error("Failed to compact policy journal %s: %s", self.path, e)
+                return
+            self._file.close()
+            self._file = open(self.path, 'ab')
+            self._records = len(snapshot) + self._records - records
+            self._counters["compactions"] += 1
+
+    def _load(self):
+        end = 0
+        with open(self.path, 'rb+') as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                end += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("Ignoring corrupt record in policy journal %s", self.path)
+                    continue
+                self._records += 1
+                if record.get("op") == "pending":
+                    self._pending[record["policy_id"]] = record["body"]
+                else:
+                    self._pending.pop(record.get("policy_id"), None)
+            if f.seek(0, os.SEEK_END) != end:
+                # Drop the record torn by a crash, so the next one starts on its own line
+                logger.warning("Truncating torn record at the end of policy journal %s", self.path)
+                f.truncate(end)
+        logger.info("Loaded policy journal %s: %d uncommitted policies", self.path, len(self._pending))
+
+
+class JournalReplay:
+    """
+    Replays the pending policies of a journal in a background thread, once in every process that serves requests.
+
+    Threads do not survive fork(): with gunicorn's preload, the app is created in
+    the master, so the replay starts lazily in the worker, whose policy store
+    then records the replayed policies.
+
+    Attributes:
+        journal (PolicyJournal): The journal.
+        replay (callable): Function sending the pending policies, e.g. NASPPolicy.replay_journal.
+    """
+
+    def __init__(self, journal, replay):
+        """
+        Initializes the replay; start() runs it.
+
+        Args:
+            journal (PolicyJournal): The journal.
+            replay (callable): Function sending the pending policies.
+        """
+        self.journal = journal
+        self.replay = replay
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._pid = None
+
+    def start(self):
+        """
+        Starts the replay in the current process, unless it was already started there.
+        """
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._done = done = threading.Event()
+        if not self.journal.pending():
+            done.set()
+            return
+
+        def run():
+            try:
+                self.replay()
+            finally:
+                done.set()
+        threading.Thread(target=run, name="policy-journal-replay", daemon=True).start()
+
+    @property
+    def done(self):
+        """
+        bool: Whether the replay finished in the current process.
+        """
+        return self._pid == os.getpid() and self._done.is_set()
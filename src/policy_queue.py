@@ -0,0 +1,188 @@
+import logging
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict
+
+import metrics
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'policy_queue' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_POLICY_QUEUE_CONFIG = {
+    'enabled': False,       # Return 202 and submit policies in the background
+    'workers': 4,           # Worker threads sending policies to the PMS
+    'max_size': 100,        # Pending submissions before requests are rejected with 429
+    'max_tracked': 10000,   # Finished submissions kept for /policy_status
+}
+
+
+class PolicySubmissionQueue:
+    """
+    A bounded queue of policy submissions drained by a pool of worker threads.
+
+    Attributes:
+        submit (callable): Function called with a policy body; returns True on success.
+        workers (int): Number of worker threads.
+        max_size (int): Maximum number of queued submissions.
+        max_tracked (int): Maximum number of status records kept.
+    """
+
+    def __init__(self, submit, workers=4, max_size=100, max_tracked=10000):
+        """
+        Initializes the queue. Worker threads start with the first submission, so
+        a queue created before a server forks its workers runs in each of them.
+
+        Args:
+            submit (callable): Function called with a policy body; returns True on success.
+            workers (int): Number of worker threads.
+            max_size (int): Maximum number of queued submissions.
+            max_tracked (int): Maximum number of status records kept.
+        """
+        self.submit = submit
+        self.max_size = max_size
+        self.max_tracked = max_tracked
+        self._queue = queue.Queue(maxsize=max_size)
+        self._lock = threading.Lock()
+        self._records = OrderedDict()
+        self._in_progress = 0
+        self._counters = {"accepted": 0, "rejected": 0, "succeeded": 0, "failed": 0}
+        self.workers = workers
+        self._workers = []
+        self._workers_pid = None
+
+    @classmethod
+    def from_config(cls, config, submit):
+        """
+        Creates a queue from the 'policy_queue' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+            submit (callable): Function called with a policy body; returns True on success.
+
+        Returns:
+            PolicySubmissionQueue or None: The queue, or None if asynchronous mode is disabled.
+        """
+        queue_config = dict(DEFAULT_POLICY_QUEUE_CONFIG)
+        queue_config.update(config.get('policy_queue') or {})
+        if not queue_config['enabled']:
+            return None
+        return cls(submit, workers=int(queue_config['workers']), max_size=int(queue_config['max_size']),
+                   max_tracked=int(queue_config['max_tracked']))
+
+    def enqueue(self, policy_id, body):
+        """
+        Queues a policy body for submission.
+
+        Args:
+            policy_id (str): Identifier reported back by status().
+            body (dict): The policy body to submit.
+
+        Returns:
+            bool: True if the policy was queued, False if the queue is full.
+        """
+        with self._lock:
+            self._ensure_workers()
+            try:
+                self._queue.put_nowait((policy_id, body))
+            except queue.Full:
+                self._counters["rejected"] += 1
+                return False
+            self._counters["accepted"] += 1
+            metrics.POLICY_QUEUE_DEPTH.set(self._queue.qsize())
+            self._records[policy_id] = {
+                "policy_id": policy_id,
+                "status": "queued",
+                "queued_at": time.time(),
+            }
+            self._evict()
+        return True
+
+    def status(self, policy_id):
+        """
+        Returns the status record of a submission.
+
+        Args:
+            policy_id (str): The policy identifier.
+
+        Returns:
+            dict or None: A copy of the status record, or None if the policy is unknown.
+        """
+        with self._lock:
+            record = self._records.get(policy_id)
+            return dict(record) if record is not None else None
+
+    def stats(self):
+        """
+        Returns queue depth, in-flight submissions and counters.
+
+        Returns:
+            dict: Queue metrics.
+        """
+        with self._lock:
+            stats = {
+                "queue_depth": self._queue.qsize(),
+                "queue_capacity": self.max_size,
+                "in_progress": self._in_progress,
+                "workers": self.workers,
+            }
+            stats.update(self._counters)
+        return stats
+
+    def join(self):
+        """
+        Blocks until every queued submission has been processed.
+        """
+        self._queue.join()
+
+    def _ensure_workers(self):
+        # Threads do not survive fork(); start them in the process that uses the queue
+        if self._workers_pid == os.getpid():
+            return
+        self._workers_pid = os.getpid()
+        self._workers = []
+        for i in range(self.workers):
+            worker = threading.Thread(target=self._run, name=f"policy-worker-{i}", daemon=True)
+            worker.start()
+            self._workers.append(worker)
+
+    def _evict(self):
+        # Drop the oldest finished records once over the limit; queued and
+        # in-progress records are always kept.
+        excess = len(self._records) - self.max_tracked
+        if excess <= 0:
+            return
+        for policy_id in list(self._records):
+            if excess <= 0:
+                break
+            if self._records[policy_id]["status"] in ("success", "failure"):
+                del self._records[policy_id]
+                excess -= 1
+
+    def _update(self, policy_id, **fields):
+        with self._lock:
+            record = self._records.get(policy_id)
+            if record is not None:
+                record.update(fields)
+
+    def _run(self):
+        while True:
+            policy_id, body = self._queue.get()
+            with self._lock:
+                self._in_progress += 1
+                metrics.POLICY_QUEUE_DEPTH.set(self._queue.qsize())
+                metrics.POLICY_QUEUE_IN_PROGRESS.set(self._in_progress)
+            self._update(policy_id, status="in_progress", started_at=time.time())
+            try:
+                success = self.submit(body)
+            except Exception:
+                logger.exception("Unexpected error submitting policy %s", policy_id)
+                success = False
+            with self._lock:
+                self._in_progress -= 1
+                metrics.POLICY_QUEUE_IN_PROGRESS.set(self._in_progress)
+                self._counters["succeeded" if success else "failed"] += 1
+            self._update(policy_id, status="success" if success else "failure", finished_at=time.time())
+            self._queue.task_done()
@@ -0,0 +1,192 @@
+import json
+import logging
+from functools import lru_cache
+
+from tools import remove_duplicates_from_rrm_policy
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'policy_validation' section (or any of its keys)
+# is missing from the configuration file.
+DEFAULT_POLICY_VALIDATION_CONFIG = {
+    'enabled': False,   # Send policy data to the PMS without checking it against the policy type schema
+    'coerce': True,     # Convert fields to the schema type first, e.g. an integer sd to a string
+    'schemas': {1: 'policy/SliceSchemav5.json'},  # Policy type schema file per policytype_id
+}
+
+
+def _coerce_string(value):
+    # bool is an int, but True is not a slice differentiator
+    if isinstance(value, int) and not isinstance(value, bool):
+        return str(value)
+    return value
+
+
+def _coerce_integer(value):
+    if isinstance(value, str):
+        try:
+            return int(value)
+        except ValueError:
+            return value
+    return value
+
+
+def _coerce_nothing(value):
+    return value
+
+
+def compile_coercer(schema):
+    """
+    Compiles a function converting the scalar fields of a value to the types the schema declares.
+
+    Integers become strings where the schema expects a string, and decimal
+    strings become integers where it expects an integer. Values that cannot
+    be converted are left for validation to reject. Objects and arrays are
+    converted in place.
+
+    Args:
+        schema (dict): A JSON schema.
+
+    Returns:
+        callable: Function taking a value and returning the converted value.
+    """
+    schema_type = schema.get("type")
+    if schema_type == "string":
+        return _coerce_string
+    if schema_type == "integer":
+        return _coerce_integer
+    if schema_type == "array" and isinstance(schema.get("items"), dict):
+        coerce_item = compile_coercer(schema["items"])
+        if coerce_item is _coerce_nothing:
+            return _coerce_nothing
+
+        def coerce_array(value):
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    value[index] = coerce_item(item)
+            return value
+        return coerce_array
+    if schema_type == "object":
+        fields = [(name, compile_coercer(field_schema)) for name, field_schema in schema.get("properties", {}).items()]
+        fields = [(name, coerce) for name, coerce in fields if coerce is not _coerce_nothing]
+        if not fields:
+            return _coerce_nothing
+
+        def coerce_object(value):
+            if isinstance(value, dict):
+                for name, coerce in fields:
+                    field = value.get(name)
+                    if field is not None:
+                        value[name] = coerce(field)
+            return value
+        return coerce_object
+    return _coerce_nothing
+
+
+class PolicySchema:
+    """
+    The create schema of an A1 policy type, compiled into a validator and a coercer.
+
+    Attributes:
+        path (str): Policy type file the schema was read from.
+        validate (callable): Validator raising ValueError (fastjsonschema.JsonSchemaException) on invalid data.
+        coerce (callable): Function converting policy data to the schema types in place.
+    """
+
+    def __init__(self, path, create_schema):
+        """
+        Compiles the schema.
+
+        Args:
+            path (str): Policy type file the schema was read from.
+            create_schema (dict): The 'create_schema' of the policy type.
+        """
+        import fastjsonschema
+
+        self.path = path
+        self.validate = fastjsonschema.compile(create_schema)
+        self.coerce = compile_coercer(create_schema)
+
+
+@lru_cache(maxsize=None)
+def load_policy_schema(path):
+    """
+    Reads and compiles a policy type file such as policy/SliceSchemav5.json. Compiled once per path.
+
+    Args:
+        path (str): Policy type file with a 'create_schema'.
+
+    Returns:
+        PolicySchema: The compiled schema.
+    """
+    with open(path, 'r') as f:
+        policy_type = json.load(f)
+    return PolicySchema(path, policy_type.get("create_schema", policy_type))
+
+
+class PolicyValidator:
+    """
+    Validates policy data against the schema of its policy type before it is sent to the PMS.
+
+    Schemas are compiled when the validator is created, once per policytype_id,
+    so validation on the request path only runs the compiled code.
+
+    Attributes:
+        coerce (bool): Whether fields are converted to the schema types before validation.
+    """
+
+    def __init__(self, schemas, coerce=True):
+        """
+        Initializes the validator.
+
+        Args:
+            schemas (dict): Policy type file per policytype_id.
+            coerce (bool): Whether fields are converted to the schema types before validation.
+        """
+        self.coerce = coerce
+        self._schemas = {int(policytype_id): load_policy_schema(path) for policytype_id, path in schemas.items()}
+        for policytype_id, schema in self._schemas.items():
+            logger.info("Compiled schema of policy type %s from %s", policytype_id, schema.path)
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a validator from the 'policy_validation' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+
+        Returns:
+            PolicyValidator or None: The validator, or None if disabled.
+        """
+        validation_config = dict(DEFAULT_POLICY_VALIDATION_CONFIG)
+        validation_config.update(config.get('policy_validation') or {})
+        if not validation_config['enabled']:
+            return None
+        return cls(validation_config['schemas'] or {}, coerce=bool(validation_config['coerce']))
+
+    def validate(self, policytype_id, policy_data):
+        """
+        Converts policy data to the schema types, if enabled, and validates it.
+
+        Entries that become identical once converted are deduplicated again.
+
+        Args:
+            policytype_id (int): Policy type of the data.
+            policy_data (dict): Data containing RRMPolicyRatioList, converted in place.
+
+        Returns:
+            str or None: Why the data is invalid, or None if it is valid or the policy type has no schema.
+        """
+        schema = self._schemas.get(policytype_id)
+        if schema is None:
+            return None
+        if self.coerce:
+            schema.coerce(policy_data)
+            # Entries that only differed in type, e.g. sd 1 and "1", are now duplicates
+            remove_duplicates_from_rrm_policy(policy_data)
+        try:
+            schema.validate(policy_data)
+        except ValueError as e:
+            return getattr(e, "message", str(e))
+        return None
@@ -0,0 +1,310 @@
+import json
+import logging
+import os
+import threading
+import time
+import uuid
+
+from tools import policy_entry_key
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'policy_store' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_POLICY_STORE_CONFIG = {
+    'enabled': False,   # Track active policies and skip PUTs that change nothing
+    'path': None,       # Optional JSON file the store is persisted to
+    'lock_timeout': 10.0,  # Seconds a request waits for another update of the same policy
+}
+
+
+class PolicyBusy(Exception):
+    """
+    Raised when a policy stays leased by another update for longer than the lock timeout.
+
+    Attributes:
+        policy_ids (list): The leased policies the request waited for.
+    """
+
+    def __init__(self, policy_ids):
+        super().__init__(f"Policies busy: {', '.join(policy_ids)}")
+        self.policy_ids = policy_ids
+
+
+class PolicyStore:
+    """
+    An in-memory store of the policies this rApp has applied on the RIC.
+
+    Every RRMPolicyRatioList entry is owned by one policy. Incoming entries are
+    merged into the policy that already owns their key so repeated requests
+    update that policy in place, and a PUT is skipped when nothing changed.
+
+    A policy planned with changes is leased to its request until commit() or
+    discard(), so the plan, PUT and commit of concurrent updates of the same
+    policy run one after the other: the later request plans on top of the
+    entries the earlier one committed instead of overwriting them.
+
+    Attributes:
+        path (str): JSON file the store is persisted to, or None.
+        lock_timeout (float): Seconds plan() and lease() wait for a leased policy.
+    """
+
+    def __init__(self, path=None, lock_timeout=10.0):
+        """
+        Initializes the store, loading persisted policies if path exists.
+
+        Args:
+            path (str, optional): JSON file the store is persisted to.
+            lock_timeout (float): Seconds plan() and lease() wait for a leased policy.
+        """
+        self.path = path
+        self.lock_timeout = lock_timeout
+        self._lock = threading.Lock()
+        self._released = threading.Condition(self._lock)
+        self._policies = {}
+        self._index = {}
+        self._leased = set()
+        self._counters = {"created": 0, "updated": 0, "skipped": 0, "failed": 0, "waited": 0, "busy": 0}
+        if path and os.path.exists(path):
+            self._load()
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a store from the 'policy_store' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+
+        Returns:
+            PolicyStore or None: The store, or None if disabled.
+        """
+        store_config = dict(DEFAULT_POLICY_STORE_CONFIG)
+        store_config.update(config.get('policy_store') or {})
+        if not store_config['enabled']:
+            return None
+        return cls(store_config['path'], float(store_config['lock_timeout']))
+
+    def plan(self, entries):
+        """
+        Computes the policies that must be written to apply the given entries.
+
+        Args:
+            entries (list): RRMPolicyRatioList entries.
+
+        Returns:
+            list: (policy_id, merged_entries, changed) tuples, one per touched policy.
+
+        Raises:
+            PolicyBusy: If a touched policy stayed leased for lock_timeout seconds.
+        """
+        return self.plan_groups([entries])[0]
+
+    def plan_groups(self, groups):
+        """
+        Computes the policies that must be written to apply several groups of entries, e.g. one per RIC.
+
+        Entries whose key is already owned by a policy are merged into it; new
+        keys join the first policy of their group touched by the request or a
+        new policy. Keys of new policies are reserved, and every changed policy
+        is leased, until commit() or discard(). Groups are planned together so
+        a request never holds some leases while it waits for others.
+
+        Args:
+            groups (list): Lists of RRMPolicyRatioList entries.
+
+        Returns:
+            list: Per group, (policy_id, merged_entries, changed) tuples, one per touched policy.
+
+        Raises:
+            PolicyBusy: If a touched policy stayed leased for lock_timeout seconds.
+        """
+        keys = [[policy_entry_key(entry) for entry in entries] for entries in groups]
+        with self._lock:
+            self._wait_released(lambda: {self._index.get(key) for group_keys in keys for key in group_keys})
+
+            plans = []
+            for entries, group_keys in zip(groups, keys):
+                touched = {}
+                new_entries = []
+                for entry, key in zip(entries, group_keys):
+                    policy_id = self._index.get(key)
+                    if policy_id is None:
+                        new_entries.append((key, entry))
+                    else:
+                        touched.setdefault(policy_id, []).append((key, entry))
+                if new_entries:
+                    policy_id = next(iter(touched), None) or str(uuid.uuid4())
+                    touched.setdefault(policy_id, []).extend(new_entries)
+                    for key, _ in new_entries:
+                        self._index[key] = policy_id
+
+                group_plans = []
+                for policy_id, group in touched.items():
+                    current = self._policies.get(policy_id, {})
+                    merged = dict(current)
+                    for key, entry in group:
+                        merged[key] = entry
+                    changed = merged != current
+                    if changed:
+                        self._leased.add(policy_id)
+                    else:
+                        self._counters["skipped"] += 1
+                    group_plans.append((policy_id, list(merged.values()), changed))
+                plans.append(group_plans)
+            return plans
+
+    def wait_released(self, entries):
+        """
+        Waits until no policy owning one of the entries is leased, without leasing it.
+
+        Args:
+            entries (list): RRMPolicyRatioList entries.
+
+        Raises:
+            PolicyBusy: If a policy owning them stayed leased for lock_timeout seconds.
+        """
+        keys = [policy_entry_key(entry) for entry in entries]
+        with self._lock:
+            self._wait_released(lambda: {self._index.get(key) for key in keys})
+
+    def lease(self, policy_id, timeout=None):
+        """
+        Leases a policy outside of plan(), e.g. to re-send its stored entries, until release() or commit().
+
+        Args:
+            policy_id (str): The policy identifier.
+            timeout (float, optional): Seconds to wait for another lease. Defaults to lock_timeout.
+
+        Returns:
+            bool: True once leased, False if the policy stayed leased for timeout seconds.
+        """
+        with self._lock:
+            try:
+                self._wait_released(lambda: {policy_id}, timeout)
+            except PolicyBusy:
+                return False
+            self._leased.add(policy_id)
+            return True
+
+    def release(self, policy_id):
+        """
+        Releases a policy leased by lease() without changing it.
+
+        Args:
+            policy_id (str): The policy identifier.
+        """
+        with self._lock:
+            self._release(policy_id)
+
+    def commit(self, policy_id, entries):
+        """
+        Records a policy as applied on the RIC after a successful PUT.
+
+        Args:
+            policy_id (str): The policy identifier.
+            entries (list): The RRMPolicyRatioList entries the policy now holds.
+        """
+        with self._lock:
+            self._counters["updated" if policy_id in self._policies else "created"] += 1
+            self._policies[policy_id] = {policy_entry_key(entry): entry for entry in entries}
+            for key in self._policies[policy_id]:
+                self._index[key] = policy_id
+            if self.path:
+                self._save()
+            self._release(policy_id)
+
+    def discard(self, policy_id):
+        """
+        Releases the keys reserved by plan() and the lease of a policy whose PUT failed.
+
+        Args:
+            policy_id (str): The policy identifier.
+        """
+        with self._lock:
+            self._counters["failed"] += 1
+            committed = self._policies.get(policy_id, {})
+            for key in [key for key, owner in self._index.items() if owner == policy_id and key not in committed]:
+                del self._index[key]
+            self._release(policy_id)
+
+    def policies(self):
+        """
+        Returns a snapshot of the applied policies.
+
+        Returns:
+            dict: Mapping of policy_id to its RRMPolicyRatioList entries.
+        """
+        with self._lock:
+            return {policy_id: list(entries.values()) for policy_id, entries in self._policies.items()}
+
+    def policy(self, policy_id):
+        """
+        Returns the entries of one applied policy.
+
+        Args:
+            policy_id (str): The policy identifier.
+
+        Returns:
+            list or None: The RRMPolicyRatioList entries, or None if the policy is unknown.
+        """
+        with self._lock:
+            entries = self._policies.get(policy_id)
+            return None if entries is None else list(entries.values())
+
+    def stats(self):
+        """
+        Returns the number of tracked policies and the store counters.
+
+        Returns:
+            dict: Store metrics.
+        """
+        with self._lock:
+            stats = {"policies": len(self._policies), "entries": sum(len(p) for p in self._policies.values())}
+            stats.update(self._counters)
+        return stats
+
+    def _wait_released(self, policy_ids, timeout=None):
+        # Called with the lock held; policy_ids is re-evaluated after every release,
+        # since the keys of a discarded policy may have moved to none or another one
+        deadline = None
+        while True:
+            busy = sorted(policy_id for policy_id in policy_ids() if policy_id in self._leased)
+            if not busy:
+                return
+            if deadline is None:
+                self._counters["waited"] += 1
+                deadline = time.monotonic() + (self.lock_timeout if timeout is None else timeout)
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                self._counters["busy"] += 1
+                raise PolicyBusy(busy)
+            self._released.wait(remaining)
+
+    def _release(self, policy_id):
+        if policy_id in self._leased:
+            self._leased.discard(policy_id)
+            self._released.notify_all()
+
+    def _load(self):
+        try:
+            with open(self.path, 'r') as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.error("Failed to load policy store from %s: %s", self.path, e)
+            return
+        for policy_id, entries in data.get("policies", {}).items():
+            self._policies[policy_id] = {policy_entry_key(entry): entry for entry in entries}
+            for key in self._policies[policy_id]:
+                self._index[key] = policy_id
+        logger.info("Loaded %d policies from %s", len(self._policies), self.path)
+
+    def _save(self):
+        data = {"policies": {policy_id: list(entries.values()) for policy_id, entries in self._policies.items()}}
+        tmp_path = self.path + ".tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logger.error("Failed to persist policy store to %s: %s", self.path, e)
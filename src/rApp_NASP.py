@@ -1,15 +1,36 @@
 import argparse
+import io
 import json
 import logging
 import requests
 import yaml
 import uuid
 import sys
-from tools import create_rrm_policy
-from flask import Flask, request, jsonify
+import metrics
+from tools import create_rrm_policy, merge_rrm_policies
+from descriptor_parser import extract_descriptor, JSONError
+from log_utils import LazyJSON, JSONLinesFormatter, configure_payload_rendering
+from flask import Flask, Response, request, jsonify
+from admission import AdmissionController
+from capacity import CapacityProfileRegistry
+from http_client import create_session
+from policy_cache import RRMPolicyCache
+from policy_journal import JournalReplay, JournalWriteError, PolicyJournal
+from policy_queue import PolicySubmissionQueue
+from policy_schema import PolicyValidator
+from pms_scheduler import PMSOverloaded, PMSScheduler
+from policy_store import PolicyBusy, PolicyStore
 from rApp_catalogue_client import rAppCatalogueClient
+from reconciler import PolicyReconciler
+from registration import CatalogueRegistration
+from ric_router import RICRouter
 
 DEFAULT_CONFIG_FILE_PATH = "src/config/config.yaml"
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/json-seq")
+# Sections whose state lives in the serving process: every gunicorn worker would keep
+# its own copy, so the workers would contradict each other about policies and capacity,
+# and each would rewrite the shared journal file with only its own pending policies
+PROCESS_LOCAL_SECTIONS = ("policy_store", "admission", "policy_queue", "policy_journal")
 
 
 def setup_logging(config):
@@ -17,19 +38,97 @@ def setup_logging(config):
     Configures logging settings for the application.
 
     Args:
-        config (dict): Configuration settings including the desired logging level.
+        config (dict): Configuration settings including the desired logging level, output format
+            ('text' or 'json' for JSON lines) and the maximum rendered payload size.
 
     Returns:
         logging.Logger: Configured logger instance.
     """
-    level = config.get('logging', {}).get('level', 'INFO').upper()  # Default to INFO if not specified
+    log_config = config.get('logging', {})
+    level = log_config.get('level', 'INFO').upper()  # Default to INFO if not specified
     numeric_level = getattr(logging, level, None)
     if not isinstance(numeric_level, int):
         raise ValueError(f'Invalid log level: {level}')
-    logging.basicConfig(level=numeric_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if log_config.get('format') == 'json':
+        handler = logging.StreamHandler()
+        handler.setFormatter(JSONLinesFormatter())
+        logging.basicConfig(level=numeric_level, handlers=[handler])
+    else:
+        logging.basicConfig(level=numeric_level, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    configure_payload_rendering(log_config)
     return logging.getLogger(__name__)
 
 
+def describe_ric_results(ric_results):
+    """
+    Returns the per-RIC results of NASPPolicy.submit_policies as reported in responses.
+
+    Args:
+        ric_results (dict): Per ric_id results.
+
+    Returns:
+        dict: The same results without their metrics 'reason'.
+    """
+    return {ric_id: {field: value for field, value in result.items() if field != "reason"}
+            for ric_id, result in ric_results.items()}
+
+
+def policy_status_code(status, reason):
+    """
+    Returns the HTTP status code answering a /create_slice_policy request.
+
+    Args:
+        status (str): Status of the NASPPolicy.create_policy result.
+        reason (str): Reason of the result.
+
+    Returns:
+        int: 201 on success, 207 when only some RICs applied the policy, 409 when the cell is full,
+        503 when the PMS is overloaded or the policy is busy and 500 otherwise.
+    """
+    if status == "success":
+        return 201
+    if status == "partial":
+        return 207
+    if reason == "admission_rejected":
+        return 409
+    if reason in ("pms_overloaded", "policy_busy"):
+        return 503
+    return 500
+
+
+def buffered_stream(stream):
+    """
+    Returns a request input stream the incremental descriptor parser can read.
+
+    The Flask development server hands out a raw socket stream, whose short
+    reads look like a client disconnect, so it is wrapped in a BufferedReader.
+    gunicorn's input object is already buffered but is not an io stream (it
+    has no readable()), which BufferedReader rejects, so it is returned as is.
+
+    Args:
+        stream: The WSGI input stream of the request.
+
+    Returns:
+        A buffered, file-like stream.
+    """
+    if isinstance(stream, io.RawIOBase):
+        return io.BufferedReader(stream)
+    return stream
+
+
+def process_local_sections(config):
+    """
+    Returns the enabled configuration sections whose state is kept per process.
+
+    Args:
+        config (dict): Configuration settings.
+
+    Returns:
+        list: Names of the enabled sections among PROCESS_LOCAL_SECTIONS.
+    """
+    return [section for section in PROCESS_LOCAL_SECTIONS if (config.get(section) or {}).get('enabled')]
+
+
 def parse_arguments():
     """
     Parses command line arguments specific to the rApp NASP.
@@ -44,24 +143,39 @@ def parse_arguments():
 
 
 class NASPPolicy:
-    def __init__(self, config, logger):
+    def __init__(self, config, logger, session=None):
+        # Shared by every request: per-request data stays in locals and return values,
+        # and the policy store, admission controller, journal and session are thread-safe.
         self.config = config
-        self.slice_policy = {}
         self.e2nodelist = {}
         self.logger = logger
+        self.session = session if session is not None else create_session(config)
+        self.policy_store = PolicyStore.from_config(config)
+        self.capacity = CapacityProfileRegistry.from_config(config)
+        self.admission = AdmissionController.from_config(config)
+        if self.admission is not None and self.policy_store is not None:
+            self.admission.load(self.policy_store.policies())
+        self.journal = PolicyJournal.from_config(config)
+        self.validator = PolicyValidator.from_config(config)
+        self.policy_cache = RRMPolicyCache.from_config(config)
+        self.scheduler = PMSScheduler.from_config(config, self.put_policy_status)
+        self.ric_router = RICRouter.from_config(config)
 
-    def fill_policy_body(self, config, data):
+    @metrics.FILL_POLICY_BODY_SECONDS.time()
+    def fill_policy_body(self, config, data, policy_id=None, ric_id=None):
         """
         Fills the policy body dictionary with the required values from the configuration and data.
 
         Args:
             config (dict): Configuration settings.
             data (dict): Data containing the RRMPolicyRatioList.
+            policy_id (str, optional): Identifier of the policy to update. A new one is generated if omitted.
+            ric_id (str, optional): RIC the policy is applied on. Defaults to nonrtric.ric_id.
 
         Returns:
             dict or None: The policy body if successful, None otherwise.
         """
-        self.logger.debug('Policy data received: %s', json.dumps(data, indent=2))
+        self.logger.debug('Policy data received: %s', LazyJSON(data))
 
         rrm_policy_ratio_list = data.get('RRMPolicyRatioList', [])
         if not rrm_policy_ratio_list:
@@ -75,17 +189,76 @@ class NASPPolicy:
             return None
 
         policybody = {
-            "ric_id": config['nonrtric']['ric_id'],
-            "policy_id": str(uuid.uuid4()),
+            "ric_id": ric_id or config['nonrtric']['ric_id'],
+            "policy_id": policy_id or str(uuid.uuid4()),
             "service_id": config['nonrtric']['service_name'],
             "policy_data": {"RRMPolicyRatioList": rrm_policy_ratio_list},
             "policytype_id": policytype_id,
         }
 
-        self.slice_policy = policybody
+        self.logger.debug('Policy body: %s', LazyJSON(policybody))
+        return policybody
+
+    def ric_for(self, entry):
+        """
+        Returns the RIC an RRMPolicyRatioList entry is applied on.
+
+        Args:
+            entry (dict): An RRMPolicyRatioList entry.
+
+        Returns:
+            str: The ric_id, nonrtric.ric_id unless RIC routing maps the entry elsewhere.
+        """
+        if self.ric_router is None:
+            return self.config['nonrtric']['ric_id']
+        return self.ric_router.ric_for(entry)
+
+    def pms_url(self, ric_id=None):
+        """
+        Returns the PMS base URL of a RIC.
+
+        Args:
+            ric_id (str, optional): The RIC. Defaults to nonrtric.ric_id.
+
+        Returns:
+            str: The base URL of the A1 Policy Management API.
+        """
+        if self.ric_router is not None and ric_id is not None:
+            return self.ric_router.base_url(ric_id) or self.config['nonrtric']['base_url_pms']
+        return self.config['nonrtric']['base_url_pms']
+
+    def build_rrm_policy(self, descriptor):
+        """
+        Builds the RRM policy data of a NASP slice descriptor, reusing cached results when enabled.
+
+        Args:
+            descriptor (dict): NASP slice descriptor.
+
+        Returns:
+            dict: Policy data containing an 'RRMPolicyRatioList', owned by the caller.
+        """
+        if self.policy_cache is None:
+            return create_rrm_policy(descriptor, self.capacity)
+        return self.policy_cache.create_rrm_policy(descriptor, self.capacity)
+
+    def validate_policy(self, policy_data):
+        """
+        Converts policy data to the types of the policy type schema and validates it, when enabled.
+
+        Args:
+            policy_data (dict): Data containing RRMPolicyRatioList, converted in place.
 
-        self.logger.debug('Policy body: %s', json.dumps(self.slice_policy, indent=2))
-        return self.slice_policy
+        Returns:
+            str or None: Why the data does not match the schema, or None if it does.
+        """
+        if self.validator is None:
+            return None
+        try:
+            policytype_id = int(self.config['nonrtric']['policytype_id'])
+        except (KeyError, TypeError, ValueError):
+            return None  # Reported by fill_policy_body
+        with metrics.VALIDATE_POLICY_SECONDS.time():
+            return self.validator.validate(policytype_id, policy_data)
 
     def put_policy(self, body):
         """
@@ -97,38 +270,437 @@ class NASPPolicy:
         Returns:
             bool: True if the policy is created successfully, False otherwise.
         """
-        complete_url = self.config['nonrtric']['base_url_pms'] + "/policies"
+        status = self.put_policy_status(body)
+        return status is not None and status < 400
+
+    def put_policy_status(self, body):
+        """
+        Sends a PUT request to create a policy and returns the PMS response status.
+
+        Args:
+            body (dict): The JSON body of the request.
+
+        Returns:
+            int or None: The HTTP status code, or None if no response was received.
+        """
+        complete_url = self.pms_url(body.get("ric_id")) + "/policies"
         headers = {"content-type": "application/json"}
-        self.logger.debug(f"Sending PUT request to {complete_url} with body: {json.dumps(body, indent=2)}")
+        self.logger.debug("Sending PUT request to %s with body: %s", complete_url, LazyJSON(body))
+        resp = None
         try:
-            resp = requests.put(complete_url, json=body, headers=headers, verify=False)
+            with metrics.PUT_POLICY_SECONDS.time():
+                resp = self.session.put(complete_url, json=body, headers=headers)
+            metrics.PMS_RESPONSES.labels(str(resp.status_code)).inc()
             resp.raise_for_status()
         except requests.exceptions.RequestException as e:
-            self.logger.error(f"Failed to create policy. Error: {e}")
-            return False
+            if resp is None:
+                metrics.PMS_RESPONSES.labels('error').inc()
+            self.logger.error("Failed to create policy. Error: %s", e)
+            return None if resp is None else resp.status_code
         else:
             self.logger.info("Policy created successfully.")
-            return True
+            return resp.status_code
+
+    def send_policy(self, body):
+        """
+        Sends a policy to the PMS, through the PMS scheduler when enabled.
+
+        Args:
+            body (dict): The policy body.
+
+        Returns:
+            dict or None: The body applied on the RIC, or None if the PUT failed.
+
+        Raises:
+            PMSOverloaded: If the scheduler shed the PUT.
+        """
+        if self.scheduler is None:
+            return body if self.put_policy(body) else None
+        return self.scheduler.submit(body)
+
+    def build_policies(self, policy_data):
+        """
+        Builds the policy bodies needed to apply the given policy data.
+
+        Without a policy store this is a single new policy per RIC. With one, the
+        entries are merged into the policies that already own them, and policies
+        whose content would not change are flagged so their PUT can be skipped.
+        Changed policies stay leased in the store until they are committed or
+        discarded. With RIC routing, the entries are split per RIC first, so
+        every policy is applied on a single RIC.
+
+        Args:
+            policy_data (dict): Data containing RRMPolicyRatioList.
+
+        Returns:
+            list or None: (policy body, changed) pairs, or None if the data is invalid.
+
+        Raises:
+            PolicyBusy: If another request kept a policy to update leased for policy_store.lock_timeout.
+            JournalWriteError: If the policies could not be journaled; they are discarded.
+        """
+        rrm_policy_ratio_list = policy_data.get('RRMPolicyRatioList', [])
+        if self.ric_router is None or not rrm_policy_ratio_list:
+            groups = {None: rrm_policy_ratio_list}
+        else:
+            groups = self.ric_router.partition(rrm_policy_ratio_list)
+
+        if self.policy_store is None:
+            policies = []
+            for ric_id, entries in groups.items():
+                policy = self.fill_policy_body(self.config, {"RRMPolicyRatioList": entries}, ric_id=ric_id)
+                if policy is None:
+                    if self.admission is not None:
+                        self.admission.discard(rrm_policy_ratio_list)
+                    return None
+                policies.append((policy, True))
+            return self.journal_policies(policies)
+
+        if not rrm_policy_ratio_list:
+            self.logger.error("No 'RRMPolicyRatioList' found in data")
+            return None
+
+        try:
+            planned = self.policy_store.plan_groups(list(groups.values()))
+        except PolicyBusy:
+            if self.admission is not None:
+                self.admission.discard(rrm_policy_ratio_list)
+            raise
+        policies = []
+        for ric_id, plans in zip(groups, planned):
+            for policy_id, entries, changed in plans:
+                policy = self.fill_policy_body(self.config, {"RRMPolicyRatioList": entries}, policy_id, ric_id)
+                if policy is None:
+                    for planned_policy_id, _, planned_changed in (plan for plans in planned for plan in plans):
+                        if planned_changed:
+                            self.policy_store.discard(planned_policy_id)
+                    if self.admission is not None:
+                        self.admission.discard(rrm_policy_ratio_list)
+                    return None
+                if not changed:
+                    self.logger.info("Policy %s unchanged; skipping PUT.", policy_id)
+                policies.append((policy, changed))
+        return self.journal_policies(policies)
+
+    def journal_policies(self, policies):
+        """
+        Journals the changed policies as pending, so they are replayed if the process dies before their PUT.
+
+        Args:
+            policies (list): (policy body, changed) pairs.
+
+        Returns:
+            list: The same pairs, once the journal records are durable.
+
+        Raises:
+            JournalWriteError: If the journal could not be written; the changed policies are discarded.
+        """
+        if self.journal is not None:
+            try:
+                with metrics.JOURNAL_SECONDS.time():
+                    self.journal.log_pending([policy for policy, changed in policies if changed])
+            except JournalWriteError as e:
+                self.logger.error("%s", e)
+                for policy, changed in policies:
+                    if changed:
+                        self.discard_policy(policy)
+                raise
+        return policies
+
+    def admit_policy(self, policy_data):
+        """
+        Reserves PRB capacity for policy data when admission control is enabled.
+
+        Args:
+            policy_data (dict): Data containing RRMPolicyRatioList.
+
+        Returns:
+            dict or None: The admitted policy data (minPRB possibly scaled down), or None if rejected.
+        """
+        if self.admission is None:
+            return policy_data
+        entries, _ = self.admission.admit(policy_data.get('RRMPolicyRatioList', []))
+        return None if entries is None else {"RRMPolicyRatioList": entries}
+
+    def discard_policy(self, body):
+        """
+        Releases the slices and PRB capacity reserved for a policy that will not be applied.
+
+        Args:
+            body (dict): The policy body built by build_policies.
+        """
+        if self.policy_store is not None:
+            self.policy_store.discard(body["policy_id"])
+        if self.admission is not None:
+            self.admission.discard(body["policy_data"]["RRMPolicyRatioList"])
+        if self.journal is not None:
+            self.journal.log_abort(body["policy_id"])
+
+    def commit_policy(self, body):
+        """
+        Records a policy applied on the RIC in the policy store, admission controller and journal.
+
+        Args:
+            body (dict): The policy body sent to the PMS.
+        """
+        entries = body["policy_data"]["RRMPolicyRatioList"]
+        if self.policy_store is not None:
+            self.policy_store.commit(body["policy_id"], entries)
+        if self.admission is not None:
+            self.admission.commit(entries)
+        if self.journal is not None:
+            self.journal.log_commit(body["policy_id"])
+
+    def submit_policy(self, body):
+        """
+        Sends a policy to the PMS and records the outcome in the policy store.
+
+        Args:
+            body (dict): The policy body built by build_policies.
+
+        Returns:
+            bool: True if the policy is created successfully, False otherwise.
+
+        Raises:
+            PMSOverloaded: If the PMS scheduler shed the PUT; the policy is discarded, as it is on any
+                other error raised while sending it.
+        """
+        try:
+            sent = self.send_policy(body)
+        except Exception:
+            # Discarding also releases the policy's lease, which would otherwise block later updates
+            self.discard_policy(body)
+            raise
+        return self.record_outcome(body, sent)
+
+    def record_outcome(self, body, sent):
+        """
+        Commits a policy applied on the RIC, or discards it if its PUT failed.
+
+        Args:
+            body (dict): The policy body built by build_policies.
+            sent (dict or None): The body applied on the RIC, as returned by send_policy.
+
+        Returns:
+            bool: True if the policy was applied, False otherwise.
+        """
+        if sent is None:
+            self.discard_policy(body)
+            return False
+        self.commit_policy(sent)
+        return True
+
+    def replay_journal(self):
+        """
+        Sends the policies journaled as pending by a previous run that did not see their PUT complete.
+
+        Policies whose PUT fails stay pending and are replayed on the next start.
+        Each policy is leased in the policy store while it is replayed, so requests
+        updating it wait for the replayed entries to be committed.
+
+        Returns:
+            tuple: Number of policies replayed and of policies that failed.
+        """
+        replayed = failed = 0
+        for body in self.journal.pending():
+            self.logger.info("Replaying journaled policy %s.", body["policy_id"])
+            if self.policy_store is not None and not self.policy_store.lease(body["policy_id"]):
+                failed += 1
+                continue
+            try:
+                sent = self.send_policy(body)
+            except PMSOverloaded:
+                sent = None
+            except Exception:
+                # Keep replaying the other policies, and release this one's lease
+                self.logger.exception("Failed to replay journaled policy %s.", body["policy_id"])
+                sent = None
+            if sent is not None:
+                self.commit_policy(sent)
+                replayed += 1
+            else:
+                if self.policy_store is not None:
+                    self.policy_store.release(body["policy_id"])
+                failed += 1
+        if failed:
+            self.logger.error("Failed to replay %d journaled policies; they are kept for the next start.", failed)
+        return replayed, failed
 
     def create_policy(self, policy_data):
         """
         Creates and posts a policy based on provided policy data.
 
+        With PMS scheduler coalescing, a request waiting for a policy leased by
+        another request, or for a token, takes in the entries of the requests
+        that arrive meanwhile for the same slices, and they share its result.
+
         Args:
             policy_data (dict): Data containing RRMPolicyRatioList.
 
         Returns:
-            dict: Result message with status.
+            dict: Result message with status, and a machine-readable 'reason' for metrics.
         """
-        policy = self.fill_policy_body(self.config, policy_data)
-        if policy is None:
-            return {"status": "failure", "message": "Policy data is invalid."}
+        if self.scheduler is None or not self.scheduler.coalesce:
+            return self._create_policy(policy_data)
+        ready = None if self.policy_store is None else self.policy_store.wait_released
+        try:
+            return self.scheduler.coalesce_request(policy_data.get('RRMPolicyRatioList', []), self.ric_for,
+                                                   lambda entries: self._create_policy({"RRMPolicyRatioList": entries}),
+                                                   ready)
+        except PolicyBusy:
+            return {"status": "failure", "reason": "policy_busy",
+                    "message": "The policy is being updated by another request, retry later."}
 
-        success = self.put_policy(policy)
-        if success:
-            return {"status": "success", "message": "Policy created successfully."}
-        else:
-            return {"status": "failure", "message": "Failed to create policy."}
+    def _create_policy(self, policy_data):
+        policies, result = self.prepare_policies(policy_data)
+        if result is not None:
+            return result
+        return self.policy_result(self.submit_policies(policies))
+
+    def prepare_policies(self, policy_data):
+        """
+        Admits policy data and builds the policies to send, or the result of a request that needs no PUT.
+
+        Args:
+            policy_data (dict): Data containing RRMPolicyRatioList.
+
+        Returns:
+            tuple: (policies, None) with the (policy body, changed) pairs to submit, or (None, result)
+            when the request was rejected or changes nothing.
+        """
+        policy_data = self.admit_policy(policy_data)
+        if policy_data is None:
+            return None, {"status": "failure", "message": "Insufficient PRB capacity on the cell.",
+                          "reason": "admission_rejected"}
+
+        try:
+            policies = self.build_policies(policy_data)
+        except PolicyBusy:
+            return None, {"status": "failure", "reason": "policy_busy",
+                          "message": "The policy is being updated by another request, retry later."}
+        except JournalWriteError:
+            return None, {"status": "failure", "message": "Failed to journal the policy.", "reason": "journal_error"}
+        if policies is None:
+            return None, {"status": "failure", "message": "Policy data is invalid.", "reason": "invalid_policy_body"}
+
+        if not any(changed for _, changed in policies):
+            return None, {"status": "success", "message": "Policy unchanged.",
+                          "policy_ids": [policy["policy_id"] for policy, _ in policies], "reason": "unchanged"}
+        return policies, None
+
+    def policy_result(self, ric_results):
+        """
+        Returns the result of a request from the per-RIC results of its PUTs.
+
+        Args:
+            ric_results (dict): Per ric_id results returned by submit_policies.
+
+        Returns:
+            dict: Result message with status, and a machine-readable 'reason' for metrics.
+        """
+        result = self.combine_ric_results(ric_results)
+        if self.ric_router is not None:
+            result["rics"] = describe_ric_results(ric_results)
+        return result
+
+    def submit_policies(self, policies):
+        """
+        Sends the changed policies to the PMS, the policies of every RIC in order and the RICs at the same time.
+
+        Once a PUT fails, the remaining policies of its RIC are discarded, while
+        the other RICs carry on, so a request spanning several RICs may be
+        applied on some of them only.
+
+        Args:
+            policies (list): (policy body, changed) pairs built by build_policies.
+
+        Returns:
+            dict: Per ric_id, a result with status, reason and either the policy_ids or a message.
+        """
+        groups = {}
+        for policy, changed in policies:
+            groups.setdefault(policy["ric_id"], []).append((policy, changed))
+        with metrics.DISPATCH_SECONDS.time():
+            if self.ric_router is None:
+                results = [self._submit_ric_policies(group) for group in groups.values()]
+            else:
+                results = self.ric_router.map(self._submit_ric_policies, groups.values())
+        return dict(zip(groups, results))
+
+    def _submit_ric_policies(self, policies):
+        for position, (policy, changed) in enumerate(policies):
+            if not changed:
+                continue
+            try:
+                if self.submit_policy(policy):
+                    continue
+                shed = None
+            except PMSOverloaded as e:
+                shed = e
+            except Exception:
+                # The remaining policies must still be discarded, or they keep their leases and reservations
+                self.logger.exception("Failed to send policy %s.", policy["policy_id"])
+                shed = None
+            return self.fail_ric_policies(policies, position, shed)
+        return self.ric_success_result(policies)
+
+    def fail_ric_policies(self, policies, position, shed=None):
+        """
+        Discards the changed policies of a RIC after the one whose PUT failed and returns the result of the RIC.
+
+        Args:
+            policies (list): (policy body, changed) pairs of the RIC, in the order they are sent.
+            position (int): Index of the policy whose PUT failed; it was already discarded.
+            shed (PMSOverloaded, optional): The error, if the PMS scheduler shed the PUT.
+
+        Returns:
+            dict: Failure result with message and reason, and 'shed' if the PUT was shed.
+        """
+        for remaining, remaining_changed in policies[position + 1:]:
+            if remaining_changed:
+                self.discard_policy(remaining)
+        if shed is not None:
+            return {"status": "failure", "message": "The PMS is overloaded, retry later.",
+                    "reason": "pms_overloaded", "shed": shed.reason}
+        return {"status": "failure", "message": "Failed to create policy.", "reason": "pms_error"}
+
+    @staticmethod
+    def ric_success_result(policies):
+        """
+        Returns the result of a RIC whose changed policies were all applied.
+
+        Args:
+            policies (list): (policy body, changed) pairs of the RIC.
+
+        Returns:
+            dict: Success result with the policy_ids and reason.
+        """
+        return {"status": "success", "policy_ids": [policy["policy_id"] for policy, _ in policies],
+                "reason": "created" if any(changed for _, changed in policies) else "unchanged"}
+
+    @staticmethod
+    def combine_ric_results(ric_results, ric_ids=None):
+        """
+        Combines the per-RIC results of submit_policies into the result of a request.
+
+        Args:
+            ric_results (dict): Per ric_id results returned by submit_policies.
+            ric_ids (iterable, optional): RICs to combine, e.g. those of one slice. Defaults to all.
+
+        Returns:
+            dict: Result with status ('success', 'partial' or 'failure'), message and 'reason'.
+        """
+        selected = [ric_results[ric_id] for ric_id in (ric_results if ric_ids is None else ric_ids)]
+        failed = [result for result in selected if result["status"] == "failure"]
+        if failed and len(failed) == len(selected):
+            return dict(failed[0])
+        policy_ids = [policy_id for result in selected if result["status"] == "success"
+                      for policy_id in result["policy_ids"]]
+        if failed:
+            return {"status": "partial", "message": "Policy created on some RICs only.", "policy_ids": policy_ids,
+                    "reason": "partial"}
+        return {"status": "success", "message": "Policy created successfully.", "policy_ids": policy_ids,
+                "reason": "created" if any(result["reason"] == "created" for result in selected) else "unchanged"}
 
     def load_e2nodelist(self):
         """
@@ -143,7 +715,7 @@ class NASPPolicy:
                 {"plmnid": "00101", "sst": 1, "sd": 1, "minPRB": 10, "maxPRB": 20}
             ]
         }
-        self.logger.debug("E2 node list loaded: %s", json.dumps(self.e2nodelist, indent=2))
+        self.logger.debug("E2 node list loaded: %s", LazyJSON(self.e2nodelist))
         return self.e2nodelist
 
     def run(self):
@@ -151,7 +723,7 @@ class NASPPolicy:
         Executes the policy creation process.
         """
         self.logger.info('Running the NASP rAPP.')
-        self.logger.debug('Configuration: %s', json.dumps(self.config, indent=2))
+        self.logger.debug('Configuration: %s', LazyJSON(self.config))
         self.load_e2nodelist()
         policy = self.fill_policy_body(self.config, self.e2nodelist)
         if policy:
@@ -160,13 +732,15 @@ class NASPPolicy:
             self.logger.error("Failed to create policy body.")
 
 
-def create_app(config, logger):
+def create_app(config, logger, session=None, registration=None):
     """
     Creates and configures the Flask application.
 
     Args:
         config (dict): Configuration settings.
         logger (logging.Logger): Configured logger.
+        session (requests.Session, optional): Shared HTTP session for Non-RT RIC calls.
+        registration (CatalogueRegistration, optional): rApp catalogue registration reported by /readyz.
 
     Returns:
         Flask: Configured Flask application.
@@ -174,7 +748,85 @@ def create_app(config, logger):
     app = Flask(__name__)
 
     # Initialize NASPPolicy instance
-    nasp_policy = NASPPolicy(config, logger)
+    nasp_policy = NASPPolicy(config, logger, session)
+
+    # Replays the policies a previous run journaled but did not apply; /readyz answers 503 until done
+    journal_replay = None
+    if nasp_policy.journal is not None:
+        journal_replay = JournalReplay(nasp_policy.journal, nasp_policy.replay_journal)
+
+    # Re-applies stored policies missing or drifted on the RIC, None unless enabled
+    reconciler = PolicyReconciler.from_config(config, nasp_policy)
+
+    def start_background_tasks():
+        """
+        Starts the journal replay and the reconciler in the calling process, unless they already run there.
+        """
+        if journal_replay is not None:
+            journal_replay.start()
+        if reconciler is not None:
+            reconciler.start()
+
+    # Threads do not survive fork(): the server starts these in the process that serves
+    # requests (gunicorn's post_worker_init hook), and the first request of a process
+    # starts them if the server did not
+    app.start_background_tasks = start_background_tasks
+    if journal_replay is not None or reconciler is not None:
+        app.before_request(start_background_tasks)
+
+    # Parse descriptors incrementally, keeping only the fields create_rrm_policy reads
+    stream_descriptors = bool(config.get('api_server', {}).get('stream_descriptors', False))
+
+    # Background submission queue, None unless asynchronous mode is enabled
+    def submit_queued_policy(body):
+        try:
+            return nasp_policy.submit_policy(body)
+        except PMSOverloaded as e:
+            logger.warning("PUT of policy %s shed: %s.", body["policy_id"], e.reason)
+            return False
+
+    policy_queue = PolicySubmissionQueue.from_config(config, submit_queued_policy)
+
+    @app.route('/healthz', methods=['GET'])
+    def healthz():
+        """
+        Liveness endpoint: the process is up and serving requests.
+
+        Returns:
+            JSON response with status 'ok'.
+        """
+        return jsonify({"status": "ok"}), 200
+
+    @app.route('/readyz', methods=['GET'])
+    def readyz():
+        """
+        Readiness endpoint reporting the journal replay and the rApp catalogue registration.
+
+        Returns:
+            JSON response, 200 when ready, or 503 while the journal is replayed or a registration
+            required for readiness is not done.
+        """
+        ready = True
+        body = {}
+        if journal_replay is not None:
+            ready = journal_replay.done
+            body["journal_replay"] = "done" if ready else "in_progress"
+        if registration is not None:
+            ready = ready and registration.ready
+            body["registration"] = registration.status()
+        body["status"] = "ready" if ready else "not_ready"
+        return jsonify(body), 200 if ready else 503
+
+    @app.route('/metrics', methods=['GET'])
+    def metrics_endpoint():
+        """
+        API endpoint exposing Prometheus metrics.
+
+        Returns:
+            Metrics in the Prometheus text exposition format.
+        """
+        payload, content_type = metrics.render_metrics()
+        return Response(payload, content_type=content_type)
 
     @app.route('/create_slice_policy', methods=['POST'])
     def create_slice_policy():
@@ -188,21 +840,362 @@ def create_app(config, logger):
         """
         if not request.is_json:
             logger.warning("Received non-JSON request.")
+            metrics.count_request('create_slice_policy', 'failure', 'not_json')
             return jsonify({"status": "failure", "message": "Request must be in JSON format."}), 400
 
-        data = request.get_json()
-        logger.debug(f"Received data: {json.dumps(data, indent=2)}")
-        policy_data = create_rrm_policy(data)
-        if not policy_data:
+        with metrics.PARSE_SECONDS.time():
+            if stream_descriptors:
+                try:
+                    data = extract_descriptor(buffered_stream(request.stream))
+                except JSONError as e:
+                    logger.warning("Received malformed JSON: %s", e)
+                    metrics.count_request('create_slice_policy', 'failure', 'invalid_json')
+                    return jsonify({"status": "failure", "message": "Malformed JSON."}), 400
+            else:
+                data = request.get_json()
+        logger.debug("Received data: %s", LazyJSON(data))
+        with metrics.CREATE_RRM_POLICY_SECONDS.time():
+            policy_data = nasp_policy.build_rrm_policy(data)
+        if not policy_data or not policy_data.get("RRMPolicyRatioList"):
             logger.error("Failed to create policy data from the request.")
+            metrics.count_request('create_slice_policy', 'failure', 'invalid_policy_data')
             return jsonify({"status": "failure", "message": "Invalid policy data."}), 400
 
-        logger.debug(f"Created policy data: %s", json.dumps(policy_data, indent=2))
+        error = nasp_policy.validate_policy(policy_data)
+        if error is not None:
+            logger.warning("Policy data does not match the policy type schema: %s", error)
+            metrics.count_request('create_slice_policy', 'failure', 'schema_mismatch')
+            return jsonify({"status": "failure", "message": f"Invalid policy data: {error}"}), 400
+
+        logger.debug("Created policy data: %s", LazyJSON(policy_data))
+        if policy_queue is not None:
+            return submit_policy_async(policy_data)
+
         result = nasp_policy.create_policy(policy_data)
-        if result["status"] == "success":
-            return jsonify(result), 201
+        reason = result.pop("reason")
+        metrics.count_request('create_slice_policy', result["status"], reason)
+        status_code = policy_status_code(result["status"], reason)
+        response = jsonify(result)
+        if status_code == 503:
+            response.headers["Retry-After"] = "1"
+        return response, status_code
+
+    def submit_policy_async(policy_data):
+        """
+        Builds the policy body and queues it for submission to the PMS.
+
+        Args:
+            policy_data (dict): Data containing RRMPolicyRatioList.
+
+        Returns:
+            JSON response with the policy_id (202), 409 when the cell is full, 503 when the policy is busy,
+            or 429 when the queue is full. A 429 lists the policies queued before the queue filled up, if any,
+            with status 'partial'.
+        """
+        policy_data = nasp_policy.admit_policy(policy_data)
+        if policy_data is None:
+            metrics.count_request('create_slice_policy', 'failure', 'admission_rejected')
+            return jsonify({"status": "failure", "message": "Insufficient PRB capacity on the cell."}), 409
+
+        try:
+            policies = nasp_policy.build_policies(policy_data)
+        except PolicyBusy:
+            metrics.count_request('create_slice_policy', 'failure', 'policy_busy')
+            response = jsonify({"status": "failure",
+                                "message": "The policy is being updated by another request, retry later."})
+            response.headers["Retry-After"] = "1"
+            return response, 503
+        except JournalWriteError:
+            metrics.count_request('create_slice_policy', 'failure', 'journal_error')
+            return jsonify({"status": "failure", "message": "Failed to journal the policy."}), 500
+        if policies is None:
+            metrics.count_request('create_slice_policy', 'failure', 'invalid_policy_body')
+            return jsonify({"status": "failure", "message": "Policy data is invalid."}), 500
+
+        policy_ids = [policy["policy_id"] for policy, _ in policies]
+        if not any(changed for _, changed in policies):
+            metrics.count_request('create_slice_policy', 'success', 'unchanged')
+            return jsonify({"status": "success", "message": "Policy unchanged.", "policy_ids": policy_ids}), 201
+
+        queued = []
+        for position, (policy, changed) in enumerate(policies):
+            if not changed:
+                continue
+            if policy_queue.enqueue(policy["policy_id"], policy):
+                queued.append(policy["policy_id"])
+                continue
+            logger.warning("Policy queue is full; rejecting policy %s.", policy["policy_id"])
+            nasp_policy.discard_policy(policy)
+            for remaining, remaining_changed in policies[position + 1:]:
+                if remaining_changed:
+                    nasp_policy.discard_policy(remaining)
+            if queued:
+                metrics.count_request('create_slice_policy', 'partial', 'queue_full')
+                response = jsonify({"status": "partial", "message": "Policy queue is full; some policies were queued.",
+                                    "policy_ids": queued})
+            else:
+                metrics.count_request('create_slice_policy', 'failure', 'queue_full')
+                response = jsonify({"status": "failure", "message": "Policy queue is full, retry later."})
+            response.headers["Retry-After"] = "1"
+            return response, 429
+
+        metrics.count_request('create_slice_policy', 'success', 'queued')
+        return jsonify({"status": "accepted", "message": "Policy queued for creation.",
+                        "policy_id": policy_ids[0], "policy_ids": policy_ids}), 202
+
+    def read_slice_batch():
+        """
+        Reads a batch of NASP slice descriptions from the request body.
+
+        Accepts either a JSON array or NDJSON (one description per line).
+
+        Returns:
+            list or None: The slice descriptions, or None if the body is malformed.
+        """
+        if request.mimetype in NDJSON_MIMETYPES:
+            slices = []
+            try:
+                for line in request.stream:
+                    line = line.strip()
+                    if line:
+                        slices.append(json.loads(line))
+            except ValueError:
+                return None
+            return slices
+
+        data = request.get_json(silent=True)
+        return data if isinstance(data, list) else None
+
+    @app.route('/create_slice_policies', methods=['POST'])
+    def create_slice_policies():
+        """
+        API endpoint to create policies for many slices at once.
+
+        Expects a JSON array or an NDJSON stream of NASP slice descriptions. The
+        RRM policies of all slices are merged and deduplicated per (ric_id, nci)
+        and sent to the PMS as a single policy.
+
+        Returns:
+            JSON response with the status of every slice.
+        """
+        if not request.is_json and request.mimetype not in NDJSON_MIMETYPES:
+            logger.warning("Received non-JSON request.")
+            metrics.count_request('create_slice_policies', 'failure', 'not_json')
+            return jsonify({"status": "failure", "message": "Request must be a JSON array or NDJSON."}), 400
+
+        with metrics.PARSE_SECONDS.time():
+            slices = read_slice_batch()
+        if slices is None:
+            metrics.count_request('create_slice_policies', 'failure', 'invalid_json')
+            return jsonify({"status": "failure", "message": "Invalid data format. Expected a list of slices."}), 400
+
+        results = []
+        accepted = []
+        accepted_results = []
+        for index, data in enumerate(slices):
+            result = {"index": index, "name": data.get("name") if isinstance(data, dict) else None}
+            with metrics.CREATE_RRM_POLICY_SECONDS.time():
+                policy_data = nasp_policy.build_rrm_policy(data) if isinstance(data, dict) else None
+            error = nasp_policy.validate_policy(policy_data) if policy_data else None
+            if not policy_data or not policy_data.get("RRMPolicyRatioList"):
+                result.update({"status": "failure", "message": "Invalid policy data."})
+            elif error is not None:
+                result.update({"status": "failure", "message": f"Invalid policy data: {error}"})
+            else:
+                accepted.append(policy_data)
+                accepted_results.append(result)
+            results.append(result)
+
+        if not accepted:
+            metrics.count_request('create_slice_policies', 'failure', 'invalid_policy_data')
+            return jsonify({"status": "failure", "message": "No valid slices in request.", "slices": results}), 400
+
+        if nasp_policy.admission is not None:
+            # Admit as many slices as the cells can hold
+            packed = nasp_policy.admission.pack([policy_data["RRMPolicyRatioList"] for policy_data in accepted])
+            for result, entries in zip(accepted_results, packed):
+                if entries is None:
+                    result.update({"status": "failure", "message": "Insufficient PRB capacity on the cell."})
+            accepted_results = [result for result, entries in zip(accepted_results, packed) if entries is not None]
+            accepted = [{"RRMPolicyRatioList": entries} for entries in packed if entries is not None]
+            if not accepted:
+                metrics.count_request('create_slice_policies', 'failure', 'admission_rejected')
+                return jsonify({"status": "failure", "message": "No slice fits on its cell.", "slices": results}), 409
+
+        merged = merge_rrm_policies(accepted)
+        entries = [entry for policy in merged.values() for entry in policy["RRMPolicyRatioList"]]
+        logger.info("Merged %d slices into %d RRM policy entries for %d cells.",
+                    len(accepted), len(entries), len(merged))
+
+        ric_results = None
+        try:
+            policies = nasp_policy.build_policies({"RRMPolicyRatioList": entries})
+        except PolicyBusy:
+            outcome = {"status": "failure", "message": "The policy is being updated by another request, retry later."}
+            reason = 'policy_busy'
+        except JournalWriteError:
+            outcome = {"status": "failure", "message": "Failed to journal the policy."}
+            reason = 'journal_error'
+        else:
+            if policies is None:
+                outcome = {"status": "failure", "message": "Policy data is invalid."}
+                reason = 'invalid_policy_body'
+            elif policy_queue is not None:
+                outcome = {"status": "success", "message": "Policy created successfully.",
+                           "policy_ids": [policy["policy_id"] for policy, _ in policies]}
+                reason = 'unchanged'
+                for position, (policy, changed) in enumerate(policies):
+                    if not changed:
+                        continue
+                    if policy_queue.enqueue(policy["policy_id"], policy):
+                        outcome.update({"status": "accepted", "message": "Policy queued for creation."})
+                        reason = 'queued'
+                        continue
+                    nasp_policy.discard_policy(policy)
+                    outcome = {"status": "failure", "message": "Policy queue is full, retry later."}
+                    reason = 'queue_full'
+                    for remaining, remaining_changed in policies[position + 1:]:
+                        if remaining_changed:
+                            nasp_policy.discard_policy(remaining)
+                    break
+            else:
+                ric_results = nasp_policy.submit_policies(policies)
+                outcome = None
+                reason = nasp_policy.combine_ric_results(ric_results)["reason"]
+
+        for result, policy_data in zip(accepted_results, accepted):
+            if outcome is not None:
+                result.update(outcome)
+            else:
+                # A slice succeeded if every RIC its cells are on applied the policy
+                ric_ids = {nasp_policy.ric_for(entry) for entry in policy_data["RRMPolicyRatioList"]}
+                slice_result = nasp_policy.combine_ric_results(ric_results, ric_ids)
+                del slice_result["reason"]
+                result.update(slice_result)
+
+        succeeded = sum(1 for result in results if result["status"] in ("success", "accepted"))
+        if succeeded == len(results):
+            status_code = 202 if outcome is not None and outcome["status"] == "accepted" else 201
+        elif succeeded:
+            status_code = 207
         else:
-            return jsonify(result), 500
+            status_code = 503 if reason in ('pms_overloaded', 'policy_busy') else 500
+        summary = "success" if succeeded == len(results) else "partial" if succeeded else "failure"
+        metrics.count_request('create_slice_policies', summary, reason)
+        response = {"status": summary, "slices": results}
+        if ric_results is not None and nasp_policy.ric_router is not None:
+            response["rics"] = describe_ric_results(ric_results)
+        return jsonify(response), status_code
+
+    @app.route('/policy_status/<policy_id>', methods=['GET'])
+    def policy_status(policy_id):
+        """
+        API endpoint reporting the progress of an asynchronously submitted policy.
+
+        Returns:
+            JSON status record, or 404 if the policy is unknown.
+        """
+        record = policy_queue.status(policy_id) if policy_queue is not None else None
+        if record is None:
+            return jsonify({"status": "failure", "message": "Unknown policy_id."}), 404
+        return jsonify(record), 200
+
+    @app.route('/policy_store/stats', methods=['GET'])
+    def policy_store_stats():
+        """
+        API endpoint exposing the policy store counters.
+
+        Returns:
+            JSON store metrics (created, updated, skipped PUTs), or 404 if the store is disabled.
+        """
+        if nasp_policy.policy_store is None:
+            return jsonify({"status": "failure", "message": "Policy store is disabled."}), 404
+        return jsonify(nasp_policy.policy_store.stats()), 200
+
+    @app.route('/admission/stats', methods=['GET'])
+    def admission_stats():
+        """
+        API endpoint exposing the PRB reserved on every cell and the admission counters.
+
+        Returns:
+            JSON admission metrics, or 404 if admission control is disabled.
+        """
+        if nasp_policy.admission is None:
+            return jsonify({"status": "failure", "message": "Admission control is disabled."}), 404
+        return jsonify(nasp_policy.admission.stats()), 200
+
+    @app.route('/policy_journal/stats', methods=['GET'])
+    def policy_journal_stats():
+        """
+        API endpoint exposing the uncommitted policies and counters of the write-ahead journal.
+
+        Returns:
+            JSON journal metrics, or 404 if the journal is disabled.
+        """
+        if nasp_policy.journal is None:
+            return jsonify({"status": "failure", "message": "Policy journal is disabled."}), 404
+        return jsonify(nasp_policy.journal.stats()), 200
+
+    @app.route('/policy_cache/stats', methods=['GET'])
+    def policy_cache_stats():
+        """
+        API endpoint exposing the size and hit/miss counters of the RRM policy cache.
+
+        Returns:
+            JSON cache metrics, or 404 if the cache is disabled.
+        """
+        if nasp_policy.policy_cache is None:
+            return jsonify({"status": "failure", "message": "Policy cache is disabled."}), 404
+        return jsonify(nasp_policy.policy_cache.stats()), 200
+
+    @app.route('/policy_cache/invalidate', methods=['POST'])
+    def policy_cache_invalidate():
+        """
+        API endpoint dropping every cached RRM policy, e.g. after the capacity model changed.
+
+        Returns:
+            JSON cache metrics after invalidation, or 404 if the cache is disabled.
+        """
+        if nasp_policy.policy_cache is None:
+            return jsonify({"status": "failure", "message": "Policy cache is disabled."}), 404
+        nasp_policy.policy_cache.invalidate()
+        return jsonify(nasp_policy.policy_cache.stats()), 200
+
+    @app.route('/pms_scheduler/stats', methods=['GET'])
+    def pms_scheduler_stats():
+        """
+        API endpoint exposing the circuit state and counters of the PMS scheduler.
+
+        Returns:
+            JSON scheduler metrics (sent, coalesced and shed PUTs), or 404 if the scheduler is disabled.
+        """
+        if nasp_policy.scheduler is None:
+            return jsonify({"status": "failure", "message": "PMS scheduler is disabled."}), 404
+        return jsonify(nasp_policy.scheduler.stats()), 200
+
+    @app.route('/reconciler/stats', methods=['GET'])
+    def reconciler_stats():
+        """
+        API endpoint exposing the reconcile counters and the outcome of the last cycle.
+
+        Returns:
+            JSON reconciler metrics, or 404 if the reconciler is disabled.
+        """
+        if reconciler is None:
+            return jsonify({"status": "failure", "message": "Reconciler is disabled."}), 404
+        return jsonify(reconciler.stats()), 200
+
+    @app.route('/policy_queue/stats', methods=['GET'])
+    def policy_queue_stats():
+        """
+        API endpoint exposing the depth and counters of the submission queue.
+
+        Returns:
+            JSON queue metrics, or 404 if asynchronous mode is disabled.
+        """
+        if policy_queue is None:
+            return jsonify({"status": "failure", "message": "Asynchronous mode is disabled."}), 404
+        return jsonify(policy_queue.stats()), 200
 
     return app
 
@@ -225,26 +1218,51 @@ if __name__ == "__main__":
     logger = setup_logging(config)
     logger.debug("Configuration loaded successfully.")
 
-    register = rAppCatalogueClient(args.config)
+    api_config = config.get('api_server', {})
+    if api_config.get('server') == 'gunicorn':
+        from wsgi_server import DEFAULT_GUNICORN_CONFIG
 
-    if register.register_service():
-        logger.info("Service successfully registered on rApp catalogue.")
-    else:
-        logger.error("Failed to register service.")
+        sections = process_local_sections(config)
+        if int(api_config.get('workers', DEFAULT_GUNICORN_CONFIG['workers'])) > 1 and sections:
+            logger.error("api_server.workers must be 1 while %s is enabled: every gunicorn worker would keep "
+                         "its own copy and answer from it.", ", ".join(sections))
+            sys.exit(1)
+
+    # One pooled session for every call to the Non-RT RIC
+    session = create_session(config)
+
+    register = rAppCatalogueClient(config, session)
+    registration, background = CatalogueRegistration.from_config(config, register)
+    if background:
+        # Serve requests while registering; /readyz reports the registration state
+        registration.start()
+    elif not registration.run():
         sys.exit(1)
 
-    # Retrieve API server configurations from config file
-    api_config = config.get('api_server', {})
+    # API server settings from the 'api_server' section
     host = api_config.get('host', '0.0.0.0')  # Default to '0.0.0.0' if not specified
     port = api_config.get('port', 5000)       # Default to 5000 if not specified
+    server = api_config.get('server', 'flask')  # 'flask' (development), 'gunicorn' or 'asgi'
 
-    # Create Flask app
-    app = create_app(config, logger)
-
-    # Run Flask app
     try:
-        logger.info(f"Starting API server at {host}:{port}")
-        app.run(host=host, port=port)
+        logger.info("Starting API server (%s) at %s:%s", server, host, port)
+        if server == 'gunicorn':
+            from wsgi_server import run_gunicorn
+
+            # Workers must not share the connections opened for registration,
+            # so the app gets its own session, opened lazily after the fork.
+            run_gunicorn(lambda: create_app(config, logger, registration=registration), api_config)
+        elif server == 'asgi':
+            from asgi_app import create_asgi_app, run_uvicorn
+
+            run_uvicorn(create_asgi_app(config, logger, registration), api_config)
+        elif server == 'flask':
+            app = create_app(config, logger, session, registration)
+            app.start_background_tasks()
+            app.run(host=host, port=port)
+        else:
+            logger.error("Unknown api_server.server: %s", server)
+            sys.exit(1)
     except Exception as e:
-        logger.error(f"Failed to start API server: {e}")
+        logger.error("Failed to start API server: %s", e)
         sys.exit(1)
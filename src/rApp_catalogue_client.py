@@ -1,6 +1,8 @@
 import requests
 import yaml
 import logging
+from http_client import create_session
+from metrics import CATALOGUE_REGISTRATION_SECONDS
 
 logger = logging.getLogger(__name__)
 
@@ -16,24 +18,29 @@ class rAppCatalogueClient:
         description (str): The description of the service to register.
     """
 
-    def __init__(self, config_file_path):
+    def __init__(self, config, session=None):
         """
         Initializes a new instance of the rAppCatalalogueClient class.
 
         Args:
-            config_file_path (str): The path to the YAML configuration file.
+            config (dict or str): Configuration settings already loaded by the caller, or the path
+                to the YAML configuration file.
+            session (requests.Session, optional): Shared HTTP session. A new pooled session is created if omitted.
         """
-        # Load configuration from the YAML file
-        with open(config_file_path, 'r') as f:
-            config = yaml.safe_load(f)
-        
+        if isinstance(config, str):
+            # Load configuration from the YAML file
+            with open(config, 'r') as f:
+                config = yaml.safe_load(f)
+
         # Initialize attributes based on configuration
         self.base_url = config['nonrtric']['base_url_rApp_catalogue']
         self.service_name = config['nonrtric']['service_name']
         self.version = config['nonrtric']['service_version']
         self.display_name = config['nonrtric']['service_display_name']
         self.description = config['nonrtric']['service_description']
+        self.session = session if session is not None else create_session(config)
 
+    @CATALOGUE_REGISTRATION_SECONDS.time()
     def register_service(self):
         """
         Sends a PUT request to a specified URL with a JSON payload containing the version, display name,
@@ -50,7 +57,11 @@ class rAppCatalogueClient:
             "display_name": self.display_name,
             "description": self.description,
         }
-        resp = requests.put(complete_url, json=body, headers=headers, verify=False)
+        try:
+            resp = self.session.put(complete_url, json=body, headers=headers)
+        except requests.exceptions.RequestException as e:
+            logger.error("Failed to register service: %s", e)
+            return False
         if not resp.ok:
             logger.error("Failed to register service: %s", resp.text)
             return False
@@ -0,0 +1,269 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+import metrics
+from pms_scheduler import PMSOverloaded
+from tools import policy_entry_key
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'reconciler' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_RECONCILER_CONFIG = {
+    'enabled': False,       # Periodically check the policies on the RIC against the policy store
+    'interval': 60.0,       # Seconds between reconcile cycles
+    'concurrency': 4,       # Policies read or re-applied at the same time
+}
+
+IN_SYNC = "in_sync"
+MISSING = "missing"
+DRIFTED = "drifted"
+ERROR = "error"
+
+
+def entries_digest(entries):
+    """
+    Returns a digest of RRMPolicyRatioList entries that does not depend on their order.
+
+    Args:
+        entries (list): RRMPolicyRatioList entries.
+
+    Returns:
+        str: Hex digest.
+    """
+    ordered = sorted(entries, key=policy_entry_key)
+    return hashlib.sha1(json.dumps(ordered, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class PolicyReconciler:
+    """
+    Periodically re-applies the policies of the policy store that are missing or drifted on the RIC.
+
+    Every cycle lists the policies of this service on each RIC through the A1
+    Policy API, then reads back each policy of the store that is listed and
+    compares a digest of its entries with the stored ones. The ETag of a policy
+    found in sync is kept and sent as If-None-Match on the next cycle, so a
+    PMS that supports ETags answers 304 without a body for unchanged policies.
+    Missing and drifted policies are PUT again with the stored entries.
+
+    Attributes:
+        nasp_policy (NASPPolicy): Source of the intended policies and of the PMS session.
+        interval (float): Seconds between reconcile cycles.
+        concurrency (int): Policies read or re-applied at the same time.
+    """
+
+    def __init__(self, nasp_policy, interval=60.0, concurrency=4):
+        """
+        Initializes the reconciler. The reconcile thread starts with start().
+
+        Args:
+            nasp_policy (NASPPolicy): Source of the intended policies and of the PMS session.
+            interval (float): Seconds between reconcile cycles.
+            concurrency (int): Policies read or re-applied at the same time.
+        """
+        self.nasp_policy = nasp_policy
+        self.interval = interval
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self._etags = {}
+        self._counters = {"cycles": 0, IN_SYNC: 0, MISSING: 0, DRIFTED: 0, "reapplied": 0, "failed": 0, ERROR: 0}
+        self._last_cycle = None
+        self._stop = threading.Event()
+        self._thread_pid = None
+
+    @classmethod
+    def from_config(cls, config, nasp_policy):
+        """
+        Creates a reconciler from the 'reconciler' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+            nasp_policy (NASPPolicy): Source of the intended policies and of the PMS session.
+
+        Returns:
+            PolicyReconciler or None: The reconciler, or None if disabled or the policy store is disabled.
+        """
+        reconciler_config = dict(DEFAULT_RECONCILER_CONFIG)
+        reconciler_config.update(config.get('reconciler') or {})
+        if not reconciler_config['enabled']:
+            return None
+        if nasp_policy.policy_store is None:
+            logger.warning("The reconciler needs the policy store; reconciliation is disabled.")
+            return None
+        return cls(nasp_policy, interval=float(reconciler_config['interval']),
+                   concurrency=int(reconciler_config['concurrency']))
+
+    def start(self):
+        """
+        Starts the reconcile thread in the calling process, unless it already runs there.
+
+        Threads do not survive fork(), so servers that fork workers call this from
+        the workers rather than from the process that created the reconciler.
+        """
+        with self._lock:
+            if self._thread_pid == os.getpid():
+                return
+            self._thread_pid = os.getpid()
+        threading.Thread(target=self._run, name="policy-reconciler", daemon=True).start()
+
+    def stop(self):
+        """
+        Stops the reconcile thread after the current cycle.
+        """
+        self._stop.set()
+
+    def reconcile(self):
+        """
+        Runs one reconcile cycle.
+
+        Returns:
+            dict or None: Number of policies per outcome, or None if the policies could not be listed.
+        """
+        started = time.perf_counter()
+        intended = {}
+        rics = {}
+        for policy_id, entries in self.nasp_policy.policy_store.policies().items():
+            intended[policy_id] = entries_digest(entries)
+            # build_policies never spreads a policy over several RICs
+            rics.setdefault(self.nasp_policy.ric_for(entries[0] if entries else {}), []).append(policy_id)
+
+        outcomes = {}
+        present = []
+        unlisted = 0
+        for ric_id, policy_ids in rics.items():
+            listed = self._list_policies(ric_id)
+            if listed is None:
+                unlisted += 1
+                continue
+            for policy_id in policy_ids:
+                if policy_id in listed:
+                    present.append(policy_id)
+                else:
+                    outcomes[policy_id] = MISSING
+        if unlisted:
+            with self._lock:
+                self._counters[ERROR] += unlisted
+            if unlisted == len(rics):
+                return None
+        ric_of = {policy_id: ric_id for ric_id, policy_ids in rics.items() for policy_id in policy_ids}
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            checked = executor.map(lambda p: self._check(p, ric_of[p], intended[p]), present)
+            for policy_id, outcome in zip(present, checked):
+                outcomes[policy_id] = outcome
+            stale = [policy_id for policy_id, outcome in outcomes.items() if outcome in (MISSING, DRIFTED)]
+            reapplied = list(executor.map(lambda p: self._reapply(p, ric_of[p], intended[p]), stale))
+
+        summary = {IN_SYNC: 0, MISSING: 0, DRIFTED: 0, ERROR: 0}
+        for outcome in outcomes.values():
+            summary[outcome] += 1
+            metrics.RECONCILED_POLICIES.labels(outcome).inc()
+        summary["reapplied"] = sum(1 for result in reapplied if result)
+        summary["failed"] = sum(1 for result in reapplied if result is False)
+        summary["duration"] = time.perf_counter() - started
+        metrics.RECONCILE_SECONDS.observe(summary["duration"])
+
+        with self._lock:
+            for policy_id in [policy_id for policy_id in self._etags if policy_id not in intended]:
+                del self._etags[policy_id]
+            self._counters["cycles"] += 1
+            for key in (IN_SYNC, MISSING, DRIFTED, ERROR, "reapplied", "failed"):
+                self._counters[key] += summary[key]
+            self._last_cycle = summary
+        if stale:
+            logger.warning("Reconciled %d missing and %d drifted policies (%d re-applied).",
+                           summary[MISSING], summary[DRIFTED], summary["reapplied"])
+        return summary
+
+    def stats(self):
+        """
+        Returns the reconcile counters and the outcome of the last cycle.
+
+        Returns:
+            dict: Reconciler metrics.
+        """
+        with self._lock:
+            stats = dict(self._counters)
+            stats["last_cycle"] = dict(self._last_cycle) if self._last_cycle else None
+            stats["interval"] = self.interval
+        return stats
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            try:
+                self.reconcile()
+            except Exception:
+                logger.exception("Reconcile cycle failed.")
+
+    def _policies_url(self, ric_id):
+        return self.nasp_policy.pms_url(ric_id) + "/policies"
+
+    def _list_policies(self, ric_id):
+        nonrtric = self.nasp_policy.config['nonrtric']
+        params = {"ric_id": ric_id, "service_id": nonrtric['service_name'],
+                  "policytype_id": nonrtric['policytype_id']}
+        try:
+            resp = self.nasp_policy.session.get(self._policies_url(ric_id), params=params)
+            resp.raise_for_status()
+            return set(resp.json().get("policy_ids", []))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.error("Failed to list the policies of %s on the PMS: %s", ric_id, e)
+            return None
+
+    def _check(self, policy_id, ric_id, digest):
+        with self._lock:
+            cached = self._etags.get(policy_id)
+        headers = {}
+        if cached is not None and cached[1] == digest:
+            headers["If-None-Match"] = cached[0]
+        try:
+            resp = self.nasp_policy.session.get(f"{self._policies_url(ric_id)}/{policy_id}", headers=headers)
+            if resp.status_code == 304:
+                return IN_SYNC
+            if resp.status_code == 404:
+                return MISSING
+            resp.raise_for_status()
+            remote = (resp.json().get("policy_data") or {}).get("RRMPolicyRatioList", [])
+        except (requests.exceptions.RequestException, ValueError, AttributeError) as e:
+            logger.error("Failed to read policy %s from the PMS: %s", policy_id, e)
+            return ERROR
+
+        etag = resp.headers.get("ETag")
+        with self._lock:
+            if entries_digest(remote) != digest:
+                self._etags.pop(policy_id, None)
+                return DRIFTED
+            if etag:
+                self._etags[policy_id] = (etag, digest)
+        return IN_SYNC
+
+    def _reapply(self, policy_id, ric_id, digest):
+        # A request holding the policy's lease sends the new entries itself;
+        # otherwise the lease keeps requests from committing while the stored
+        # entries are re-sent, so an older body never lands after a newer one.
+        store = self.nasp_policy.policy_store
+        if not store.lease(policy_id, timeout=0):
+            return None
+        try:
+            entries = store.policy(policy_id)
+            if entries is None or entries_digest(entries) != digest:
+                return None
+            body = self.nasp_policy.fill_policy_body(self.nasp_policy.config, {"RRMPolicyRatioList": entries},
+                                                     policy_id, ric_id)
+            if body is None:
+                return False
+            logger.info("Re-applying policy %s.", policy_id)
+            try:
+                return self.nasp_policy.send_policy(body) is not None
+            except PMSOverloaded as e:
+                logger.warning("Re-applying policy %s shed: %s.", policy_id, e.reason)
+                return False
+        finally:
+            store.release(policy_id)
@@ -0,0 +1,169 @@
+import logging
+import mmap
+import random
+import struct
+import threading
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'catalogue_registration' section (or any of its
+# keys) is missing from the configuration file.
+DEFAULT_REGISTRATION_CONFIG = {
+    'background': True,             # Register while the API starts; False blocks startup until registered
+    'max_attempts': 0,              # Attempts before giving up; 0 retries until registered
+    'initial_backoff': 1.0,         # Seconds before the first retry
+    'max_backoff': 60.0,            # Upper bound of the exponential backoff
+    'required_for_readiness': False,  # Report not ready (/readyz 503) until registered
+}
+
+PENDING = 0
+REGISTERED = 1
+FAILED = 2
+STATE_NAMES = {PENDING: "pending", REGISTERED: "registered", FAILED: "failed"}
+
+# State byte and attempt counter
+_STATE_FORMAT = "=BI"
+
+
+class CatalogueRegistration:
+    """
+    Registers the rApp on the rApp catalogue, retrying with exponential backoff.
+
+    The state lives in an anonymous shared memory mapping, so gunicorn workers
+    forked after the registration started report the state of the registration
+    running in the master process.
+
+    Attributes:
+        client (rAppCatalogueClient): Client used to register the service.
+        max_attempts (int): Attempts before giving up; 0 retries until registered.
+        initial_backoff (float): Seconds before the first retry.
+        max_backoff (float): Upper bound of the backoff in seconds.
+        required_for_readiness (bool): Whether readiness waits for the registration.
+    """
+
+    def __init__(self, client, max_attempts=0, initial_backoff=1.0, max_backoff=60.0, required_for_readiness=False):
+        """
+        Initializes the registration in the pending state.
+
+        Args:
+            client (rAppCatalogueClient): Client used to register the service.
+            max_attempts (int): Attempts before giving up; 0 retries until registered.
+            initial_backoff (float): Seconds before the first retry.
+            max_backoff (float): Upper bound of the backoff in seconds.
+            required_for_readiness (bool): Whether readiness waits for the registration.
+        """
+        self.client = client
+        self.max_attempts = max_attempts
+        self.initial_backoff = initial_backoff
+        self.max_backoff = max_backoff
+        self.required_for_readiness = required_for_readiness
+        self._shared = mmap.mmap(-1, struct.calcsize(_STATE_FORMAT))
+        self._set(PENDING, 0)
+        self._stop = threading.Event()
+        self._thread = None
+
+    @classmethod
+    def from_config(cls, config, client):
+        """
+        Creates a registration from the 'catalogue_registration' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+            client (rAppCatalogueClient): Client used to register the service.
+
+        Returns:
+            tuple: (CatalogueRegistration, background), where background tells whether to
+            register in a background thread (start()) or before serving (run()).
+        """
+        registration_config = dict(DEFAULT_REGISTRATION_CONFIG)
+        registration_config.update(config.get('catalogue_registration') or {})
+        registration = cls(client, max_attempts=int(registration_config['max_attempts']),
+                           initial_backoff=float(registration_config['initial_backoff']),
+                           max_backoff=float(registration_config['max_backoff']),
+                           required_for_readiness=bool(registration_config['required_for_readiness']))
+        return registration, bool(registration_config['background'])
+
+    @property
+    def state(self):
+        """
+        str: 'pending', 'registered' or 'failed'.
+        """
+        return STATE_NAMES[self._get()[0]]
+
+    @property
+    def attempts(self):
+        """
+        int: Registration attempts made so far.
+        """
+        return self._get()[1]
+
+    @property
+    def ready(self):
+        """
+        bool: Whether the rApp may receive traffic as far as the registration is concerned.
+        """
+        return not self.required_for_readiness or self._get()[0] == REGISTERED
+
+    def start(self):
+        """
+        Registers in a background thread.
+
+        Returns:
+            CatalogueRegistration: self.
+        """
+        self._thread = threading.Thread(target=self.run, name="catalogue-registration", daemon=True)
+        self._thread.start()
+        return self
+
+    def run(self):
+        """
+        Registers, retrying with exponential backoff and jitter until registered or out of attempts.
+
+        Returns:
+            bool: True if the service was registered, False otherwise.
+        """
+        attempt = 0
+        backoff = self.initial_backoff
+        while not self._stop.is_set():
+            attempt += 1
+            self._set(PENDING, attempt)
+            if self.client.register_service():
+                self._set(REGISTERED, attempt)
+                logger.info("Service successfully registered on rApp catalogue after %d attempt(s).", attempt)
+                return True
+            if self.max_attempts and attempt >= self.max_attempts:
+                break
+            delay = random.uniform(backoff / 2, backoff)
+            logger.warning("Registration attempt %d failed; retrying in %.2f s.", attempt, delay)
+            self._stop.wait(delay)
+            backoff = min(backoff * 2, self.max_backoff)
+        self._set(FAILED, attempt)
+        logger.error("Failed to register service after %d attempt(s).", attempt)
+        return False
+
+    def stop(self, timeout=None):
+        """
+        Stops retrying and waits for the background thread.
+
+        Args:
+            timeout (float, optional): Seconds to wait for the thread.
+        """
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def status(self):
+        """
+        Returns the registration state.
+
+        Returns:
+            dict: State, attempts and whether readiness depends on the registration.
+        """
+        state, attempts = self._get()
+        return {"state": STATE_NAMES[state], "attempts": attempts, "required_for_readiness": self.required_for_readiness}
+
+    def _get(self):
+        return struct.unpack_from(_STATE_FORMAT, self._shared)
+
+    def _set(self, state, attempts):
+        struct.pack_into(_STATE_FORMAT, self._shared, 0, state, attempts)
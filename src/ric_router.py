@@ -0,0 +1,165 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Defaults applied when the 'ric_routing' section (or any of its keys) is
+# missing from the configuration file.
+DEFAULT_RIC_ROUTING_CONFIG = {
+    'enabled': False,   # Send every policy to nonrtric.ric_id when false
+    'workers': 8,       # Threads sending policies to the other RICs of a request, shared by all requests
+    'rics': {},         # Per ric_id: 'ncis', 'plmns' (mcc + mnc) and an optional 'base_url_pms'
+}
+
+
+def entry_plmn(entry):
+    """
+    Returns the PLMN of an RRMPolicyRatioList entry as the concatenation of its mcc and mnc.
+
+    Args:
+        entry (dict): An RRMPolicyRatioList entry.
+
+    Returns:
+        str: The PLMN, e.g. '20893'.
+    """
+    plmn_id = entry.get("plmnId") or {}
+    return f"{plmn_id.get('mcc', '')}{plmn_id.get('mnc', '')}"
+
+
+class RICRouter:
+    """
+    Maps RRMPolicyRatioList entries to the near-RT RIC serving their cell, and sends per-RIC work in parallel.
+
+    An entry goes to the RIC listing its nci, else to the RIC listing its
+    PLMN, else to the default RIC (nonrtric.ric_id). Every RIC may be reached
+    through its own PMS.
+
+    Attributes:
+        default_ric_id (str): RIC of the entries no other RIC claims.
+        workers (int): Threads sending policies to the other RICs of a request.
+    """
+
+    def __init__(self, default_ric_id, rics=None, workers=8):
+        """
+        Initializes the router. The dispatch threads start with the first request spanning several RICs.
+
+        Args:
+            default_ric_id (str): RIC of the entries no other RIC claims.
+            rics (dict, optional): Per ric_id, a dict with 'ncis', 'plmns' and 'base_url_pms'.
+            workers (int): Threads sending policies to the other RICs of a request.
+
+        Raises:
+            ValueError: If a cell or PLMN is listed under two RICs.
+        """
+        self.default_ric_id = default_ric_id
+        self.workers = workers
+        self._by_nci = {}
+        self._by_plmn = {}
+        self._urls = {}
+        for ric_id, ric in (rics or {}).items():
+            ric = ric or {}
+            for nci in ric.get('ncis') or []:
+                self._claim(self._by_nci, str(nci), ric_id, "nci")
+            for plmn in ric.get('plmns') or []:
+                self._claim(self._by_plmn, str(plmn), ric_id, "PLMN")
+            if ric.get('base_url_pms'):
+                self._urls[ric_id] = ric['base_url_pms']
+        self._lock = threading.Lock()
+        self._executor = None
+        self._executor_pid = None
+
+    @classmethod
+    def from_config(cls, config):
+        """
+        Creates a router from the 'ric_routing' configuration section.
+
+        Args:
+            config (dict): Configuration settings.
+
+        Returns:
+            RICRouter or None: The router, or None if disabled.
+
+        Raises:
+            ValueError: If a cell or PLMN is listed under two RICs.
+        """
+        routing_config = dict(DEFAULT_RIC_ROUTING_CONFIG)
+        routing_config.update(config.get('ric_routing') or {})
+        if not routing_config['enabled']:
+            return None
+        return cls(config['nonrtric']['ric_id'], routing_config['rics'], workers=int(routing_config['workers']))
+
+    def ric_for(self, entry):
+        """
+        Returns the RIC serving the cell of an RRMPolicyRatioList entry.
+
+        Args:
+            entry (dict): An RRMPolicyRatioList entry.
+
+        Returns:
+            str: The ric_id.
+        """
+        ric_id = self._by_nci.get(str(entry.get("nci")))
+        if ric_id is None and self._by_plmn:
+            ric_id = self._by_plmn.get(entry_plmn(entry))
+        return ric_id or self.default_ric_id
+
+    def partition(self, entries):
+        """
+        Splits RRMPolicyRatioList entries per RIC, keeping their order.
+
+        Args:
+            entries (list): RRMPolicyRatioList entries.
+
+        Returns:
+            dict: Entries per ric_id, in the order the RICs first appear.
+        """
+        groups = {}
+        for entry in entries:
+            groups.setdefault(self.ric_for(entry), []).append(entry)
+        return groups
+
+    def base_url(self, ric_id):
+        """
+        Returns the PMS base URL of a RIC.
+
+        Args:
+            ric_id (str): The RIC.
+
+        Returns:
+            str or None: The base URL, or None if the RIC uses nonrtric.base_url_pms.
+        """
+        return self._urls.get(ric_id)
+
+    def map(self, function, items):
+        """
+        Calls function on every item at the same time: the calling thread takes
+        the first item and the dispatch threads the others.
+
+        Args:
+            function (callable): Function taking one item.
+            items (iterable): Items, typically the policies of one RIC each.
+
+        Returns:
+            list: The results, in the order of items.
+        """
+        items = list(items)
+        if len(items) < 2 or self.workers < 1:
+            return [function(item) for item in items]
+        executor = self._ensure_executor()
+        futures = [executor.submit(function, item) for item in items[1:]]
+        return [function(items[0])] + [future.result() for future in futures]
+
+    def _claim(self, index, key, ric_id, kind):
+        owner = index.setdefault(key, ric_id)
+        if owner != ric_id:
+            raise ValueError(f"{kind} {key} is listed under both {owner} and {ric_id}")
+
+    def _ensure_executor(self):
+        # Threads do not survive fork(); create the pool in the process that uses it
+        with self._lock:
+            if self._executor_pid != os.getpid():
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ric-dispatch")
+                self._executor_pid = os.getpid()
+            return self._executor
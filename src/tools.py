@@ -1,24 +1,109 @@
 import json
 
-def create_rrm_policy(input_json):
-    def remove_duplicates_from_rrm_policy(data):
-        """
-        Removes duplicate entries from the 'RRMPolicyRatioList' in the provided data dictionary.
-        """
-        if "RRMPolicyRatioList" in data:
-            dict_list = data["RRMPolicyRatioList"]
-            seen = set()
-            new_list = []
-            for d in dict_list:
-                s = json.dumps(d, sort_keys=True)
-                if s not in seen:
-                    seen.add(s)
-                    new_list.append(d)
-            data["RRMPolicyRatioList"] = new_list
+_RRM_ENTRY_FIELDS = frozenset(("plmnId", "nci", "sst", "sd", "minPRB", "maxPRB"))
+_RRM_UPLINK_ENTRY_FIELDS = _RRM_ENTRY_FIELDS | {"minPRBUplink", "maxPRBUplink"}
+_PLMN_ID_FIELDS = frozenset(("mcc", "mnc"))
+
+def rrm_entry_key(entry):
+    """
+    Returns a hashable key identifying an RRMPolicyRatioList entry.
+
+    Two entries get equal keys exactly when their json.dumps(sort_keys=True)
+    serializations are equal. The key is a flat tuple of the entry values
+    tagged with their type, so 1, 1.0 and True stay distinct as they do in
+    JSON. Entries with other fields or unhashable values fall back to the JSON
+    serialization.
+    """
+    plmn_id = entry.get("plmnId")
+    keys = entry.keys()
+    if ((keys == _RRM_ENTRY_FIELDS or keys == _RRM_UPLINK_ENTRY_FIELDS)
+            and isinstance(plmn_id, dict) and plmn_id.keys() == _PLMN_ID_FIELDS):
+        mcc = plmn_id["mcc"]
+        mnc = plmn_id["mnc"]
+        nci = entry["nci"]
+        sst = entry["sst"]
+        sd = entry["sd"]
+        min_prb = entry["minPRB"]
+        max_prb = entry["maxPRB"]
+        key = (mcc.__class__, mcc, mnc.__class__, mnc, nci.__class__, nci, sst.__class__, sst,
+               sd.__class__, sd, min_prb.__class__, min_prb, max_prb.__class__, max_prb)
+        if keys == _RRM_UPLINK_ENTRY_FIELDS:
+            min_prb_uplink = entry["minPRBUplink"]
+            max_prb_uplink = entry["maxPRBUplink"]
+            key += (min_prb_uplink.__class__, min_prb_uplink, max_prb_uplink.__class__, max_prb_uplink)
+        try:
+            hash(key)
+        except TypeError:
+            pass
         else:
-            print("Key 'RRMPolicyRatioList' not found in data.")
-        return data
+            return key
+    return json.dumps(entry, sort_keys=True)
+
+def policy_entry_key(entry):
+    """
+    Returns the identity of an RRMPolicyRatioList entry: (mcc, mnc, nci, sst, sd).
+
+    Args:
+        entry (dict): An RRMPolicyRatioList entry.
+
+    Returns:
+        tuple: The entry key, with every component converted to a string.
+    """
+    plmn_id = entry.get("plmnId") or {}
+    return (str(plmn_id.get("mcc", "")), str(plmn_id.get("mnc", "")),
+            str(entry.get("nci")), str(entry.get("sst")), str(entry.get("sd")))
+
+def remove_duplicates_from_rrm_policy(data):
+    """
+    Removes duplicate entries from the 'RRMPolicyRatioList' in the provided data dictionary.
+    """
+    if "RRMPolicyRatioList" in data:
+        dict_list = data["RRMPolicyRatioList"]
+        seen = set()
+        new_list = []
+        for d in dict_list:
+            key = rrm_entry_key(d)
+            if key not in seen:
+                seen.add(key)
+                new_list.append(d)
+        data["RRMPolicyRatioList"] = new_list
+    else:
+        print("Key 'RRMPolicyRatioList' not found in data.")
+    return data
+
+def merge_rrm_policies(policies):
+    """
+    Merges the 'RRMPolicyRatioList' of several policies into one, grouped by nci.
 
+    Entries are identified by their slice (plmnId, nci, sst, sd), as in the
+    policy store. When several policies carry the same slice, the last one
+    wins: its entry, PRBs included, replaces the earlier one at the position
+    where the slice was first seen.
+
+    Args:
+        policies (iterable): Policy data dictionaries as returned by create_rrm_policy.
+
+    Returns:
+        dict: Mapping of nci to merged policy data containing an 'RRMPolicyRatioList'.
+    """
+    merged = {}
+    for policy in policies:
+        for entry in policy.get("RRMPolicyRatioList", []):
+            merged.setdefault(entry.get("nci"), {})[policy_entry_key(entry)] = entry
+    return {nci: {"RRMPolicyRatioList": list(entries.values())} for nci, entries in merged.items()}
+
+def create_rrm_policy(input_json, capacity=None):
+    """
+    Builds the RRM policy data of a NASP slice descriptor.
+
+    Args:
+        input_json (dict): NASP slice descriptor.
+        capacity (CapacityProfileRegistry, optional): Per-cell capacity profiles. Without it,
+            every cell is sized as an FDD, MCS 28, numerology 1, 50 MHz cell.
+
+    Returns:
+        dict: Policy data containing an 'RRMPolicyRatioList'.
+    """
     # Access 'resource_description' from 'description'
     resource_description = input_json.get("description", {}).get("resource_description", {})
 
@@ -55,49 +140,75 @@ def create_rrm_policy(input_json):
     guaranteed_flow_bit_rate_downlink = ssq.get("Guaranteed Flow Bit Rate - Downlink", 0)
     max_flow_bit_rate_downlink = ssq.get("Max Flow Bit Rate - Downlink", 0)
 
+    # Without any slice there is nothing to size: an invalid SSQ must not fail the empty result
+    if not ran_slices and not any(plmnSupport.get("snssaiList") for plmnSupport in amf_plmnSupportList):
+        return {"RRMPolicyRatioList": []}
+
+    # Every entry of this descriptor gets the same PRB quotas
+    if capacity is None:
+        min_prb = to_prb(guaranteed_flow_bit_rate_downlink, False, 28, 1, 50, is_tdd=False)
+        max_prb = to_prb(max_flow_bit_rate_downlink, False, 28, 1, 50, is_tdd=False)
+        uplink_quotas = {}
+    else:
+        profile = capacity.profile(ran_nci)
+        min_prb = profile.prb(guaranteed_flow_bit_rate_downlink)
+        max_prb = profile.prb(max_flow_bit_rate_downlink)
+        if capacity.uplink:
+            uplink_quotas = {
+                "minPRBUplink": profile.prb(ssq.get("Guaranteed Flow Bit Rate - Uplink", 0), is_uplink=True),
+                "maxPRBUplink": profile.prb(ssq.get("Max Flow Bit Rate - Uplink", 0), is_uplink=True),
+            }
+        else:
+            uplink_quotas = {}
+
+    # Entries are deduplicated as they are generated, keeping the first one seen
     rrm_policy_ratio_list = []
+    seen = set()
+
+    def add_entry(entry):
+        key = rrm_entry_key(entry)
+        if key not in seen:
+            seen.add(key)
+            rrm_policy_ratio_list.append(entry)
 
     # First, process amf plmnSupportList
     for plmnSupport in amf_plmnSupportList:
         plmnId = plmnSupport.get("plmnId", {})
         snssaiList = plmnSupport.get("snssaiList", [])
+        mcc = str(plmnId.get("mcc", ""))
+        mnc = str(plmnId.get("mnc", ""))
         for snssai in snssaiList:
-            sst = snssai.get("sst")
-            sd = snssai.get("sd")
-            entry = {
+            add_entry({
                 "plmnId": {
-                    "mcc": str(plmnId.get("mcc", "")),
-                    "mnc": str(plmnId.get("mnc", ""))
+                    "mcc": mcc,
+                    "mnc": mnc
                 },
                 "nci": ran_nci,
-                "sst": sst,
-                "sd": sd,
-            "minPRB": to_prb(guaranteed_flow_bit_rate_downlink,False, 28, 1, 50, is_tdd=False),
-            "maxPRB": to_prb(max_flow_bit_rate_downlink, False, 28, 1, 50, is_tdd=False)
-            }
-            rrm_policy_ratio_list.append(entry)
+                "sst": snssai.get("sst"),
+                "sd": snssai.get("sd"),
+                "minPRB": min_prb,
+                "maxPRB": max_prb,
+                **uplink_quotas
+            })
 
     # Then, process ran slices
     for slice_item in ran_slices:
-        sst = slice_item.get("sst")
-        sd = slice_item.get("sd")
-        entry = {
+        add_entry({
             "plmnId": {
                 "mcc": ran_mcc,
                 "mnc": ran_mnc
             },
             "nci": ran_nci,
-            "sst": sst,
-            "sd": sd,
-            "minPRB": to_prb(guaranteed_flow_bit_rate_downlink,False, 28, 1, 50, is_tdd=False),
-            "maxPRB": to_prb(max_flow_bit_rate_downlink, False, 28, 1, 50, is_tdd=False)
-        }
-        rrm_policy_ratio_list.append(entry)
-
-    result = {
+            "sst": slice_item.get("sst"),
+            "sd": slice_item.get("sd"),
+            "minPRB": min_prb,
+            "maxPRB": max_prb,
+            **uplink_quotas
+        })
+
+    return {
         "RRMPolicyRatioList": rrm_policy_ratio_list
     }
-    return remove_duplicates_from_rrm_policy(result)
 
 from dataclasses import dataclass
 from math import ceil
@@ -343,8 +454,10 @@ def populate_symbol_table() -> None:
         symbol_table.append(Slot(s.count('D') / 14, s.count('U') / 14, s.count('F') / 14))
 populate_symbol_table()
 
-# Computes the maximum speed (in bps) for a given cell
-def to_bps(
+# Computes the maximum speed (in bps) for a given cell, evaluating the full
+# 3GPP product on every call. to_bps serves the same values from precomputed
+# tables; this is kept as the reference implementation.
+def _to_bps_arithmetic(
         is_uplink: bool,
         mcs: int, 
         numerology: int, 
@@ -387,6 +500,76 @@ def to_bps(
         result *= symbol_ratio
     return result
 
+# Lazily built capacity tables. _bps_table[is_uplink][mcs_table][mcs][bandwidth]
+# holds, per numerology, the bps of a cell with mimo=1 and scaling_factor=1.0
+# before the TDD symbol ratio is applied; it mirrors the nesting of
+# mcs_tables_5_1_3_1 and bw so that invalid indices raise the same errors.
+# _symbol_ratio_table[is_uplink][use_flex_sym][symbol_format] holds the TDD
+# symbol ratio. Multiplying one entry of each reproduces _to_bps_arithmetic
+# bit for bit, since the skipped factors are exact multiplications by one.
+_bps_table: list = []
+_symbol_ratio_table: list = []
+
+def build_capacity_tables() -> None:
+    bps_table = []
+    for is_uplink in (False, True):
+        per_direction = []
+        for mcs_table in range(len(mcs_tables_5_1_3_1)):
+            per_table = []
+            for mcs in range(len(mcs_tables_5_1_3_1[mcs_table])):
+                per_table.append({
+                    bandwidth: [
+                        _to_bps_arithmetic(is_uplink, mcs, numerology, bandwidth, is_tdd=False, mcs_table=mcs_table)
+                        for numerology in range(len(prbs))
+                    ]
+                    for bandwidth, prbs in bw.items()
+                })
+            per_direction.append(per_table)
+        bps_table.append(per_direction)
+
+    symbol_ratio_table = []
+    for is_uplink in (False, True):
+        per_flex = []
+        for use_flex_sym in (False, True):
+            ratios = []
+            for slot in symbol_table:
+                symbol_ratio: float = 0.0
+                symbol_ratio += slot.uplink if is_uplink else slot.downlink
+                if use_flex_sym:
+                    symbol_ratio += slot.flexible
+                ratios.append(symbol_ratio)
+            per_flex.append(ratios)
+        symbol_ratio_table.append(per_flex)
+
+    _symbol_ratio_table[:] = symbol_ratio_table
+    _bps_table[:] = bps_table
+
+# Computes the maximum speed (in bps) for a given cell
+def to_bps(
+        is_uplink: bool,
+        mcs: int, 
+        numerology: int, 
+        bandwidth: int, 
+        scaling_factor: float = 1.0, 
+        mimo: int = 1, 
+        symbol_format: int = 5, 
+        is_tdd: bool = True, 
+        use_flex_sym: bool = True, 
+        mcs_table: int = 0
+        ) -> float:
+    # The tables only cover the unscaled single-layer case and non-negative
+    # numerologies; anything else takes the arithmetic path.
+    if mimo != 1 or scaling_factor != 1.0 or numerology < 0:
+        return _to_bps_arithmetic(is_uplink, mcs, numerology, bandwidth, scaling_factor=scaling_factor, mimo=mimo,
+                                  symbol_format=symbol_format, is_tdd=is_tdd, use_flex_sym=use_flex_sym,
+                                  mcs_table=mcs_table)
+    if not _bps_table:
+        build_capacity_tables()
+    result = _bps_table[bool(is_uplink)][mcs_table][mcs][bandwidth][numerology]
+    if is_tdd:
+        result *= _symbol_ratio_table[bool(is_uplink)][bool(use_flex_sym)][symbol_format]
+    return result
+
 # Computes the minimum percentage of PRBs required to achieve a given speed (in
 # bps)
 def to_prb(
@@ -407,6 +590,129 @@ def to_prb(
         return 0
     return ceil((speed/total_speed) * 100.0)
 
+# Array views of the 3GPP tables used by the batch functions below. Built on
+# first use; unused table slots (e.g. zero PRB entries in bw) stay at zero.
+# numpy is imported by the batch functions only, so the request path and
+# startup do not pay for it.
+_batch_tables: dict = {}
+
+def _get_batch_tables() -> dict:
+    import numpy as np
+
+    if not _batch_tables:
+        n_tables = len(mcs_tables_5_1_3_1)
+        n_mcs = max(len(table) for table in mcs_tables_5_1_3_1)
+        modulation_order = np.zeros((n_tables, n_mcs), dtype=np.int64)
+        code_rate = np.zeros((n_tables, n_mcs), dtype=np.float64)
+        for i, table in enumerate(mcs_tables_5_1_3_1):
+            for j, entry in enumerate(table):
+                modulation_order[i, j] = entry.modulation_order
+                code_rate[i, j] = entry.target_code_rate
+        bandwidths = np.array(sorted(bw), dtype=np.int64)
+        prbs = np.array([bw[b] for b in sorted(bw)], dtype=np.int64)
+        _batch_tables.update({
+            "modulation_order": modulation_order,
+            "code_rate": code_rate,
+            "bandwidths": bandwidths,
+            "prbs": prbs,
+            "downlink": np.array([slot.downlink for slot in symbol_table]),
+            "uplink": np.array([slot.uplink for slot in symbol_table]),
+            "flexible": np.array([slot.flexible for slot in symbol_table]),
+        })
+    return _batch_tables
+
+# Vectorized to_bps. Every argument may be a scalar or an array-like; they are
+# broadcast against each other. Returns (bps, valid), where valid flags the
+# elements that index a usable table entry with non-zero capacity. Invalid
+# elements get 0.0 instead of raising.
+def to_bps_batch(
+        is_uplink,
+        mcs,
+        numerology,
+        bandwidth,
+        scaling_factor=1.0,
+        mimo=1,
+        symbol_format=5,
+        is_tdd=True,
+        use_flex_sym=True,
+        mcs_table=0
+        ) -> tuple:
+    import numpy as np
+
+    tables = _get_batch_tables()
+    (is_uplink, mcs, numerology, bandwidth, scaling_factor, mimo, symbol_format, is_tdd, use_flex_sym,
+     mcs_table) = np.broadcast_arrays(
+        np.asarray(is_uplink, dtype=bool), np.asarray(mcs, dtype=np.int64),
+        np.asarray(numerology, dtype=np.int64), np.asarray(bandwidth),
+        np.asarray(scaling_factor, dtype=np.float64), np.asarray(mimo, dtype=np.int64),
+        np.asarray(symbol_format, dtype=np.int64), np.asarray(is_tdd, dtype=bool),
+        np.asarray(use_flex_sym, dtype=bool), np.asarray(mcs_table, dtype=np.int64))
+
+    n_tables, n_mcs = tables["modulation_order"].shape
+    n_numerologies = tables["prbs"].shape[1]
+    n_symbols = tables["downlink"].shape[0]
+    bw_index = np.searchsorted(tables["bandwidths"], bandwidth)
+    bw_index = np.minimum(bw_index, len(tables["bandwidths"]) - 1)
+    valid = (
+        (mcs_table >= 0) & (mcs_table < n_tables)
+        & (mcs >= 0) & (mcs < n_mcs)
+        & (numerology >= 0) & (numerology < n_numerologies)
+        & (tables["bandwidths"][bw_index] == bandwidth)
+        & (~is_tdd | ((symbol_format >= 0) & (symbol_format < n_symbols)))
+    )
+    # Clamp indices so that invalid elements can be gathered safely; their
+    # results are zeroed out below.
+    mcs_table_i = np.where(valid, mcs_table, 0)
+    mcs_i = np.where(valid, mcs, 0)
+    numerology_i = np.where(valid, numerology, 0)
+    symbol_i = np.where(valid & is_tdd, symbol_format, 0)
+
+    # Same factors, in the same order, as _to_bps_arithmetic so that each
+    # element matches the scalar result exactly.
+    overhead = np.where(is_uplink, 0.08, 0.14)
+    result = np.ones(valid.shape, dtype=np.float64)
+    result *= mimo
+    result *= tables["modulation_order"][mcs_table_i, mcs_i]
+    result *= scaling_factor
+    result *= tables["code_rate"][mcs_table_i, mcs_i] / 1024
+    result *= 14 * (2 ** numerology_i) * (10 ** 3)
+    result *= 12
+    result *= tables["prbs"][bw_index, numerology_i]
+    result *= 1 - overhead
+    symbol_ratio = np.where(is_uplink, tables["uplink"][symbol_i], tables["downlink"][symbol_i])
+    symbol_ratio = np.where(use_flex_sym, symbol_ratio + tables["flexible"][symbol_i], symbol_ratio)
+    result = np.where(is_tdd, result * symbol_ratio, result)
+
+    result = np.where(valid, result, 0.0)
+    return result, valid & (result != 0.0)
+
+# Vectorized to_prb. Accepts the same arguments as to_bps_batch plus an
+# array-like of speeds (in bps). Returns (prb, valid) where prb is an int64
+# array of PRB percentages; elements without capacity get 0, as in to_prb.
+def to_prb_batch(
+        speed,
+        is_uplink,
+        mcs,
+        numerology,
+        bandwidth,
+        scaling_factor=1.0,
+        mimo=1,
+        symbol_format=5,
+        is_tdd=True,
+        use_flex_sym=True,
+        mcs_table=0
+        ) -> tuple:
+    import numpy as np
+
+    total_speed, valid = to_bps_batch(is_uplink, mcs, numerology, bandwidth, scaling_factor=scaling_factor, mimo=mimo,
+                                      symbol_format=symbol_format, is_tdd=is_tdd, use_flex_sym=use_flex_sym,
+                                      mcs_table=mcs_table)
+    speed, total_speed, valid = np.broadcast_arrays(np.asarray(speed, dtype=np.float64), total_speed, valid)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        prb = np.ceil((speed / total_speed) * 100.0)
+    prb = np.where(total_speed == 0.0, 0, prb).astype(np.int64)
+    return prb, valid
+
 # Computes the latency (in miliseconds) for each slot
 def latency(
     numerology: int, 
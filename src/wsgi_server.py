@@ -0,0 +1,81 @@
+from gunicorn.app.base import BaseApplication
+
+# Defaults applied to the gunicorn settings of the 'api_server' section.
+DEFAULT_GUNICORN_CONFIG = {
+    'workers': 1,               # Worker processes; see PROCESS_LOCAL_SECTIONS in rApp_NASP
+    'threads': 8,               # Threads per worker (gthread worker class)
+    'timeout': 30,              # Seconds before a silent worker is restarted
+    'graceful_timeout': 30,     # Seconds workers get to finish requests on shutdown
+    'keepalive': 5,             # Seconds to keep idle client connections open
+    'preload': True,            # Create the Flask app in the master before forking
+    'max_requests': 0,          # Restart workers after this many requests; 0 disables
+}
+
+
+class GunicornApplication(BaseApplication):
+    """
+    Embeds gunicorn so the rApp can serve its Flask app with multiple workers.
+
+    Attributes:
+        app_factory (callable): Function returning the WSGI application.
+        options (dict): gunicorn settings.
+    """
+
+    def __init__(self, app_factory, options):
+        self.app_factory = app_factory
+        self.options = options
+        super().__init__()
+
+    def load_config(self):
+        for key, value in self.options.items():
+            if key in self.cfg.settings and value is not None:
+                self.cfg.set(key.lower(), value)
+
+    def load(self):
+        return self.app_factory()
+
+
+def start_worker_tasks(worker):
+    """
+    gunicorn post_worker_init hook starting the background tasks of the app in the worker.
+
+    With preload the app is created in the master, whose threads do not survive
+    fork(), so the journal replay and the reconciler are started in every worker
+    as soon as it has loaded the app, before it serves any request.
+
+    Args:
+        worker (gunicorn.workers.base.Worker): The initialized worker.
+    """
+    start_background_tasks = getattr(worker.wsgi, 'start_background_tasks', None)
+    if start_background_tasks is not None:
+        start_background_tasks()
+
+
+def run_gunicorn(app_factory, api_config):
+    """
+    Serves the application with gunicorn using the 'api_server' configuration section.
+
+    Args:
+        app_factory (callable): Function returning the WSGI application. With preload
+            enabled it runs once in the master process, otherwise once per worker.
+        api_config (dict): The 'api_server' configuration section.
+    """
+    server_config = dict(DEFAULT_GUNICORN_CONFIG)
+    server_config.update({key: api_config[key] for key in DEFAULT_GUNICORN_CONFIG if key in api_config})
+    host = api_config.get('host', '0.0.0.0')
+    port = api_config.get('port', 5000)
+
+    options = {
+        'bind': f"{host}:{port}",
+        'workers': int(server_config['workers']),
+        'threads': int(server_config['threads']),
+        'worker_class': 'gthread',
+        'timeout': int(server_config['timeout']),
+        'graceful_timeout': int(server_config['graceful_timeout']),
+        'keepalive': int(server_config['keepalive']),
+        'preload_app': bool(server_config['preload']),
+        'max_requests': int(server_config['max_requests']),
+        'accesslog': None,
+        'post_worker_init': start_worker_tasks,
+    }
+    GunicornApplication(app_factory, options).run()